@@ -0,0 +1,120 @@
+# benchmarks/bench_scrape.py
+
+import os
+import sys
+import json
+import time
+import shutil
+import argparse
+import tempfile
+import subprocess
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from includes.cs50fixtures import CS50FixtureServer
+
+MAIN_SCRIPT = os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), "main.py")
+
+# Named configurations compared by default; each maps to extra main.py flags
+SCENARIOS = {
+    'sequential': [],
+    'parallel': ["-workers", "4"],
+    'segmented': ["-workers", "4", "-segments", "4", "-segment_threshold", "1"],
+}
+
+def run_scenario(server, course, destination, flags):
+    """
+    Runs main.py once against the fixture server in a child process.
+
+    :return: A dict with wall time, requests, bytes, errors and peak RSS of the run
+    """
+    before = dict(server.stats)
+    command = [sys.executable, MAIN_SCRIPT, "-course", course, "-destination", destination, "-replay", server.url, "-audio", "-video", "-code"] + flags
+    started = time.perf_counter()
+    process = subprocess.Popen(command, stdout=subprocess.DEVNULL, stderr=subprocess.PIPE)
+    # wait4 gives the resource usage of this child alone
+    _, status, usage = os.wait4(process.pid, 0)
+    elapsed = time.perf_counter() - started
+    process.returncode = os.waitstatus_to_exitcode(status)
+    stderr = process.stderr.read().decode(errors='replace')
+    process.stderr.close()
+    if process.returncode != 0:
+        raise RuntimeError(f"main.py exited with {process.returncode}: {stderr.strip()}")
+
+    requests = server.stats['requests'] - before['requests']
+    transferred = server.stats['bytes'] - before['bytes']
+    return {
+        'seconds': elapsed,
+        'requests': requests,
+        'bytes': transferred,
+        'errors': server.stats['errors'] - before['errors'],
+        'requests_per_second': requests / elapsed if elapsed else 0,
+        'bytes_per_second': transferred / elapsed if elapsed else 0,
+        # ru_maxrss is in KB on Linux
+        'peak_rss_mb': usage.ru_maxrss / 1024,
+    }
+
+def format_row(columns, widths):
+    return "  ".join(str(column).ljust(width) for column, width in zip(columns, widths))
+
+def print_results(results):
+    headers = ("scenario", "run", "seconds", "requests", "req/s", "MB/s", "errors", "peak RSS MB")
+    rows = [
+        (
+            result['scenario'], result['run'], f"{result['seconds']:.2f}", result['requests'],
+            f"{result['requests_per_second']:.1f}", f"{result['bytes_per_second'] / (1024 * 1024):.2f}",
+            result['errors'], f"{result['peak_rss_mb']:.1f}",
+        )
+        for result in results
+    ]
+    widths = [max(len(str(row[index])) for row in rows + [headers]) for index in range(len(headers))]
+    print(format_row(headers, widths))
+    for row in rows:
+        print(format_row(row, widths))
+
+def main():
+    parser = argparse.ArgumentParser(description="Benchmark scraping a recorded corpus under controlled network conditions")
+    parser.add_argument("-corpus", help="corpus directory recorded with main.py -record", required=True)
+    parser.add_argument("-course", help="the course recorded in the corpus", required=True)
+    parser.add_argument("-scenarios", help="comma-separated scenarios to run", default=",".join(SCENARIOS))
+    parser.add_argument("-runs", help="cold runs per scenario, each followed by a warm re-run", type=int, default=1)
+    parser.add_argument("-latency", help="latency added to every response in ms", type=float, default=50)
+    parser.add_argument("-bandwidth", help="per-response bandwidth cap in KB/s", type=int, default=None)
+    parser.add_argument("-error_rate", help="probability of injecting an error", type=float, default=0)
+    parser.add_argument("-seed", help="random seed for error injection", type=int, default=0)
+    parser.add_argument("-output", help="write the results as JSON to this file", default=None)
+    args = parser.parse_args()
+
+    server = CS50FixtureServer(
+        args.corpus,
+        latency=args.latency / 1000,
+        bandwidth=args.bandwidth * 1024 if args.bandwidth else None,
+        error_rate=args.error_rate,
+        seed=args.seed,
+    )
+    server.start()
+
+    results = []
+    try:
+        for scenario in args.scenarios.split(','):
+            flags = SCENARIOS[scenario]
+            for run in range(args.runs):
+                destination = tempfile.mkdtemp(prefix="cs50-bench-")
+                try:
+                    # A cold run from an empty destination, then a warm run reusing its cache and files
+                    for phase, extra in (("cold", []), ("warm", ["-incremental"])):
+                        result = run_scenario(server, args.course, destination, flags + extra)
+                        result.update({'scenario': scenario, 'run': f"{run + 1}/{phase}"})
+                        results.append(result)
+                finally:
+                    shutil.rmtree(destination, ignore_errors=True)
+    finally:
+        server.stop()
+
+    print_results(results)
+    if args.output:
+        with open(args.output, 'w') as file:
+            json.dump({'settings': vars(args), 'results': results}, file, indent=2)
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,87 @@
+# benchmarks/bench_startup.py
+
+import os
+import sys
+import json
+import time
+import shutil
+import argparse
+import tempfile
+import statistics
+import subprocess
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from includes.cs50fixtures import CS50FixtureServer
+
+MAIN_SCRIPT = os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), "main.py")
+
+def run_command(arguments):
+    started = time.perf_counter()
+    completed = subprocess.run([sys.executable, MAIN_SCRIPT] + arguments, stdout=subprocess.DEVNULL, stderr=subprocess.PIPE)
+    elapsed = time.perf_counter() - started
+    if completed.returncode != 0:
+        raise RuntimeError(f"main.py exited with {completed.returncode}: {completed.stderr.decode(errors='replace').strip()}")
+    return elapsed
+
+def import_times(arguments):
+    """
+    Runs main.py once under `python -X importtime`.
+
+    :return: A tuple of (total import seconds, the slowest top-level imports as (name, seconds))
+    """
+    completed = subprocess.run([sys.executable, "-X", "importtime", MAIN_SCRIPT] + arguments, stdout=subprocess.DEVNULL, stderr=subprocess.PIPE)
+    top_level = []
+    for line in completed.stderr.decode(errors='replace').splitlines():
+        if not line.startswith("import time:") or "cumulative" in line:
+            continue
+        _, cumulative, name = line[len("import time:"):].split("|")
+        # Nested imports are indented below their parent
+        if not name[1:].startswith(" "):
+            top_level.append((name.strip(), int(cumulative) / 1e6))
+    return sum(seconds for _, seconds in top_level), sorted(top_level, key=lambda item: -item[1])[:8]
+
+def measure(name, arguments, runs):
+    times = [run_command(arguments) for _ in range(runs)]
+    import_seconds, slowest = import_times(arguments)
+    return {
+        'command': name,
+        'median_ms': statistics.median(times) * 1000,
+        'min_ms': min(times) * 1000,
+        'import_ms': import_seconds * 1000,
+        'slowest_imports': [{'module': module, 'ms': seconds * 1000} for module, seconds in slowest],
+    }
+
+def main():
+    parser = argparse.ArgumentParser(description="Benchmark main.py startup: -h, and a no-op sync against a warm cache")
+    parser.add_argument("-corpus", help="corpus directory recorded with main.py -record, for the no-op sync", default=None)
+    parser.add_argument("-course", help="the course recorded in the corpus", default=None)
+    parser.add_argument("-runs", help="timed runs per command", type=int, default=5)
+    parser.add_argument("-output", help="write the results as JSON to this file", default=None)
+    args = parser.parse_args()
+
+    results = [measure("help", ["-h"], args.runs)]
+
+    if args.corpus and args.course:
+        server = CS50FixtureServer(args.corpus)
+        server.start()
+        destination = tempfile.mkdtemp(prefix="cs50-bench-")
+        try:
+            sync = ["-course", args.course, "-destination", destination, "-replay", server.url, "-code", "-incremental"]
+            # Fill the page cache and the destination, then time syncs that find nothing to do
+            run_command(sync)
+            results.append(measure("noop_sync", sync, args.runs))
+        finally:
+            server.stop()
+            shutil.rmtree(destination, ignore_errors=True)
+
+    for result in results:
+        print(f"{result['command']}: median {result['median_ms']:.0f} ms, min {result['min_ms']:.0f} ms, imports {result['import_ms']:.0f} ms")
+        for module in result['slowest_imports']:
+            print(f"    {module['module']:<40}{module['ms']:>8.1f} ms")
+    if args.output:
+        with open(args.output, 'w') as file:
+            json.dump({'settings': vars(args), 'results': results}, file, indent=2)
+
+if __name__ == "__main__":
+    main()
@@ -1,10 +1,21 @@
 # includes/cs50.py
-from bs4 import BeautifulSoup
-import requests
+from includes.cs50parser import (
+    extract_week_record, extract_problem_set_list, extract_problem_set_record,
+    parse_html, classify_link, empty_media_links, filter_media_links,
+)
 import urllib.parse
-import re
 
 class CS50:
+    # Folder each course is saved in, below the destination
+    COURSE_FOLDERS = {
+        "x": "cs50x",
+        "python": "cs50p",
+        "web": "cs50web",
+        "ai": "cs50ai",
+        "sql": "cs50sql",
+        "scratch": "cs50scratch",
+    }
+
     class CS50:
         """
         A class to scrape and parse CS50 course data.
@@ -26,13 +37,21 @@ class CS50:
             get_problem_set(problem_sets, week): Retrieves detailed content for each problem set.
         """
  
-    def __init__(self, course=None):
+    def __init__(self, course=None, http_client=None, page_cache=None, parse_pool=None):
         """
         Initializes the CS50 instance with the given course.
  
         Args:
             course (str): The course identifier (e.g., 'x', 'python', etc.).
+            http_client (CS50HttpClient): Shared pooled HTTP client. A private one is created on first use if omitted.
+            page_cache (CS50PageCache): Optional on-disk cache used for conditional page requests.
+            parse_pool (CS50ParsePool): Optional process pool the pages are parsed in. Pages are parsed in the calling thread if omitted.
         """
+        self._http_client = http_client
+        self.page_cache = page_cache
+        self.parse_pool = parse_pool
+        # Futures of pages requested ahead of time (see prefetch), keyed by URL
+        self.prefetched = {}
         self.course_urls = {
             "x": "https://cs50.harvard.edu/x/2024/weeks/",
             "python": "https://cs50.harvard.edu/python/2022/weeks/",
@@ -71,158 +90,236 @@ class CS50:
             if self.base_url is None or self.pset_url is None:
                 raise ValueError(f"Unknown course: {course}")
  
+    @property
+    def http_client(self):
+        # Created on first use, so instances only used for course information do not load requests
+        if self._http_client is None:
+            from includes.cs50http import CS50HttpClient
+            self._http_client = CS50HttpClient()
+        return self._http_client
+
     def get_course_choices(self):
         choices = []
         for key, info in self.course_information.items():
             choices.append(f"{info['name']}: {info['description']}")
         return choices
  
+    def parse_course_list(self, value):
+        """
+        Parses a comma-separated list of course identifiers, or 'all'.
+ 
+        Args:
+            value (str): e.g. 'x,python' or 'all'.
+ 
+        Returns:
+            list: Course identifiers in the order given.
+        """
+        if value.strip() == 'all':
+            return list(self.course_urls)
+        courses = [course.strip() for course in value.split(',') if course.strip()]
+        for course in courses:
+            if course not in self.course_urls:
+                raise ValueError(f"Unknown course: {course}")
+        return courses
+
+    @staticmethod
+    def get_course_folder_name(course):
+        """
+        Maps a course identifier to the folder it is saved in.
+
+        Args:
+            course (str): The course identifier (e.g., 'x', 'python', etc.).
+
+        Returns:
+            str: The folder name, or the identifier itself for courses without a mapping.
+        """
+        return CS50.COURSE_FOLDERS.get(course, course)
+
     def get_course_key_from_choice(self, choice):
         for key, info in self.course_information.items():
             if choice.startswith(info['name']):
                 return key
         return None
 
+    def fetch_page(self, url):
+        """
+        Fetches a course page, through the page cache when one is configured, or takes it from a prefetch.
+ 
+        Args:
+            url (str): The page URL.
+ 
+        Returns:
+            Response: An object with `status_code` and `text` attributes.
+        """
+        future = self.prefetched.pop(url, None)
+        if future is not None:
+            return future.result()
+        return self.request_page(url)
+
+    def request_page(self, url):
+        if self.page_cache:
+            return self.page_cache.fetch(self.http_client, url)
+        return self.http_client.get(url)
+
+    def prefetch(self, executor, urls):
+        """
+        Starts fetching pages that are expected to be needed, e.g. problem set pages known from an earlier run.
+ 
+        Args:
+            executor (Executor): Runs the fetches. Its tasks must not wait for other tasks of the same executor.
+            urls (list): Page URLs; fetch_page returns the prefetched response once for each.
+        """
+        for url in urls:
+            if url not in self.prefetched:
+                self.prefetched[url] = executor.submit(self.request_page, url)
+
+    def parse(self, function, html, *args):
+        """
+        Runs a cs50parser extract function on a fetched page.
+ 
+        Args:
+            function (callable): e.g. extract_week_record.
+            html (str): The page body.
+            *args: Further arguments for the function.
+ 
+        Returns:
+            The extracted record, built in the parse pool when one is configured.
+        """
+        with self.http_client.metrics.phase('parse_html'):
+            if self.parse_pool:
+                return self.parse_pool.parse(function, html, *args)
+            return function(html, *args)
+
     def scrape_page(self, week):
         """
         Scrapes the main page for the given week.
  
+        The page is parsed once into a week record (see cs50parser.extract_week_record),
+        which the getters below read from.
+ 
         Args:
             week (int): The week number to scrape.
  
         Returns:
-            BeautifulSoup: Parsed HTML document of the week's page.
+            dict: The extracted week record.
             None: If the page is not found (HTTP 404).
  
         """
         url = self.base_url + str(week) + "/"
-        result = requests.get(url)
+        result = self.fetch_page(url)
         if result.status_code == 404:
             return None
-        self.doc = BeautifulSoup(result.text, "html.parser")
-        self.col = self.doc.find('main', class_='col-lg')
-        return self.doc
+        self.record = self.parse(extract_week_record, result.text, url)
+        return self.record
  
     def scrape_problem_set_page(self, week):
         url = self.pset_url + str(week) + "/"
-        result = requests.get(url)
+        result = self.fetch_page(url)
         if result.status_code == 404:
             return None
-        self.pset_doc = BeautifulSoup(result.text, "html.parser")
-        self.pset_col = self.pset_doc.find('main', class_='col-lg')
-        return self.pset_doc
+        self.problem_set_list = self.parse(extract_problem_set_list, result.text, self.course)
+        return self.problem_set_list
  
     def progress(self, week):
         week += 1
         return week
  
     def get_title(self):
-        self.meta_tag = self.doc.find('meta', property='og:title')
-        self.title = self.meta_tag['content'] if self.meta_tag else 'No title found'
+        self.title = self.record['title'] or 'No title found'
         return f"Title: {self.title}"
  
     def get_description(self):
-        self.meta_tag = self.doc.find('meta', property='og:description')
-        self.description = self.meta_tag['content'] if self.meta_tag else 'No description found'
+        self.description = self.record['description'] or 'No description found'
         return f"Desc: {self.description}"
     
     def get_week_tags(self):
-        self.h1_text = self.col.find('h1').get_text() if self.col.find('h1') else 'No h1 found'
-        self.tags_text = self.col.find('p').get_text() if self.col.find('p') else 'No tags found'
+        self.h1_text = self.record['h1'] or 'No h1 found'
+        self.tags_text = self.record['tags'] or 'No tags found'
         return f"Tags: {self.tags_text}"
  
     def get_shorts(self):
-        self.shorts_string = self.doc.find(string="Shorts")
-        if self.shorts_string:
-            self.ordered_list = self.shorts_string.find_next('ol')
-            self.links = self.ordered_list.find_all('a') if self.ordered_list else []
-            self.video_titles = [self.link.text for self.link in self.links]
+        if self.record['shorts'] is not None:
+            self.video_titles = self.record['shorts']
             return(f"Short Videos: {self.video_titles}")
         else:
             return("No shorts found")
     
     def get_problem_set_lists(self):
-        if self.pset_col:
-            problem_sets = []
-
-            if self.course in ['python', 'ai']:
-                self.main_content = self.pset_col.find('ul')
-                if self.main_content:
-                    for item in self.main_content.find_all('li'):
-                        link = item.find('a')
-                        title = item.text.strip()
-                        url = link['href'] if link else 'No URL'
-                        problem_sets.append({'title': title, 'url': url})
-                else:
-                    #print("Debug - No problem sets found")
-                    return []
-            else:
-                # Use regex pattern to find all 'li' tags that contain 'Submit' links
-                for li in self.pset_col.find_all('li'):
-                    if 'Submit' in li.text:
-                        link = li.find('a')
-                        if link:
-                            title = link.text.strip()
-                            url = link['href']
-                            problem_sets.append({'title': title, 'url': url})
-
-            #print("Debug - Problem Sets:", problem_sets)  # Debug print statement
-            return problem_sets
-        else:
-            #print("Debug - No problem set column found")
-            return []
+        # Copies, so callers can annotate the dicts without touching the parsed list
+        return [dict(problem_set) for problem_set in self.problem_set_list or []]
+ 
+    def get_problem_set_url(self, problem_set, week):
+        """
+        Resolves a problem set's URL, which the index page may give relative to the week's problem set page.
+        """
+        url = problem_set['url']
+        if not url.startswith('http'):
+            url = urllib.parse.urljoin(f"{self.pset_url}{week}/", url)
+        return url
 
+    def get_problem_set_record_list(self, problem_sets, week):
+        """
+        Retrieves and parses each problem set page.
+ 
+        With a parse pool, each page is parsed in a worker process while the next one is fetched.
+ 
+        Args:
+            problem_sets (list): Problem set dicts with 'title' and 'url'.
+            week (int): The week the problem sets belong to.
+ 
+        Returns:
+            list: Problem set records (see cs50parser.extract_problem_set_record), in the order of problem_sets.
+        """
+        records = []
+        for problem_set in problem_sets:
+            url = self.get_problem_set_url(problem_set, week)
+            result = self.fetch_page(url)
+            if result.status_code != 200:
+                records.append({'content': 'Failed to retrieve', 'media_links': empty_media_links()})
+            elif self.parse_pool:
+                records.append(self.parse_pool.submit(extract_problem_set_record, result.text, url))
+            else:
+                records.append(self.parse(extract_problem_set_record, result.text, url))
+        if self.parse_pool:
+            with self.http_client.metrics.phase('parse_html'):
+                records = [record.result() if not isinstance(record, dict) else record for record in records]
+        return records
 
+    def get_problem_set_records(self, problem_sets, week):
+        """
+        Retrieves and parses each problem set page.
+ 
+        Returns:
+            dict: Problem set records (see cs50parser.extract_problem_set_record) keyed by title.
+        """
+        records = self.get_problem_set_record_list(problem_sets, week)
+        return {problem_set['title']: record for problem_set, record in zip(problem_sets, records)}
  
     def get_problem_set(self, problem_sets, week):
-        data = {}
         for problem_set in problem_sets:
-            if isinstance(problem_set, dict):
-                url = problem_set['url']
-                if not url.startswith('http'):
-                    url = urllib.parse.urljoin(f"{self.pset_url}{week}/", url)
-                result = requests.get(url)
-                if result.status_code == 200:
-                    pset_doc = BeautifulSoup(result.text, "html.parser")
-                    # Extract the required data from pset_doc
-                    content = pset_doc.find('main', class_='col-lg').text.strip() if pset_doc.find('main', class_='col-lg') else 'No content found'
-                    data[problem_set['title']] = content
-                else:
-                    data[problem_set['title']] = 'Failed to retrieve'
-                    #print(url)
-            else:
+            if not isinstance(problem_set, dict):
                 return("Error - Expected a dictionary but got:", type(problem_set))
-        return data
+        records = self.get_problem_set_records(problem_sets, week)
+        return {title: record['content'] for title, record in records.items()}
  
-    # includes/cs50.py
     def get_media_links(self, content, download_audio, download_video, download_code):
-        soup = BeautifulSoup(content, 'html.parser')
-        links = {'audio': [], 'video': [], 'code': [], 'pdf': []}
-
-        # Find audio links
-        if download_audio:
-            audio_links = soup.find_all('a', href=re.compile(r'.*\.mp3$'))
-            for link in audio_links:
-                links['audio'].append(link['href'])
-
-        # Find video links (720p)
-        if download_video:
-            video_links = soup.find_all('a', href=re.compile(r'.*720p\.mp4$'))
-            for link in video_links:
-                links['video'].append(link['href'])
-
-        # Find code links
-        if download_code:
-            code_links = soup.find_all('a', href=re.compile(r'.*\.zip$'))
-            for link in code_links:
-                links['code'].append(link['href'])
-
-        # Find PDF links
-        pdf_links = soup.find_all('a', href=re.compile(r'.*\.pdf$'))
-        for link in pdf_links:
-            links['pdf'].append(link['href'])
-
-        #("Debug - Extracted Media Links:", links)  # Debug print statement
-        return links
+        """
+        Returns the media links enabled by the download flags.
+ 
+        Args:
+            content (dict or str): A week or problem set record, or raw HTML to parse.
+ 
+        Returns:
+            dict: Lists of links keyed by 'audio', 'video', 'code' and 'pdf'.
+        """
+        if isinstance(content, dict):
+            media_links = content['media_links']
+        else:
+            media_links = empty_media_links()
+            for link in parse_html(content).find_all('a', href=True):
+                kind = classify_link(link['href'])
+                if kind:
+                    media_links[kind].append(link['href'])
+        return filter_media_links(media_links, download_audio, download_video, download_code)
 
 
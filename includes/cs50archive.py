@@ -0,0 +1,194 @@
+# includes/cs50archive.py
+
+import os
+import sys
+import shutil
+import zipfile
+from concurrent.futures import ThreadPoolExecutor
+
+# Size of each chunk copied from an archive member to disk
+EXTRACT_CHUNK_SIZE = 1024 * 1024
+
+def member_path(extract_to, name):
+    """
+    Resolves where an archive member is extracted, rejecting names that escape extract_to.
+
+    :param extract_to: The extraction folder
+    :param name: The member name from the archive
+    :return: The target path, or None for unsafe names (absolute paths, '..', drive letters)
+    """
+    parts = name.replace('\\', '/').split('/')
+    # Absolute names and drive letters, which splitting would otherwise turn into relative ones
+    if parts[0] == '' or ':' in parts[0]:
+        return None
+    root = os.path.realpath(extract_to)
+    target = os.path.realpath(os.path.join(root, *parts))
+    try:
+        if os.path.commonpath([root, target]) != root or target == root:
+            return None
+    except ValueError:
+        # Different drives on Windows
+        return None
+    return target
+
+def extract_members(zip_path, extract_to, members):
+    # Each worker opens its own handle so members are decompressed in parallel
+    with zipfile.ZipFile(zip_path, 'r') as zip_ref:
+        for info in members:
+            target = member_path(extract_to, info.filename)
+            os.makedirs(os.path.dirname(target), exist_ok=True)
+            with zip_ref.open(info) as source, open(target, 'wb') as destination:
+                shutil.copyfileobj(source, destination, EXTRACT_CHUNK_SIZE)
+
+def extract_archive(zip_path, extract_to, workers=1):
+    """
+    Extracts a zip archive, streaming each member in fixed-size chunks and keeping its folders.
+
+    Members whose names would escape extract_to are skipped.
+
+    :param zip_path: The archive
+    :param extract_to: The folder to extract into
+    :param workers: Number of threads extracting members in parallel
+    :return: A tuple of (extracted member names, skipped member names)
+    """
+    with zipfile.ZipFile(zip_path, 'r') as zip_ref:
+        infos = zip_ref.infolist()
+
+    members, skipped = [], []
+    for info in infos:
+        if info.is_dir():
+            continue
+        if member_path(extract_to, info.filename) is None:
+            skipped.append(info.filename)
+        else:
+            members.append(info)
+
+    workers = max(1, min(workers, len(members)))
+    if workers == 1:
+        if members:
+            extract_members(zip_path, extract_to, members)
+    else:
+        # Largest members first, dealt round robin, to balance the workers
+        members_by_size = sorted(members, key=lambda info: info.file_size, reverse=True)
+        batches = [members_by_size[index::workers] for index in range(workers)]
+        with ThreadPoolExecutor(max_workers=workers) as executor:
+            for future in [executor.submit(extract_members, zip_path, extract_to, batch) for batch in batches]:
+                future.result()
+
+    return [info.filename for info in members], skipped
+
+class CS50ExampleCode:
+    """
+    Read-only access to example code kept as zip archives instead of being extracted.
+
+    Listings come from the zip central directory, so browsing a course's example code
+    does not read or decompress any file contents.
+
+    Attributes:
+        directory (str): An `example_code` folder holding the archives.
+        archives (list): Paths of the zip archives in the folder.
+    """
+
+    def __init__(self, directory):
+        self.directory = directory
+        self.archives = sorted(
+            os.path.join(directory, name) for name in os.listdir(directory)
+            if name.endswith(".zip")
+        ) if os.path.isdir(directory) else []
+
+    @staticmethod
+    def find(course_dir):
+        """
+        Finds every example_code folder under a course folder that holds archives.
+
+        :param course_dir: A course folder, e.g. saved/cs50x
+        :return: A list of CS50ExampleCode instances
+        """
+        found = []
+        for root, directories, _ in os.walk(course_dir):
+            directories[:] = sorted(directory for directory in directories if not directory.startswith('.'))
+            if os.path.basename(root) == "example_code":
+                example_code = CS50ExampleCode(root)
+                if example_code.archives:
+                    found.append(example_code)
+        return found
+
+    def list(self):
+        """
+        Lists every file in the folder's archives.
+
+        :return: A list of dicts with 'archive', 'name', 'size', 'compressed_size' and 'modified'
+        """
+        files = []
+        for archive in self.archives:
+            with zipfile.ZipFile(archive, 'r') as zip_ref:
+                for info in zip_ref.infolist():
+                    if info.is_dir():
+                        continue
+                    files.append({
+                        'archive': os.path.basename(archive),
+                        'name': info.filename,
+                        'size': info.file_size,
+                        'compressed_size': info.compress_size,
+                        'modified': "%04d-%02d-%02d %02d:%02d:%02d" % info.date_time,
+                    })
+        return files
+
+    def find_archive(self, name, archive=None):
+        for path in self.archives:
+            if archive and os.path.basename(path) != archive:
+                continue
+            with zipfile.ZipFile(path, 'r') as zip_ref:
+                if name in zip_ref.NameToInfo:
+                    return path
+        raise KeyError(f"{name} not found in {self.directory}")
+
+    def open(self, name, archive=None):
+        """
+        Opens a file from the archives for streaming reads.
+
+        :param name: The member name as listed
+        :param archive: The archive file name, if several archives contain the same name
+        :return: A binary file object; closing it closes the archive
+        """
+        zip_ref = zipfile.ZipFile(self.find_archive(name, archive), 'r')
+        member = zip_ref.open(name)
+        close_member = member.close
+
+        def close():
+            close_member()
+            zip_ref.close()
+
+        member.close = close
+        return member
+
+    def read(self, name, archive=None):
+        with self.open(name, archive) as member:
+            return member.read()
+
+    def extract(self, name, destination, archive=None):
+        """
+        Extracts a single file, keeping its folders below destination.
+
+        :return: The path written
+        """
+        target = member_path(destination, name)
+        if target is None:
+            raise ValueError(f"Unsafe member name: {name}")
+        os.makedirs(os.path.dirname(target), exist_ok=True)
+        with self.open(name, archive) as source, open(target, 'wb') as output:
+            shutil.copyfileobj(source, output, EXTRACT_CHUNK_SIZE)
+        return target
+
+def main():
+    # Lists the example code kept as archives under a course folder
+    if len(sys.argv) != 2:
+        print("Usage: python -m includes.cs50archive <course folder>")
+        sys.exit(1)
+    for example_code in CS50ExampleCode.find(sys.argv[1]):
+        print(example_code.directory)
+        for file in example_code.list():
+            print(f"    {file['archive']}: {file['name']} ({file['size']} bytes)")
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,175 @@
+# includes/cs50blobstore.py
+
+import os
+import json
+import shutil
+import threading
+import contextlib
+
+try:
+    import fcntl
+    # Linux ioctl cloning a whole file (btrfs, xfs and other copy-on-write filesystems)
+    FICLONE = 0x40049409
+except ImportError:
+    fcntl = None
+
+class CS50BlobStore:
+    """
+    A content-addressed store of downloaded files shared by every course under a destination.
+
+    Objects are stored once under `.blobs/objects/<2 hex>/<sha256>`, and the files in the
+    week and problem set folders are hardlinks to them (reflinks, then copies, where
+    hardlinks are not possible). An index maps each source URL to its hash and HTTP
+    validators, so a URL that was already fetched is revalidated and linked instead of
+    downloaded again, and identical files from different URLs share one object.
+
+    Hardlinked files share their contents: editing one in place changes every copy.
+
+    The index is kept in memory and written by save, which CS50FileManager.flush calls at the
+    end of a run. An object missing from an interrupted run's index is found again by its
+    hash on the next download of its URL.
+
+    Attributes:
+        root (str): The store directory, usually `<destination>/.blobs`.
+        index (dict): Entries keyed by URL with 'sha256', 'size', 'etag' and 'last_modified'.
+        dirty (bool): Whether the index changed since it was last saved.
+    """
+
+    INDEX_FILE_NAME = "index.json"
+
+    def __init__(self, root):
+        self.root = root
+        self.objects_directory = os.path.join(root, "objects")
+        self.index_path = os.path.join(root, self.INDEX_FILE_NAME)
+        os.makedirs(self.objects_directory, exist_ok=True)
+        self.lock = threading.Lock()
+        # Per-URL locks so concurrent courses fetch a shared URL once
+        self.url_locks = {}
+        # URLs stored during this run, linked without revalidation
+        self.fresh = set()
+        self.dirty = False
+        try:
+            with open(self.index_path, 'r') as file:
+                self.index = json.load(file)
+        except (OSError, ValueError):
+            self.index = {}
+
+    def object_path(self, sha256):
+        return os.path.join(self.objects_directory, sha256[:2], sha256)
+
+    def lookup(self, url):
+        """
+        Returns the index entry for a URL if its object is still in the store.
+
+        :param url: The source URL
+        :return: The entry dict, or None
+        """
+        with self.lock:
+            entry = self.index.get(url)
+        if entry and os.path.exists(self.object_path(entry['sha256'])):
+            return entry
+        return None
+
+    def is_fresh(self, url):
+        with self.lock:
+            return url in self.fresh
+
+    @contextlib.contextmanager
+    def claim(self, url):
+        """
+        Serialises downloads of the same URL, so a second download finds the first one's object.
+        """
+        with self.lock:
+            url_lock = self.url_locks.setdefault(url, threading.Lock())
+        with url_lock:
+            yield
+
+    def add(self, file_name, url, sha256, etag=None, last_modified=None):
+        """
+        Moves a freshly downloaded file into the store and links it back in place.
+
+        If the store already holds the same content, the file is replaced by a link to the
+        existing object.
+
+        :param file_name: The downloaded file
+        :param url: The URL it was downloaded from
+        :param sha256: Hex SHA-256 of its contents
+        :return: True if the content was already in the store
+        """
+        object_path = self.object_path(sha256)
+        os.makedirs(os.path.dirname(object_path), exist_ok=True)
+        with self.lock:
+            existed = os.path.exists(object_path)
+            if existed:
+                self.link(object_path, file_name)
+            else:
+                try:
+                    os.link(file_name, object_path)
+                except OSError:
+                    shutil.copyfile(file_name, object_path)
+            self.index[url] = {'sha256': sha256, 'size': os.path.getsize(object_path), 'etag': etag, 'last_modified': last_modified}
+            self.fresh.add(url)
+            self.dirty = True
+        return existed
+
+    def link(self, object_path, file_name):
+        """
+        Points file_name at a stored object: a hardlink, else a reflink, else a copy.
+        """
+        # Renaming a hardlink over another link to the same object does nothing and would leave the temporary link behind
+        if os.path.exists(file_name) and os.path.samefile(object_path, file_name):
+            return
+        temp_name = file_name + ".link"
+        if os.path.exists(temp_name):
+            os.remove(temp_name)
+        try:
+            os.link(object_path, temp_name)
+        except OSError:
+            if not self.reflink(object_path, temp_name):
+                shutil.copyfile(object_path, temp_name)
+        os.replace(temp_name, file_name)
+
+    def reflink(self, source, destination):
+        if fcntl is None:
+            return False
+        try:
+            with open(source, 'rb') as source_file, open(destination, 'wb') as destination_file:
+                fcntl.ioctl(destination_file.fileno(), FICLONE, source_file.fileno())
+            return True
+        except OSError:
+            if os.path.exists(destination):
+                os.remove(destination)
+            return False
+
+    def link_url(self, url, file_name):
+        """
+        Links the stored object of a URL to file_name. The URL then counts as fresh for the rest of the run.
+
+        :return: The index entry used, or None if the URL is not in the store
+        """
+        entry = self.lookup(url)
+        if entry:
+            self.link(self.object_path(entry['sha256']), file_name)
+            with self.lock:
+                self.fresh.add(url)
+        return entry
+
+    def clear_fresh(self):
+        """
+        Starts a new run within the same process: URLs stored or linked so far are revalidated again before they are linked.
+        """
+        with self.lock:
+            self.fresh.clear()
+
+    def save(self):
+        """
+        Writes the index if it changed since it was last written.
+        """
+        with self.lock:
+            if not self.dirty:
+                return
+            temp_path = self.index_path + ".tmp"
+            with open(temp_path, 'w') as file:
+                json.dump(self.index, file, indent=1)
+            os.replace(temp_path, self.index_path)
+            self.dirty = False
@@ -0,0 +1,146 @@
+# includes/cs50cache.py
+
+import os
+import json
+import hashlib
+import threading
+
+class CS50CachedResponse:
+    """
+    The subset of a requests.Response used by the CS50 fetch methods.
+
+    Attributes:
+        status_code (int): HTTP status of the page (200 when served from the cache).
+        text (str): The page body.
+        from_cache (bool): True if the server answered 304 and the body came from disk.
+    """
+
+    def __init__(self, status_code, text, from_cache=False):
+        self.status_code = status_code
+        self.text = text
+        self.from_cache = from_cache
+
+class CS50PageCache:
+    """
+    An on-disk HTTP cache for week, problem set index and problem set pages.
+
+    Each page is stored as a body file plus a JSON file holding its ETag and
+    Last-Modified validators. Later fetches send If-None-Match / If-Modified-Since,
+    and a 304 response is served from disk. When the cache grows past `max_size`
+    bytes, the least recently used pages are evicted.
+
+    Attributes:
+        cache_directory (str): Directory holding the cached pages.
+        max_size (int): Maximum total size of cached bodies in bytes.
+        refresh (bool): If True, ignore cached validators and re-download every page.
+        read_only (bool): If True, cached pages are used but nothing is stored, touched or evicted (e.g. for dry runs).
+    """
+
+    def __init__(self, cache_directory, max_size=50 * 1024 * 1024, refresh=False, read_only=False):
+        self.cache_directory = cache_directory
+        self.max_size = max_size
+        self.refresh = refresh
+        self.read_only = read_only
+        self.lock = threading.Lock()
+        self.total_size = None
+        if not read_only:
+            os.makedirs(cache_directory, exist_ok=True)
+
+    def get_paths(self, url):
+        key = hashlib.sha256(url.encode('utf-8')).hexdigest()
+        base = os.path.join(self.cache_directory, key)
+        return base + ".body", base + ".json"
+
+    def load(self, url):
+        body_path, meta_path = self.get_paths(url)
+        try:
+            with open(meta_path, 'r') as file:
+                meta = json.load(file)
+            with open(body_path, 'r', encoding='utf-8') as file:
+                body = file.read()
+        except (OSError, ValueError):
+            return None, None
+        return meta, body
+
+    def store(self, url, response):
+        body_path, meta_path = self.get_paths(url)
+        old_size = os.path.getsize(body_path) if os.path.exists(body_path) else 0
+        meta = {
+            'url': url,
+            'etag': response.headers.get('ETag'),
+            'last_modified': response.headers.get('Last-Modified'),
+        }
+        # Write through temp files so concurrent readers never see half a page
+        for path, write in ((body_path, lambda file: file.write(response.text)), (meta_path, lambda file: json.dump(meta, file))):
+            temp_path = f"{path}.{threading.get_ident()}.tmp"
+            with open(temp_path, 'w', encoding='utf-8') as file:
+                write(file)
+            os.replace(temp_path, path)
+
+        with self.lock:
+            if self.total_size is not None:
+                self.total_size += os.path.getsize(body_path) - old_size
+        if self.total_size is None or self.total_size > self.max_size:
+            self.evict()
+
+    def fetch(self, http_client, url):
+        """
+        Fetches a page, revalidating any cached copy with a conditional request.
+
+        :param http_client: The CS50HttpClient used for the request
+        :param url: The page URL
+        :return: A CS50CachedResponse
+        """
+        meta, body = (None, None) if self.refresh else self.load(url)
+        headers = {}
+        if meta:
+            if meta.get('etag'):
+                headers['If-None-Match'] = meta['etag']
+            if meta.get('last_modified'):
+                headers['If-Modified-Since'] = meta['last_modified']
+
+        response = http_client.get(url, headers=headers)
+        if response.status_code == 304 and body is not None:
+            # Mark as recently used for eviction
+            if not self.read_only:
+                os.utime(self.get_paths(url)[0])
+            http_client.metrics.count('cache_hits')
+            return CS50CachedResponse(200, body, from_cache=True)
+
+        http_client.metrics.count('cache_misses')
+        if not self.read_only and response.status_code == 200 and (response.headers.get('ETag') or response.headers.get('Last-Modified')):
+            self.store(url, response)
+        return CS50CachedResponse(response.status_code, response.text)
+
+    def evict(self):
+        with self.lock:
+            entries = []
+            total_size = 0
+            for name in os.listdir(self.cache_directory):
+                if not name.endswith(".body"):
+                    continue
+                path = os.path.join(self.cache_directory, name)
+                try:
+                    stat = os.stat(path)
+                except OSError:
+                    continue
+                entries.append((stat.st_mtime, stat.st_size, path))
+                total_size += stat.st_size
+
+            # Oldest first
+            for _, size, path in sorted(entries):
+                if total_size <= self.max_size:
+                    break
+                for stale_path in (path, path[:-len(".body")] + ".json"):
+                    try:
+                        os.remove(stale_path)
+                    except OSError:
+                        pass
+                total_size -= size
+            self.total_size = total_size
+
+    def clear(self):
+        with self.lock:
+            for name in os.listdir(self.cache_directory):
+                os.remove(os.path.join(self.cache_directory, name))
+            self.total_size = 0
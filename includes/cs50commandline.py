@@ -5,16 +5,48 @@ import argparse
 class CommandLine:
     def __init__(self):
         self.parser = argparse.ArgumentParser(description="A script to scrape courses and download media")
-        self.parser.add_argument("-course", help="the course to scrape", required=True)
+        self.parser.add_argument("-course", help="the course to scrape, a comma-separated list of courses, or 'all' (required unless searching)")
         self.parser.add_argument("-audio", help="download audio files", action='store_true')
         self.parser.add_argument("-video", help="download video files", action='store_true')
         self.parser.add_argument("-code", help="download code files", action='store_true')
         self.parser.add_argument("-destination", help="destination folder to save files", default='saved')
         self.parser.add_argument("-debug", help="enable debug output", action='store_true')
         self.parser.add_argument("-debug_categories", help="comma-separated list of debug categories", default="")
+        self.parser.add_argument("-workers", help="number of weeks and problem sets to scrape in parallel", type=int, default=1)
+        self.parser.add_argument("-incremental", help="skip files that are already present and unchanged", action='store_true')
+        self.parser.add_argument("-refresh", help="ignore the page cache and re-download every page", action='store_true')
+        self.parser.add_argument("-cache_size", help="maximum size of the page cache in MB", type=int, default=50)
+        self.parser.add_argument("-segments", help="number of parallel byte ranges for large downloads", type=int, default=1)
+        self.parser.add_argument("-segment_threshold", help="minimum file size in MB for segmented downloads", type=int, default=64)
+        self.parser.add_argument("-dedupe", help="store downloads once by content hash and hardlink them into place", action='store_true')
+        self.parser.add_argument("-keep_archives", help="keep example code zipped instead of extracting it", action='store_true')
+        self.parser.add_argument("-extract_workers", help="number of threads extracting each code archive", type=int, default=1)
+        self.parser.add_argument("-parse_processes", help="number of worker processes parsing pages (default 0, parse in the fetching threads)", type=int, default=0)
+        self.parser.add_argument("-max_connections", help="global cap on connections in flight across all courses", type=int, default=None)
+        self.parser.add_argument("-max_page_requests", help="upper bound of the adaptive page request limit per host", type=int, default=8)
+        self.parser.add_argument("-max_media_requests", help="upper bound of the adaptive download limit per host", type=int, default=4)
+        self.parser.add_argument("-bandwidth_limit", help="global download bandwidth cap in KB/s", type=int, default=None)
+        self.parser.add_argument("-bulk_bandwidth_limit", help="bandwidth cap in KB/s for audio and video downloads, which run after code and PDFs", type=int, default=None)
+        self.parser.add_argument("-pool_size", help="number of kept-alive connections per host", type=int, default=10)
+        self.parser.add_argument("-timeout", help="HTTP timeout in seconds", type=float, default=30)
+        self.parser.add_argument("-retries", help="number of retries for failed requests", type=int, default=3)
+        self.parser.add_argument("-output", help="where scraped text goes: 'folders', 'sqlite' (one database per destination) or 'both'", choices=['folders', 'sqlite', 'both'], default='folders')
+        self.parser.add_argument("-export", help="write the text folder tree of the selected courses from the SQLite database and exit", action='store_true')
+        self.parser.add_argument("-search", help="search the scraped lectures and problem sets of every course (or of -course) and exit", default=None)
+        self.parser.add_argument("-results", help="number of search results to show", type=int, default=10)
+        self.parser.add_argument("-no_index", help="do not update the search index while scraping", action='store_true')
+        self.parser.add_argument("-plan", help="dry run: size every download with HEAD requests and print the plan without writing anything", action='store_true')
+        self.parser.add_argument("-watch", help="keep running, re-syncing only the weeks whose pages changed every -watch_interval minutes", action='store_true')
+        self.parser.add_argument("-watch_interval", help="minutes between the start of two -watch cycles", type=float, default=60)
+        self.parser.add_argument("-metrics", help="print phase timings and request metrics and write a JSON report to the destination", action='store_true')
+        self.parser.add_argument("-profile", help="profile the run (CPU by module and peak memory) and write the results to the destination", action='store_true')
+        self.parser.add_argument("-record", help="record every page and file fetched into this corpus directory", default=None)
+        self.parser.add_argument("-replay", help="send every request to a fixture server at this URL instead of the real sites", default=None)
 
     def parse_arguments(self):
         self.args = self.parser.parse_args()
+        if not self.args.course and not self.args.search:
+            self.parser.error("the following arguments are required: -course")
         return self.args
 
     def flags(self):
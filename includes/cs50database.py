@@ -0,0 +1,250 @@
+# includes/cs50database.py
+
+import os
+import json
+import time
+import sqlite3
+import hashlib
+import threading
+import urllib.request
+from includes.cs50manifest import CS50Manifest
+
+class CS50Database:
+    """
+    One SQLite database per destination holding the scraped records of every course.
+
+    Each week is written in a single transaction: its row in `weeks` (title, description,
+    tags, shorts and the composed lectures text), its rows in `problem_sets`, and a row in
+    `files` for every planned download. Downloads fill in the size, hash and validators of
+    their `files` row as they complete (see CS50DatabaseManifest), so the incremental sync
+    reads indexed rows instead of one `.manifest.json` per course. The text folder tree is
+    an optional export from the database (see CS50FileManager.export_database).
+
+    Attributes:
+        root (str): The destination folder; file paths are stored relative to it.
+        path (str): Location of the database file.
+        read_only (bool): Whether the database was opened read-only (e.g. for dry runs).
+    """
+
+    FILE_NAME = "cs50.db"
+
+    SCHEMA = """
+        CREATE TABLE IF NOT EXISTS weeks (
+            course TEXT NOT NULL,
+            week INTEGER NOT NULL,
+            url TEXT,
+            title TEXT,
+            description TEXT,
+            tags TEXT,
+            shorts TEXT,
+            lectures TEXT,
+            sha256 TEXT,
+            updated REAL,
+            PRIMARY KEY (course, week)
+        );
+        CREATE TABLE IF NOT EXISTS problem_sets (
+            course TEXT NOT NULL,
+            week INTEGER NOT NULL,
+            position INTEGER NOT NULL,
+            title TEXT,
+            url TEXT,
+            body TEXT,
+            PRIMARY KEY (course, week, position)
+        );
+        CREATE TABLE IF NOT EXISTS files (
+            path TEXT PRIMARY KEY,
+            course TEXT,
+            week INTEGER,
+            kind TEXT,
+            url TEXT,
+            size INTEGER,
+            mtime REAL,
+            sha256 TEXT,
+            etag TEXT,
+            last_modified TEXT,
+            extracted_to TEXT
+        );
+        CREATE INDEX IF NOT EXISTS files_course_week ON files (course, week);
+        CREATE INDEX IF NOT EXISTS files_url ON files (url);
+        CREATE INDEX IF NOT EXISTS files_sha256 ON files (sha256);
+    """
+
+    # Columns of a `files` row that make up a manifest entry
+    FILE_FIELDS = ('url', 'size', 'mtime', 'sha256', 'etag', 'last_modified', 'extracted_to')
+
+    def __init__(self, root, read_only=False):
+        self.root = root
+        self.path = os.path.join(root, self.FILE_NAME)
+        self.read_only = read_only
+        self.lock = threading.Lock()
+        if read_only:
+            self.connection = sqlite3.connect(f"file:{urllib.request.pathname2url(os.path.abspath(self.path))}?mode=ro", uri=True, check_same_thread=False)
+        else:
+            os.makedirs(root, exist_ok=True)
+            self.connection = sqlite3.connect(self.path, check_same_thread=False)
+            self.connection.execute("PRAGMA journal_mode=WAL")
+            self.connection.execute("PRAGMA synchronous=NORMAL")
+            self.connection.executescript(self.SCHEMA)
+        self.connection.row_factory = sqlite3.Row
+
+    def relative_path(self, file_name):
+        return os.path.relpath(file_name, self.root)
+
+    def save_week(self, course, week, data, downloads=(), skip_unchanged=False):
+        """
+        Writes a week's records and its planned downloads in one transaction.
+
+        :param course: The course folder name, e.g. cs50x
+        :param week: The week number
+        :param data: Week data as built by CS50Scraper.scrape_week
+        :param downloads: The week's download plan entries ('url', 'destination' and 'kind')
+        :param skip_unchanged: Leave the week and problem set rows alone when their content hash is unchanged
+        :return: True if the week's records were written, False if they were unchanged
+        """
+        problem_sets = [
+            (course, week, position, pset['title'], pset.get('url'), pset['data'])
+            for position, pset in enumerate(data['problem_sets']) if 'data' in pset
+        ]
+        week_row = [data.get('url'), data.get('title'), data.get('description'), data.get('tags'), data['shorts'], data['lectures']]
+        sha256 = hashlib.sha256(json.dumps([week_row, problem_sets]).encode('utf-8')).hexdigest()
+        file_rows = [(self.relative_path(entry['destination']), course, week, entry['kind'], entry['url']) for entry in downloads]
+
+        with self.lock, self.connection:
+            changed = True
+            if skip_unchanged:
+                row = self.connection.execute("SELECT sha256 FROM weeks WHERE course = ? AND week = ?", (course, week)).fetchone()
+                changed = row is None or row['sha256'] != sha256
+            if changed:
+                self.connection.execute(
+                    "INSERT OR REPLACE INTO weeks (course, week, url, title, description, tags, shorts, lectures, sha256, updated) VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?)",
+                    [course, week] + week_row + [sha256, time.time()],
+                )
+                self.connection.execute("DELETE FROM problem_sets WHERE course = ? AND week = ?", (course, week))
+                self.connection.executemany("INSERT INTO problem_sets (course, week, position, title, url, body) VALUES (?, ?, ?, ?, ?, ?)", problem_sets)
+            self.connection.executemany(
+                "INSERT INTO files (path, course, week, kind, url) VALUES (?, ?, ?, ?, ?) "
+                "ON CONFLICT (path) DO UPDATE SET course = excluded.course, week = excluded.week, kind = excluded.kind, url = excluded.url",
+                file_rows,
+            )
+        return changed
+
+    def weeks(self, courses=None):
+        """
+        Reads back every stored week, in the shape CS50FileManager.save_week expects.
+
+        :param courses: Course folder names to read; every course if omitted
+        :return: A list of (course, week, week data) tuples ordered by course and week
+        """
+        with self.lock:
+            rows = self.connection.execute("SELECT * FROM weeks ORDER BY course, week").fetchall()
+            pset_rows = self.connection.execute("SELECT * FROM problem_sets ORDER BY course, week, position").fetchall()
+        problem_sets = {}
+        for row in pset_rows:
+            problem_sets.setdefault((row['course'], row['week']), []).append({'title': row['title'], 'url': row['url'], 'data': row['body']})
+
+        weeks = []
+        for row in rows:
+            if courses and row['course'] not in courses:
+                continue
+            weeks.append((row['course'], row['week'], {
+                'url': row['url'],
+                'title': row['title'],
+                'description': row['description'],
+                'tags': row['tags'],
+                'lectures': row['lectures'],
+                'shorts': row['shorts'],
+                'problem_sets': problem_sets.get((row['course'], row['week']), []),
+            }))
+        return weeks
+
+    def get_file(self, file_name):
+        with self.lock:
+            row = self.connection.execute("SELECT * FROM files WHERE path = ?", (self.relative_path(file_name),)).fetchone()
+        if row is None or row['size'] is None:
+            # Planned but never written
+            return None
+        return {field: row[field] for field in self.FILE_FIELDS}
+
+    def record_file(self, file_name, entry):
+        fields = [field for field in self.FILE_FIELDS if field in entry]
+        with self.lock, self.connection:
+            self.connection.execute(
+                f"INSERT INTO files (path, {', '.join(fields)}) VALUES (?{', ?' * len(fields)}) "
+                f"ON CONFLICT (path) DO UPDATE SET {', '.join(f'{field} = excluded.{field}' for field in fields)}",
+                [self.relative_path(file_name)] + [entry[field] for field in fields],
+            )
+
+    def has_files(self, directory):
+        prefix = self.relative_path(directory) + os.sep
+        with self.lock:
+            return self.connection.execute("SELECT 1 FROM files WHERE substr(path, 1, ?) = ? LIMIT 1", (len(prefix), prefix)).fetchone() is not None
+
+    def manifest(self, course_dir):
+        return CS50DatabaseManifest(self, course_dir)
+
+    def close(self):
+        with self.lock:
+            self.connection.close()
+
+class CS50DatabaseManifest(CS50Manifest):
+    """
+    The CS50Manifest of one course folder, stored in the `files` table of a CS50Database.
+
+    A course that still has a `.manifest.json` from folder output is imported on first use,
+    so switching to the database does not re-download anything.
+    """
+
+    def __init__(self, database, course_dir):
+        self.database = database
+        self.course_dir = course_dir
+        self.path = database.path
+        self.lock = threading.Lock()
+        if not database.read_only and not database.has_files(course_dir) and os.path.exists(os.path.join(course_dir, CS50Manifest.FILE_NAME)):
+            for relative_path, entry in CS50Manifest(course_dir).entries.items():
+                database.record_file(os.path.join(course_dir, relative_path), entry)
+
+    def get(self, file_name):
+        return self.database.get_file(file_name)
+
+    def record(self, file_name, url=None, sha256=None, etag=None, last_modified=None, **extra):
+        stat = os.stat(file_name)
+        entry = {
+            'url': url,
+            'size': stat.st_size,
+            'mtime': stat.st_mtime,
+            'sha256': sha256 or self.hash_file(file_name),
+            'etag': etag,
+            'last_modified': last_modified,
+        }
+        entry.update(extra)
+        self.database.record_file(file_name, entry)
+
+    def update(self, file_name, **fields):
+        if self.database.get_file(file_name) is not None:
+            self.database.record_file(file_name, fields)
+
+    def is_unchanged(self, file_name, url=None):
+        """
+        Checks a file against its `files` row, without hashing it.
+
+        The row's URL, size and hash decide; the file on disk is only checked to still be
+        there with the recorded size, so a deleted or truncated file is fetched again.
+        Whether the server still has the same content is left to the conditional request
+        made with the row's validators.
+
+        :param file_name: Path of the file
+        :param url: If given, the row must also come from this URL
+        :return: True if the file is present and unchanged
+        """
+        entry = self.get(file_name)
+        if entry is None or not entry.get('sha256') or (url is not None and entry.get('url') != url):
+            return False
+        try:
+            return os.stat(file_name).st_size == entry['size']
+        except FileNotFoundError:
+            extracted_to = entry.get('extracted_to')
+            return bool(extracted_to) and os.path.isdir(os.path.join(self.course_dir, extracted_to))
+
+    def save(self):
+        # Every entry is written to the database as it is recorded
+        pass
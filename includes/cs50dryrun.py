@@ -0,0 +1,249 @@
+# includes/cs50dryrun.py
+
+import os
+import time
+import urllib.parse
+from concurrent.futures import ThreadPoolExecutor
+from includes.cs50scraper import CS50Scraper
+from includes.cs50planner import CS50DownloadPlan
+from includes.cs50blobstore import CS50BlobStore
+
+def format_duration(seconds):
+    if seconds is None:
+        return "n/a"
+    seconds = int(round(seconds))
+    if seconds < 60:
+        return f"{seconds}s"
+    if seconds < 3600:
+        return f"{seconds // 60}m {seconds % 60:02d}s"
+    return f"{seconds // 3600}h {seconds % 3600 // 60:02d}m"
+
+class CS50DryRun:
+    """
+    Plans a sync of one or more courses without writing anything.
+
+    Week and problem set pages are scraped through a read-only page cache, the downloads
+    are planned exactly as a real run would plan them, and every file is sized with
+    concurrent HEAD requests. One file per media host is partly downloaded into memory
+    to measure the throughput the duration estimates are based on. Each file is also
+    checked against the course manifest (and the blob store, with dedupe) to report what
+    an incremental sync would actually fetch.
+
+    Attributes:
+        courses (list): Course identifiers to plan.
+        base_directory (str): Destination folder a real run would write to.
+        workers (int): Destinations a real run downloads in parallel; also the week's problem set fetches.
+        head_workers (int): Threads sending HEAD requests (the adaptive per-host limits still apply).
+        files (list): One dict per planned file after `run`, with its course, week, kind, size and incremental need.
+        throughput (dict): Per media host: measured 'rate' (bytes/s per stream) and 'first_byte' (seconds).
+    """
+
+    # Bytes read from one file per host to measure the download throughput
+    SAMPLE_SIZE = 2 * 1024 * 1024
+    KINDS = ('audio', 'video', 'code', 'pdf')
+
+    def __init__(self, courses, base_directory, debug_categories=None, http_client=None, page_cache=None, workers=1, head_workers=16, keep_archives=False, dedupe=False, database=None, parse_pool=None):
+        self.courses = courses
+        self.base_directory = base_directory
+        self.debug_categories = debug_categories or []
+        self.http_client = http_client
+        self.page_cache = page_cache
+        self.workers = max(1, workers)
+        self.head_workers = max(1, head_workers)
+        self.keep_archives = keep_archives
+        self.parse_pool = parse_pool
+        # A read-only CS50Database whose files table the incremental check reads, with sqlite output
+        self.database = database
+        # Only read an existing store; creating one would write to the destination
+        blob_root = os.path.join(base_directory, ".blobs")
+        self.blob_store = CS50BlobStore(blob_root) if dedupe and os.path.isdir(os.path.join(blob_root, "objects")) else None
+        self.files = []
+        self.throughput = {}
+
+    def debug_print(self, category, message):
+        if category in self.debug_categories:
+            print(f"Debug ({category}): {message}")
+
+    def plan_course(self, course, download_audio, download_video, download_code, sizing_pool):
+        """
+        Scrapes a course and sends a HEAD request for every planned download as soon as its week is parsed.
+
+        :return: A list of (week, plan entry, scraper, future of the HEAD result)
+        """
+        scraper = CS50Scraper(course, self.base_directory, self.debug_categories, http_client=self.http_client, page_cache=self.page_cache, keep_archives=self.keep_archives, database=self.database, parse_pool=self.parse_pool)
+        plan = CS50DownloadPlan()
+        planned = []
+        week = 0
+        with ThreadPoolExecutor(max_workers=self.workers) as pset_pool:
+            while True:
+                result = scraper.scrape_week(week, download_audio, download_video, download_code, pset_pool if self.workers > 1 else None)
+                if result is None:
+                    break
+                week_data, _ = result
+                first = len(plan.entries)
+                scraper.file_manager.plan_week(course, week, week_data, scraper.cs50, download_audio, download_video, download_code, plan)
+                for entry in plan.entries[first:]:
+                    planned.append((week, entry, scraper, sizing_pool.submit(self.size_file, entry['url'])))
+                self.debug_print("scraping", f"Planned {course} week {week}: {len(plan.entries) - first} files")
+                week = scraper.cs50.progress(week)
+        return planned
+
+    def size_file(self, url):
+        response = self.http_client.head(url)
+        length = response.headers.get('Content-Length')
+        return {
+            'status': response.status_code,
+            'size': int(length) if response.status_code == 200 and length and length.isdigit() else None,
+            'etag': response.headers.get('ETag'),
+            'last_modified': response.headers.get('Last-Modified'),
+        }
+
+    @staticmethod
+    def validators_match(recorded, head):
+        # Mirrors CS50FileManager.download_file: entries without validators are skipped without revalidating
+        if not recorded.get('etag') and not recorded.get('last_modified'):
+            return True
+        if recorded.get('etag'):
+            return recorded['etag'] == head['etag']
+        return recorded['last_modified'] == head['last_modified']
+
+    def incremental_need(self, file_manager, entry, head):
+        """
+        Works out how many bytes an incremental sync would fetch for a planned file.
+
+        :return: 0 if the file would be skipped or linked, the remaining bytes of a `.part`
+                 file, else the file size (None if unknown)
+        """
+        destination, url = entry['destination'], entry['url']
+        partial_name = destination + ".part"
+        if os.path.exists(partial_name):
+            return None if head['size'] is None else max(0, head['size'] - os.path.getsize(partial_name))
+        manifest = file_manager.get_manifest(destination)
+        if manifest.is_unchanged(destination, url) and self.validators_match(manifest.get(destination), head):
+            return 0
+        if self.blob_store:
+            blob = self.blob_store.lookup(url)
+            if blob and self.validators_match(blob, head):
+                return 0
+        return head['size']
+
+    def measure_throughput(self, url):
+        """
+        Reads the start of a file into memory to measure the time to first byte and the per-stream rate.
+        """
+        started = time.monotonic()
+        received = 0
+        with self.http_client.connection_slot(url), self.http_client.get(url, headers={'Range': f"bytes=0-{self.SAMPLE_SIZE - 1}"}, stream=True) as response:
+            first_byte = time.monotonic() - started
+            if response.status_code in (200, 206):
+                for chunk in response.iter_content(chunk_size=64 * 1024):
+                    received += len(chunk)
+                    if received >= self.SAMPLE_SIZE:
+                        break
+        elapsed = time.monotonic() - started - first_byte
+        return {'rate': received / elapsed if received and elapsed > 0 else None, 'first_byte': first_byte}
+
+    def streams(self, files):
+        # Parallel downloads of a real run: one per destination worker, within the per-host and global caps
+        limits = [self.workers, self.http_client.concurrency.max_limits['media'], len(files) or 1]
+        if self.http_client.max_connections:
+            limits.append(self.http_client.max_connections)
+        return max(1, min(limits))
+
+    def estimate(self, files, size_key):
+        """
+        Estimates how long downloading files takes at the measured throughput.
+
+        :param files: File dicts from `self.files`
+        :param size_key: 'size' for a full sync, 'need' for an incremental sync
+        :return: Seconds, or None if no throughput could be measured
+        """
+        files = [file for file in files if file[size_key]]
+        seconds = 0.0
+        for host in {file['host'] for file in files}:
+            host_files = [file for file in files if file['host'] == host]
+            measured = self.throughput.get(host)
+            if not measured or not measured['rate']:
+                return None
+            size = sum(file[size_key] for file in host_files)
+            host_seconds = (size / measured['rate'] + len(host_files) * measured['first_byte']) / self.streams(host_files)
+            if self.http_client.bandwidth_limiter:
+                host_seconds = max(host_seconds, size / self.http_client.bandwidth_limiter.bytes_per_second)
+            seconds += host_seconds
+        return seconds
+
+    def run(self, download_audio=False, download_video=False, download_code=True):
+        """
+        Plans every course, prints the breakdown and returns the planned files.
+
+        :return: A list of file dicts with 'course', 'week', 'kind', 'url', 'host', 'size' and 'need'
+        """
+        metrics = self.http_client.metrics
+        with ThreadPoolExecutor(max_workers=self.head_workers) as sizing_pool:
+            with ThreadPoolExecutor(max_workers=len(self.courses)) as course_pool:
+                futures = [course_pool.submit(self.plan_course, course, download_audio, download_video, download_code, sizing_pool) for course in self.courses]
+                planned = {course: future.result() for course, future in zip(self.courses, futures)}
+
+            with metrics.phase('head_sizing'):
+                for course, course_files in planned.items():
+                    for week, entry, scraper, future in course_files:
+                        head = future.result()
+                        self.files.append({
+                            'course': course,
+                            'week': week,
+                            'kind': entry['kind'],
+                            'url': entry['url'],
+                            'host': urllib.parse.urlsplit(entry['url']).netloc,
+                            'status': head['status'],
+                            'size': head['size'],
+                            'need': self.incremental_need(scraper.file_manager, entry, head),
+                        })
+
+        # Sample the largest file of each host
+        largest = {}
+        for file in self.files:
+            if file['size'] and file['size'] > largest.get(file['host'], {}).get('size', 0):
+                largest[file['host']] = file
+        with metrics.phase('throughput_sample'):
+            for host, file in largest.items():
+                self.throughput[host] = self.measure_throughput(file['url'])
+
+        self.print_report()
+        return self.files
+
+    def format_row(self, label, kind, files):
+        sized = [file for file in files if file['size'] is not None]
+        needed = [file for file in files if file['need'] != 0]
+        return (f"{label:<6}{kind:<7}{len(files):>6}{CS50DownloadPlan.format_size(sum(file['size'] for file in sized)):>12}{format_duration(self.estimate(files, 'size')):>10}"
+                f"  |{len(needed):>6}{CS50DownloadPlan.format_size(sum(file['need'] or 0 for file in needed)):>12}{format_duration(self.estimate(files, 'need')):>10}")
+
+    def print_report(self):
+        header = f"{'week':<6}{'type':<7}{'files':>6}{'size':>12}{'time':>10}  |{'fetch':>6}{'size':>12}{'time':>10}"
+        for course in self.courses:
+            course_files = [file for file in self.files if file['course'] == course]
+            print(f"\nPlan for {course} (full sync | incremental sync)")
+            print(header)
+            for week in sorted({file['week'] for file in course_files}):
+                week_files = [file for file in course_files if file['week'] == week]
+                for kind in self.KINDS:
+                    kind_files = [file for file in week_files if file['kind'] == kind]
+                    if kind_files:
+                        print(self.format_row(str(week), kind, kind_files))
+            for kind in self.KINDS:
+                kind_files = [file for file in course_files if file['kind'] == kind]
+                if kind_files:
+                    print(self.format_row("all", kind, kind_files))
+            print(self.format_row("total", "", course_files))
+
+        if len(self.courses) > 1:
+            print("\nAll courses")
+            print(header)
+            print(self.format_row("total", "", self.files))
+
+        unknown = [file for file in self.files if file['size'] is None]
+        if unknown:
+            print(f"\n{len(unknown)} files of unknown size (HEAD failed or sent no Content-Length), counted as 0 bytes")
+        for host, measured in self.throughput.items():
+            rate = f"{CS50DownloadPlan.format_size(measured['rate'])}/s per stream" if measured['rate'] else "no data received"
+            print(f"Measured {host}: {rate}, first byte after {measured['first_byte'] * 1000:.0f} ms")
+        print("Nothing was written (dry run)")
@@ -2,15 +2,56 @@
 
 import os
 import re
-import requests
-import zipfile
-from bs4 import BeautifulSoup
-from alive_progress import alive_bar
+import json
+import hashlib
+import threading
+import contextlib
+import urllib.parse
+from concurrent.futures import ThreadPoolExecutor
+from includes.cs50 import CS50
+from includes.cs50manifest import CS50Manifest
+from includes.cs50planner import CS50DownloadPlan, CS50DownloadScheduler
+from includes.cs50archive import extract_archive
+from includes.cs50writer import CS50OutputWriter
 
 class CS50FileManager:
-    def __init__(self, base_directory, debug_categories=None):
+    # Size of each chunk streamed from the network to disk
+    DOWNLOAD_CHUNK_SIZE = 1024 * 1024
+    # Results of download_file
+    DOWNLOADED = 'downloaded'
+    LINKED = 'linked'
+    SKIPPED = 'skipped'
+
+    def __init__(self, base_directory, debug_categories=None, http_client=None, incremental=False, segments=1, segment_threshold=64 * 1024 * 1024, blob_store=None, keep_archives=False, extract_workers=1, database=None, write_folders=True):
         self.base_directory = base_directory
         self.debug_categories = debug_categories or []
+        self._http_client = http_client
+        # When set, files that are present and unchanged are not rewritten or re-downloaded
+        self.incremental = incremental
+        self.manifests = {}
+        self.manifests_lock = threading.Lock()
+        # Files of at least segment_threshold bytes are fetched as `segments` parallel byte ranges
+        self.segments = max(1, segments)
+        self.segment_threshold = segment_threshold
+        # Optional CS50BlobStore: downloads are stored once by content hash and hardlinked into place
+        self.blob_store = blob_store
+        # Keep code archives zipped in example_code (see CS50ExampleCode) instead of extracting them
+        self.keep_archives = keep_archives
+        self.extract_workers = max(1, extract_workers)
+        # Optional CS50Database: week records go to SQLite and files are tracked there instead of .manifest.json
+        self.database = database
+        # Whether the text files (lectures.txt, shorts.txt, problem set READMEs) are written
+        self.write_folders = write_folders
+        # Folders and text files are written behind the scraper; see flush
+        self.writer = CS50OutputWriter()
+
+    @property
+    def http_client(self):
+        # Created on first use, so a file manager only used for exporting never loads requests
+        if self._http_client is None:
+            from includes.cs50http import CS50HttpClient
+            self._http_client = CS50HttpClient()
+        return self._http_client
 
     def debug_print(self, category, message):
         if category in self.debug_categories:
@@ -23,16 +64,74 @@ class CS50FileManager:
         return name[:50].strip()
 
     def get_course_folder_name(self, course):
-        # Map course identifiers to folder names
-        course_mapping = {
-            "x": "cs50x",
-            "python": "cs50p",
-            "web": "cs50web",
-            "ai": "cs50ai",
-            "sql": "cs50sql",
-            "scratch": "cs50scratch",
-        }
-        return course_mapping.get(course, course)
+        return CS50.get_course_folder_name(course)
+
+    def get_manifest(self, file_name):
+        """
+        Returns the manifest of the course folder that contains file_name.
+
+        :param file_name: A path inside a course folder
+        :return: The CS50Manifest for that course folder (stored in the database when one is set)
+        """
+        relative_path = os.path.relpath(file_name, self.base_directory)
+        course_dir = os.path.join(self.base_directory, relative_path.split(os.sep)[0])
+        with self.manifests_lock:
+            if course_dir not in self.manifests:
+                self.manifests[course_dir] = self.database.manifest(course_dir) if self.database else CS50Manifest(course_dir)
+            return self.manifests[course_dir]
+
+    def write_text_file(self, file_name, content, url=None):
+        """
+        Queues a text output to be written in the background (see store_text_file).
+
+        :param file_name: Path of the text file
+        :param content: Text to write
+        :param url: Source URL the content was scraped from
+        """
+        self.writer.submit(self.store_text_file, file_name, content.encode('utf-8'), url)
+
+    def store_text_file(self, file_name, data, url=None):
+        """
+        Writes a text output atomically and records it in the course manifest. Runs on the writer thread.
+
+        The write is skipped when the file on disk already holds the same content, so
+        unchanged files keep their mtime. The manifest hash is checked first; the file itself
+        is only read when the manifest has no matching entry.
+
+        :param file_name: Path of the text file
+        :param data: Encoded content
+        :param url: Source URL the content was scraped from
+        :return: True if the file was written, False if it was unchanged
+        """
+        sha256 = hashlib.sha256(data).hexdigest()
+        manifest = self.get_manifest(file_name)
+        entry = manifest.get(file_name)
+        if entry and entry.get('sha256') == sha256 and manifest.is_unchanged(file_name):
+            self.debug_print("data_saving", f"{file_name} unchanged, skipped")
+            return False
+        if self.writer.matches(file_name, data):
+            manifest.record(file_name, url=url, sha256=sha256)
+            self.debug_print("data_saving", f"{file_name} unchanged, skipped")
+            return False
+
+        self.writer.write_atomic(file_name, data)
+        manifest.record(file_name, url=url, sha256=sha256)
+        return True
+
+    def flush(self):
+        """
+        Waits until every queued folder and text file write is on disk, then saves the
+        course manifests (and the blob store index) changed since the last flush.
+        """
+        try:
+            self.writer.flush()
+        finally:
+            with self.manifests_lock:
+                manifests = list(self.manifests.values())
+            for manifest in manifests:
+                manifest.save()
+            if self.blob_store:
+                self.blob_store.save()
 
     def create_folders(self, course, weeks_data):
         """
@@ -41,41 +140,40 @@ class CS50FileManager:
         :param course: Name of the course
         :param weeks_data: Data for each week including lectures, shorts, and problem sets
         """
-        # Determine the course folder name
-        course_folder = self.get_course_folder_name(course)
-        # Create base directory for the course
-        course_dir = os.path.join(self.base_directory, course_folder)
-        os.makedirs(course_dir, exist_ok=True)
-        self.debug_print("data_saving", f"Created course folder: {course_dir}")
-
         for week, data in weeks_data.items():
-            # Create week directory
-            week_dir = os.path.join(course_dir, f"week-{week}")
-            os.makedirs(week_dir, exist_ok=True)
-            self.debug_print("data_saving", f"Created week folder: {week_dir}")
-
-            # Create Lecture directory
-            lecture_dir = os.path.join(week_dir, "lecture")
-            os.makedirs(lecture_dir, exist_ok=True)
-            self.debug_print("data_saving", f"Created lecture folder: {lecture_dir}")
-
-            # Create Shorts directory
-            shorts_dir = os.path.join(week_dir, "shorts")
-            os.makedirs(shorts_dir, exist_ok=True)
-            self.debug_print("data_saving", f"Created shorts folder: {shorts_dir}")
-
-            # Create problem set directory for the week
-            pset_dir = os.path.join(week_dir, f"pset-{week}")
-            os.makedirs(pset_dir, exist_ok=True)
-            self.debug_print("data_saving", f"Created problem set folder: {pset_dir}")
-
-            # Create directories for each problem set inside the pset directory
-            for pset in data['problem_sets']:
-                problem_dir = os.path.join(pset_dir, self.sanitize_filename(pset['title']))
-                os.makedirs(problem_dir, exist_ok=True)
-                self.debug_print("data_saving", f"Created problem set sub-folder: {problem_dir}")
+            self.create_week_folders(course, week, data)
+
+    def week_folders(self, course, week, data):
+        """
+        Lists every folder of a single week: the week, lecture, shorts and problem set folders.
+
+        :param course: Name of the course
+        :param week: The week number
+        :param data: Data for the week including lectures, shorts, and problem sets
+        :return: Folder paths, parents included
+        """
+        course_dir = os.path.join(self.base_directory, self.get_course_folder_name(course))
+        week_dir = os.path.join(course_dir, f"week-{week}")
+        lecture_dir = os.path.join(week_dir, "lecture")
+        pset_dir = os.path.join(week_dir, f"pset-{week}")
+        folders = [course_dir, week_dir, lecture_dir, os.path.join(lecture_dir, "example_code"), os.path.join(week_dir, "shorts"), pset_dir]
+        for pset in data['problem_sets']:
+            problem_dir = os.path.join(pset_dir, self.sanitize_filename(pset['title']))
+            folders += [problem_dir, os.path.join(problem_dir, "example_code")]
+        return folders
+
+    def create_week_folders(self, course, week, data):
+        """
+        Creates the folder structure of a single week in one pass, skipping folders created earlier in the run.
+
+        :param course: Name of the course
+        :param week: The week number
+        :param data: Data for the week including lectures, shorts, and problem sets
+        """
+        for folder in self.writer.create_directories(self.week_folders(course, week, data)):
+            self.debug_print("data_saving", f"Created folder: {folder}")
 
-    def save_data(self, course, weeks_data, cs50_instance, download_audio=False, download_video=False, download_code=True):
+    def save_data(self, course, weeks_data, cs50_instance, download_audio=False, download_video=False, download_code=True, plan=None):
         """
         Saves the scraped data into the corresponding folders and downloads relevant files.
 
@@ -85,44 +183,143 @@ class CS50FileManager:
         :param download_audio: Boolean flag to download audio files
         :param download_video: Boolean flag to download video files
         :param download_code: Boolean flag to download code files (defaults to True)
+        :param plan: CS50DownloadPlan to add downloads to; if omitted, downloads run before returning
+        """
+        execute_plan = plan is None
+        plan = plan or CS50DownloadPlan()
+
+        for week, data in weeks_data.items():
+            self.save_week(course, week, data, cs50_instance, download_audio, download_video, download_code, plan)
+
+        if execute_plan:
+            plan.execute(self)
+        self.flush()
+
+    def save_week(self, course, week, data, cs50_instance, download_audio, download_video, download_code, plan):
+        """
+        Saves a single week's text files and adds its downloads to the plan.
+
+        With a database, the week's records and planned downloads are written to it in one
+        transaction, and the text files only when folder output is enabled as well.
+
+        :param course: Name of the course
+        :param week: The week number
+        :param data: Data for the week including lectures, shorts, and problem sets
+        :param cs50_instance: Instance of CS50 class
+        :param plan: CS50DownloadPlan to add the week's downloads to
+        """
+        if self.write_folders:
+            self.save_week_text(course, week, data)
+
+        # Download relevant files if flags are set
+        first = len(plan.entries)
+        self.plan_week(course, week, data, cs50_instance, download_audio, download_video, download_code, plan)
+
+        if self.database:
+            if self.database.save_week(course, week, data, plan.entries[first:], skip_unchanged=self.incremental):
+                self.debug_print("data_saving", f"Saved week {week} of {course} to {self.database.path}")
+            else:
+                self.debug_print("data_saving", f"Week {week} of {course} unchanged in {self.database.path}")
+
+    def save_week_text(self, course, week, data):
+        """
+        Writes a single week's text files: lectures.txt, shorts.txt and a README.md per problem set.
+
+        :param course: Name of the course
+        :param week: The week number
+        :param data: Data for the week including lectures, shorts, and problem sets
         """
         # Determine the course folder name
         course_folder = self.get_course_folder_name(course)
         # Define paths based on the folder structure
-        course_dir = os.path.join(self.base_directory, course_folder)
+        week_dir = os.path.join(self.base_directory, course_folder, f"week-{week}")
 
-        for week, data in weeks_data.items():
-            week_dir = os.path.join(course_dir, f"week-{week}")
-
-            # Save lectures data
-            lecture_dir = os.path.join(week_dir, "lecture")
-            with open(os.path.join(lecture_dir, "lectures.txt"), "w") as file:
-                file.write(data['lectures'])
-            self.debug_print("data_saving", f"Saved lectures to {os.path.join(lecture_dir, 'lectures.txt')}")
-
-            # Save shorts data
-            shorts_dir = os.path.join(week_dir, "shorts")
-            with open(os.path.join(shorts_dir, "shorts.txt"), "w") as file:
-                file.write(data['shorts'])
-            self.debug_print("data_saving", f"Saved shorts to {os.path.join(shorts_dir, 'shorts.txt')}")
-
-            # Download relevant files if flags are set
-            media_links = cs50_instance.get_media_links(data['lectures'], download_audio, download_video, download_code)
-            self.download_relevant_files(media_links, lecture_dir, week)
-
-            # Save problem sets data
-            pset_dir = os.path.join(week_dir, f"pset-{week}")
-            for pset in data['problem_sets']:
-                if 'data' in pset:
-                    problem_dir = os.path.join(pset_dir, self.sanitize_filename(pset['title']))
-                    readme_path = os.path.join(problem_dir, "README.md")  # Change extension to .md
-                    with open(readme_path, "w") as file:
-                        file.write(self.format_problem_set(pset['title'], pset['data']))
-                    self.debug_print("data_saving", f"Saved problem set to {readme_path}")
-
-                    # Download problem set files
-                    media_links = cs50_instance.get_media_links(pset['data'], download_audio, download_video, download_code)
-                    self.download_relevant_files(media_links, problem_dir, week)
+        # Save lectures data
+        lecture_dir = os.path.join(week_dir, "lecture")
+        self.write_text_file(os.path.join(lecture_dir, "lectures.txt"), data['lectures'], url=data.get('url'))
+        self.debug_print("data_saving", f"Saved lectures to {os.path.join(lecture_dir, 'lectures.txt')}")
+
+        # Save shorts data
+        shorts_dir = os.path.join(week_dir, "shorts")
+        self.write_text_file(os.path.join(shorts_dir, "shorts.txt"), data['shorts'], url=data.get('url'))
+        self.debug_print("data_saving", f"Saved shorts to {os.path.join(shorts_dir, 'shorts.txt')}")
+
+        # Save problem sets data
+        pset_dir = os.path.join(week_dir, f"pset-{week}")
+        for pset in data['problem_sets']:
+            if 'data' in pset:
+                problem_dir = os.path.join(pset_dir, self.sanitize_filename(pset['title']))
+                readme_path = os.path.join(problem_dir, "README.md")  # Change extension to .md
+                self.write_text_file(readme_path, self.format_problem_set(pset['title'], pset['data']), url=pset.get('url'))
+                self.debug_print("data_saving", f"Saved problem set to {readme_path}")
+
+    def week_documents(self, course, week, data):
+        """
+        Lists a week's searchable documents: the lecture metadata and each problem set.
+
+        :param course: Name of the course
+        :param week: The week number
+        :param data: Data for the week including lectures, shorts, and problem sets
+        :return: Dicts with 'kind', 'title', 'url', 'text' and 'path', the text file's path relative to the base directory
+        """
+        course_folder = self.get_course_folder_name(course)
+        week_dir = os.path.join(course_folder, f"week-{week}")
+        documents = [{
+            'kind': 'lecture',
+            'title': data.get('title') or f"Week {week}",
+            'url': data.get('url'),
+            'text': data['lectures'],
+            'path': os.path.join(week_dir, "lecture", "lectures.txt"),
+        }]
+        for pset in data['problem_sets']:
+            if 'data' in pset:
+                documents.append({
+                    'kind': 'pset',
+                    'title': pset['title'],
+                    'url': pset.get('url'),
+                    'text': pset['data'],
+                    'path': os.path.join(week_dir, f"pset-{week}", self.sanitize_filename(pset['title']), "README.md"),
+                })
+        return documents
+
+    def export_database(self, courses=None):
+        """
+        Writes the folder tree of text files from the database, without scraping anything.
+
+        :param courses: Course identifiers to export; every course in the database if omitted
+        :return: The number of weeks exported
+        """
+        # Weeks are stored under their course folder names
+        weeks = self.database.weeks([self.get_course_folder_name(course) for course in courses] if courses else None)
+        for course, week, data in weeks:
+            self.create_week_folders(course, week, data)
+            self.save_week_text(course, week, data)
+        self.flush()
+        return len(weeks)
+
+    def plan_week(self, course, week, data, cs50_instance, download_audio, download_video, download_code, plan):
+        """
+        Adds a single week's downloads (lecture and problem set files) to the plan without writing anything.
+
+        :param course: Name of the course
+        :param week: The week number
+        :param data: Data for the week including lectures, shorts, and problem sets
+        :param cs50_instance: Instance of CS50 class, used when the data carries no media links
+        :param plan: CS50DownloadPlan to add the week's downloads to
+        """
+        course_folder = self.get_course_folder_name(course)
+        week_dir = os.path.join(self.base_directory, course_folder, f"week-{week}")
+
+        media_links = data['media_links'] if 'media_links' in data else cs50_instance.get_media_links(data['lectures'], download_audio, download_video, download_code)
+        self.plan_relevant_files(media_links, os.path.join(week_dir, "lecture"), week, plan)
+
+        # Download problem set files
+        pset_dir = os.path.join(week_dir, f"pset-{week}")
+        for pset in data['problem_sets']:
+            if 'data' in pset:
+                problem_dir = os.path.join(pset_dir, self.sanitize_filename(pset['title']))
+                media_links = pset['media_links'] if 'media_links' in pset else cs50_instance.get_media_links(pset['data'], download_audio, download_video, download_code)
+                self.plan_relevant_files(media_links, problem_dir, week, plan)
 
     def download_relevant_files(self, media_links, directory, week):
         """
@@ -132,54 +329,374 @@ class CS50FileManager:
         :param directory: The directory to save the files
         :param week: The week number for naming files
         """
-        os.makedirs(directory, exist_ok=True)
+        plan = CS50DownloadPlan()
+        self.plan_relevant_files(media_links, directory, week, plan)
+        plan.execute(self)
+        self.flush()
+
+    def plan_relevant_files(self, media_links, directory, week, plan):
+        """
+        Adds the relevant files to a download plan instead of downloading them right away.
 
-        # Download audio files
+        :param media_links: Dictionary of media links to download
+        :param directory: The directory to save the files
+        :param week: The week number for naming files
+        :param plan: The CS50DownloadPlan to add the downloads to
+        """
+        # Files are named after their URLs, so several files of one kind (e.g. the slides and the
+        # source code PDF of a lecture) never share a destination
+        # Audio files
         for mp3_link in media_links['audio']:
-            mp3_url = requests.compat.urljoin(self.base_directory, mp3_link)
-            self.download_file(mp3_url, os.path.join(directory, f"week-{week}-lecture.mp3"))
+            mp3_url = urllib.parse.urljoin(self.base_directory, mp3_link)
+            plan.add(mp3_url, os.path.join(directory, self.get_download_name(mp3_url, f"week-{week}-lecture.mp3")), 'audio')
 
-        # Download video files (720p)
+        # Video files (720p)
         for video_link in media_links['video']:
-            video_url = requests.compat.urljoin(self.base_directory, video_link)
-            self.download_file(video_url, os.path.join(directory, f"week-{week}-lecture.mp4"))
+            video_url = urllib.parse.urljoin(self.base_directory, video_link)
+            plan.add(video_url, os.path.join(directory, self.get_download_name(video_url, f"week-{week}-lecture.mp4")), 'video')
 
-        # Download code files and extract
+        # Code files, extracted after download or kept as archives in example_code
         example_code_dir = os.path.join(directory, "example_code")
-        os.makedirs(example_code_dir, exist_ok=True)
         for zip_link in media_links['code']:
-            zip_url = requests.compat.urljoin(self.base_directory, zip_link)
-            zip_path = os.path.join(directory, f"week-{week}-example_code.zip")
-            self.download_file(zip_url, zip_path)
-            self.extract_zip(zip_path, example_code_dir)
+            zip_url = urllib.parse.urljoin(self.base_directory, zip_link)
+            archive_name = self.get_download_name(zip_url, f"week-{week}-example_code.zip")
+            if self.keep_archives:
+                plan.add(zip_url, os.path.join(example_code_dir, archive_name), 'code')
+            else:
+                plan.add(zip_url, os.path.join(directory, archive_name), 'code', extract_to=example_code_dir)
 
-        # Download PDF files
+        # PDF files
         for pdf_link in media_links['pdf']:
-            pdf_url = requests.compat.urljoin(self.base_directory, pdf_link)
-            self.download_file(pdf_url, os.path.join(directory, f"week-{week}-lecture.pdf"))
+            pdf_url = urllib.parse.urljoin(self.base_directory, pdf_link)
+            plan.add(pdf_url, os.path.join(directory, self.get_download_name(pdf_url, f"week-{week}-lecture.pdf")), 'pdf')
+
+    def get_download_name(self, url, default):
+        """
+        Returns the file name a download is saved under: the last component of its URL path.
+
+        :param url: The file URL
+        :param default: Name used when the URL path has no usable file name
+        """
+        name = os.path.basename(urllib.parse.unquote(urllib.parse.urlparse(url).path))
+        return default if name in ('', '.', '..') else name
+
+    def run_download(self, entry):
+        """
+        Runs a single download plan entry, extracting code archives once downloaded.
+
+        An archive whose content matches the one already extracted to the same folder (e.g.
+        relinked from the blob store) is not extracted again.
+
+        :param entry: A plan entry with 'url', 'destination', 'kind' and 'extract_to'
+        :return: The result of download_file: DOWNLOADED, LINKED or SKIPPED
+        """
+        os.makedirs(os.path.dirname(entry['destination']), exist_ok=True)
+        if entry['extract_to']:
+            os.makedirs(entry['extract_to'], exist_ok=True)
+
+        metrics = self.http_client.metrics
+        manifest = self.get_manifest(entry['destination'])
+        previous = manifest.get(entry['destination'])
+        with self.blob_store.claim(entry['url']) if self.blob_store else contextlib.nullcontext():
+            with metrics.phase('download_file'):
+                result = self.download_file(entry['url'], entry['destination'], bulk=entry['kind'] in CS50DownloadScheduler.BULK_KINDS)
+        metrics.count(f"files_{result}")
+        if result != self.SKIPPED and entry['extract_to']:
+            extracted_to = manifest.relative_path(entry['extract_to'])
+            current = manifest.get(entry['destination'])
+            if previous and previous.get('extracted_to') == extracted_to and current and current['sha256'] == previous.get('sha256') and os.path.isdir(entry['extract_to']):
+                # The archive is removed after extraction, as extract_zip does
+                os.remove(entry['destination'])
+                self.debug_print("file_download", f"{entry['destination']} already extracted to {entry['extract_to']}, not extracted again")
+            else:
+                with metrics.phase('extract_zip'):
+                    self.extract_zip(entry['destination'], entry['extract_to'])
+            manifest.update(entry['destination'], extracted_to=extracted_to)
+        return result
+
+    def get_downloaded_size(self, file_name):
+        # Archives are removed after extraction, so fall back to the manifest
+        if os.path.exists(file_name):
+            return os.path.getsize(file_name)
+        entry = self.get_manifest(file_name).get(file_name)
+        return entry['size'] if entry else 0
+
+    def download_file(self, file_url, file_name, bulk=False):
+        """
+        Streams a file to disk in chunks through a `.part` file, then renames it into place.
+
+        If a `.part` file is left over from an interrupted download, the transfer resumes
+        from its current size with an HTTP Range request. The ETag (or Last-Modified) the
+        partial file was downloaded under is kept next to it and sent as If-Range, so a file
+        that changed on the server is downloaded again from the start instead of being
+        appended to. Dropped connections are resumed the same way, up to the HTTP client's
+        retry count.
+
+        In incremental mode, a file that is present and matches the course manifest is
+        revalidated with a conditional request and skipped if the server answers 304.
+
+        With more than one segment configured, large files are fetched with parallel
+        range requests instead (see download_file_segmented).
+
+        With a blob store, a URL the store already holds is revalidated with a conditional
+        request and linked from the store if unchanged, and every completed download is
+        added to the store.
+
+        :param file_url: URL of the file to download
+        :param file_name: Final path of the downloaded file
+        :param bulk: Whether the file is bulk media, throttled by the HTTP client's bulk bandwidth limit
+        :return: DOWNLOADED if new content was written to file_name, LINKED if it was linked from
+            the blob store, SKIPPED if it was unchanged or could not be downloaded
+        """
+        partial_name = file_name + ".part"
+        manifest = self.get_manifest(file_name)
+        conditional_headers = {}
+        if os.path.exists(file_name + ".segments"):
+            # Left by a segmented download that never finished; its segments cannot be told apart from preallocated zeros
+            self.debug_print("file_download", f"Removing {file_name}.segments left by an interrupted download")
+            os.remove(file_name + ".segments")
+        if self.incremental and not os.path.exists(partial_name) and manifest.is_unchanged(file_name, file_url):
+            entry = manifest.get(file_name)
+            if not entry.get('etag') and not entry.get('last_modified'):
+                self.debug_print("file_download", f"{file_name} unchanged, skipped")
+                return self.SKIPPED
+            if entry.get('etag'):
+                conditional_headers['If-None-Match'] = entry['etag']
+            if entry.get('last_modified'):
+                conditional_headers['If-Modified-Since'] = entry['last_modified']
+
+        blob = None
+        if self.blob_store and not conditional_headers and not os.path.exists(partial_name):
+            blob = self.blob_store.lookup(file_url)
+            if blob and (self.blob_store.is_fresh(file_url) or not blob.get('etag') and not blob.get('last_modified')):
+                return self.link_blob(file_url, file_name)
+            if blob and blob.get('etag'):
+                conditional_headers['If-None-Match'] = blob['etag']
+            if blob and blob.get('last_modified'):
+                conditional_headers['If-Modified-Since'] = blob['last_modified']
+
+        if self.segments > 1 and not os.path.exists(partial_name):
+            head = self.http_client.head(file_url, headers=conditional_headers)
+            if head.status_code == 304 and conditional_headers:
+                if blob:
+                    return self.link_blob(file_url, file_name)
+                self.debug_print("file_download", f"{file_name} not modified, skipped")
+                return self.SKIPPED
+            size = int(head.headers.get('Content-Length') or 0)
+            if head.status_code == 200 and head.headers.get('Accept-Ranges') == 'bytes' and size >= self.segment_threshold:
+                if self.download_file_segmented(file_url, file_name, size, head.headers.get('ETag'), head.headers.get('Last-Modified'), bulk=bulk):
+                    return self.DOWNLOADED
+                self.debug_print("file_download", f"Segmented download of {file_url} failed, falling back to a single stream")
 
-    def download_file(self, file_url, file_name):
         self.debug_print("file_download", f"Downloading {file_url} to {file_name}")
-        response = requests.get(file_url)
-        if response.status_code == 200:
-            with open(file_name, 'wb') as file:
-                file.write(response.content)
-            self.debug_print("file_download", f"{file_name} downloaded")
+        for attempt in range(self.http_client.retries + 1):
+            resume_from = os.path.getsize(partial_name) if os.path.exists(partial_name) else 0
+            if_range = self.get_partial_validator(partial_name) if resume_from else None
+            if resume_from and if_range is None:
+                # Without a validator the partial file may belong to an older version
+                self.debug_print("file_download", f"Discarding {partial_name}, it has no validator to resume with")
+                self.remove_partial(partial_name)
+                resume_from = 0
+            headers = {'Range': f"bytes={resume_from}-", 'If-Range': if_range} if resume_from else dict(conditional_headers)
+            try:
+                with self.http_client.connection_slot(file_url), self.http_client.get(file_url, headers=headers, stream=True) as response:
+                    if response.status_code == 304 and conditional_headers:
+                        if blob:
+                            return self.link_blob(file_url, file_name)
+                        self.debug_print("file_download", f"{file_name} not modified, skipped")
+                        return self.SKIPPED
+                    if response.status_code == 416 and resume_from:
+                        # The partial file may already hold the whole body
+                        if response.headers.get('Content-Range', '').endswith(f"/{resume_from}"):
+                            hasher = None
+                            validators = (response.headers.get('ETag'), response.headers.get('Last-Modified'))
+                            break
+                        self.remove_partial(partial_name)
+                        continue
+                    hasher = hashlib.sha256()
+                    if response.status_code == 206 and self.get_range_start(response) == resume_from:
+                        mode = 'ab'
+                        self.debug_print("file_download", f"Resuming {file_url} from byte {resume_from}")
+                        with open(partial_name, 'rb') as file:
+                            for chunk in iter(lambda: file.read(self.DOWNLOAD_CHUNK_SIZE), b''):
+                                hasher.update(chunk)
+                    elif response.status_code == 200:
+                        # Fresh download, or the file changed since the partial download (or the server ignored the Range header)
+                        mode = 'wb'
+                        if resume_from:
+                            self.debug_print("file_download", f"{file_url} changed since {partial_name} was started, downloading it again")
+                        self.save_partial_validator(partial_name, response)
+                    elif response.status_code == 206:
+                        # The server answered with a different range, start over
+                        self.remove_partial(partial_name)
+                        continue
+                    else:
+                        self.debug_print("file_download", f"Failed to download {file_url}, status code: {response.status_code}")
+                        return self.SKIPPED
+
+                    with open(partial_name, mode) as file:
+                        for chunk in response.iter_content(chunk_size=self.DOWNLOAD_CHUNK_SIZE):
+                            self.http_client.throttle(len(chunk), bulk)
+                            self.http_client.metrics.count('bytes_downloaded', len(chunk))
+                            file.write(chunk)
+                            hasher.update(chunk)
+                    validators = (response.headers.get('ETag'), response.headers.get('Last-Modified'))
+                break
+            except self.http_client.TRANSIENT_ERRORS as error:
+                self.debug_print("file_download", f"Download of {file_url} interrupted (attempt {attempt + 1}): {error}")
         else:
-            self.debug_print("file_download", f"Failed to download {file_url}, status code: {response.status_code}")
+            self.debug_print("file_download", f"Failed to download {file_url}, partial file kept at {partial_name}")
+            return self.SKIPPED
+
+        os.replace(partial_name, file_name)
+        self.remove_partial(partial_name)
+        sha256 = hasher.hexdigest() if hasher else None
+        if self.blob_store:
+            sha256 = sha256 or CS50Manifest.hash_file(file_name)
+            if self.blob_store.add(file_name, file_url, sha256, validators[0], validators[1]):
+                self.debug_print("file_download", f"{file_name} has the same content as a stored file, linked")
+        manifest.record(file_name, url=file_url, sha256=sha256, etag=validators[0], last_modified=validators[1])
+        self.debug_print("file_download", f"{file_name} downloaded")
+        return self.DOWNLOADED
+
+    def get_partial_validator(self, partial_name):
+        """
+        Returns the If-Range value a `.part` file can be resumed with.
+
+        :param partial_name: Path of the `.part` file
+        :return: The strong ETag or the Last-Modified date it was downloaded under, or None if neither is known
+        """
+        try:
+            with open(partial_name + ".json", 'r') as file:
+                validators = json.load(file)
+        except (OSError, ValueError):
+            return None
+        return self.get_if_range(validators.get('etag'), validators.get('last_modified'))
+
+    @staticmethod
+    def get_if_range(etag, last_modified):
+        """
+        :return: The strong ETag, else the Last-Modified date, to send as If-Range; None if neither can be used
+        """
+        # Weak ETags cannot be used with If-Range: the server would ignore the Range header
+        if etag and not etag.startswith('W/'):
+            return etag
+        return last_modified
+
+    def save_partial_validator(self, partial_name, response):
+        # Kept next to the .part file, so a later run only resumes it if the file is unchanged
+        with open(partial_name + ".json", 'w') as file:
+            json.dump({'etag': response.headers.get('ETag'), 'last_modified': response.headers.get('Last-Modified')}, file)
+
+    def remove_partial(self, partial_name):
+        for path in (partial_name, partial_name + ".json"):
+            with contextlib.suppress(FileNotFoundError):
+                os.remove(path)
+
+    def link_blob(self, file_url, file_name):
+        """
+        Links a file already held by the blob store into place instead of downloading it.
+
+        :return: LINKED if the file was linked, SKIPPED if the store no longer holds it
+        """
+        blob = self.blob_store.link_url(file_url, file_name)
+        if blob is None:
+            return self.SKIPPED
+        self.get_manifest(file_name).record(file_name, url=file_url, sha256=blob['sha256'], etag=blob.get('etag'), last_modified=blob.get('last_modified'))
+        self.debug_print("file_download", f"{file_name} linked from the blob store")
+        return self.LINKED
+
+    def download_file_segmented(self, file_url, file_name, size, etag=None, last_modified=None, bulk=False):
+        """
+        Downloads a file as parallel byte ranges into a preallocated `.segments` file.
+
+        Each segment is written at its own offset and resumes from where it stopped if its
+        connection drops. The file is only renamed into place once every segment completed.
+        Every range request carries If-Range, so a file without a strong ETag or a Last-Modified
+        date is not split, and a `.segments` file left by an interrupted run is removed by
+        download_file before the next attempt.
+
+        :param file_url: URL of the file to download
+        :param file_name: Final path of the downloaded file
+        :param size: Content-Length reported by the HEAD request
+        :param etag: ETag reported by the HEAD request, sent as If-Range unless it is weak
+        :param last_modified: Last-Modified reported by the HEAD request, sent as If-Range without a strong ETag
+        :param bulk: Whether the file is bulk media, throttled by the HTTP client's bulk bandwidth limit
+        :return: True if the file was downloaded, False otherwise
+        """
+        if_range = self.get_if_range(etag, last_modified)
+        if if_range is None:
+            # Segments could come from different versions of the file
+            self.debug_print("file_download", f"{file_url} has no strong validator for range requests")
+            return False
+
+        segments_name = file_name + ".segments"
+        with open(segments_name, 'wb') as file:
+            file.truncate(size)
+
+        segment_size = -(-size // self.segments)
+        ranges = [(start, min(start + segment_size, size) - 1) for start in range(0, size, segment_size)]
+        self.debug_print("file_download", f"Downloading {file_url} to {file_name} in {len(ranges)} segments")
+
+        def fetch_segment(segment):
+            position, end = segment
+            for attempt in range(self.http_client.retries + 1):
+                # A file changed since the HEAD is answered with a full 200, rejected below
+                headers = {'Range': f"bytes={position}-{end}", 'If-Range': if_range}
+                try:
+                    with self.http_client.connection_slot(file_url), self.http_client.get(file_url, headers=headers, stream=True) as response:
+                        if response.status_code != 206 or self.get_range_start(response) != position:
+                            self.debug_print("file_download", f"Unexpected response for segment {position}-{end} of {file_url}: {response.status_code}")
+                            return False
+                        with open(segments_name, 'r+b') as file:
+                            file.seek(position)
+                            for chunk in response.iter_content(chunk_size=self.DOWNLOAD_CHUNK_SIZE):
+                                chunk = chunk[:end + 1 - position]
+                                self.http_client.throttle(len(chunk), bulk)
+                                self.http_client.metrics.count('bytes_downloaded', len(chunk))
+                                file.write(chunk)
+                                position += len(chunk)
+                    if position > end:
+                        return True
+                except self.http_client.TRANSIENT_ERRORS as error:
+                    self.debug_print("file_download", f"Segment of {file_url} interrupted at byte {position} (attempt {attempt + 1}): {error}")
+            return False
+
+        with ThreadPoolExecutor(max_workers=len(ranges)) as executor:
+            completed = all(list(executor.map(fetch_segment, ranges)))
+
+        # Each segment only completes once every byte of its range was written
+        if not completed:
+            os.remove(segments_name)
+            return False
+
+        os.replace(segments_name, file_name)
+        sha256 = CS50Manifest.hash_file(file_name)
+        if self.blob_store:
+            self.blob_store.add(file_name, file_url, sha256, etag, last_modified)
+        self.get_manifest(file_name).record(file_name, url=file_url, sha256=sha256, etag=etag, last_modified=last_modified)
+        self.debug_print("file_download", f"{file_name} downloaded")
+        return True
+
+    def get_range_start(self, response):
+        # Content-Range looks like "bytes 100-199/200"
+        content_range = response.headers.get('Content-Range', '')
+        match = re.match(r'bytes (\d+)-\d+/(?:\d+|\*)', content_range)
+        return int(match.group(1)) if match else None
 
     def extract_zip(self, zip_path, extract_to):
-        with zipfile.ZipFile(zip_path, 'r') as zip_ref:
-            for member in zip_ref.namelist():
-                filename = os.path.basename(member)
-                # Skip directories and empty file names
-                if not filename:
-                    continue
-                source = zip_ref.open(member)
-                target = open(os.path.join(extract_to, filename), "wb")
-                with source, target:
-                    target.write(source.read())
-        self.debug_print("file_download", f"{zip_path} extracted to {extract_to}")
+        """
+        Extracts a code archive, keeping its folder structure, and deletes it afterwards.
+
+        Members are streamed to disk in chunks, on `extract_workers` threads.
+
+        :param zip_path: The downloaded archive
+        :param extract_to: The example_code folder to extract into
+        """
+        extracted, skipped = extract_archive(zip_path, extract_to, self.extract_workers)
+        for name in skipped:
+            self.debug_print("file_download", f"Skipped unsafe member {name} in {zip_path}")
+        self.debug_print("file_download", f"{zip_path} extracted to {extract_to} ({len(extracted)} files)")
         os.remove(zip_path)
         self.debug_print("file_download", f"{zip_path} deleted after extraction")
 
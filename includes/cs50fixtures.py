@@ -0,0 +1,297 @@
+# includes/cs50fixtures.py
+
+import os
+import json
+import time
+import random
+import hashlib
+import argparse
+import threading
+import urllib.parse
+from http.server import ThreadingHTTPServer, BaseHTTPRequestHandler
+
+INDEX_FILE_NAME = "index.json"
+BODIES_DIRECTORY = "bodies"
+
+def fixture_url(server_url, url):
+    """
+    Maps a real URL onto a fixture server, e.g. https://cs50.harvard.edu/x/ becomes
+    http://127.0.0.1:8000/https/cs50.harvard.edu/x/.
+
+    :param server_url: Base URL of the fixture server
+    :param url: The original URL
+    :return: The URL to request from the fixture server
+    """
+    parts = urllib.parse.urlsplit(url)
+    path = f"/{parts.scheme}/{parts.netloc}{parts.path or '/'}"
+    if parts.query:
+        path += "?" + parts.query
+    return server_url.rstrip('/') + path
+
+def original_url(path):
+    # Inverse of fixture_url for the request path received by the server
+    scheme, _, rest = path.lstrip('/').partition('/')
+    return f"{scheme}://{rest}"
+
+class CS50FixtureRecorder:
+    """
+    Records the pages and files a real run touches into a replayable corpus.
+
+    Full 200 responses and 404s are recorded; partial (206) and 304 responses are not,
+    so recording runs should bypass the page cache and segmented downloads.
+
+    Attributes:
+        corpus_directory (str): Where the corpus index and bodies are written.
+        index (dict): Recorded responses keyed by URL.
+    """
+
+    def __init__(self, corpus_directory):
+        self.corpus_directory = corpus_directory
+        self.bodies_directory = os.path.join(corpus_directory, BODIES_DIRECTORY)
+        os.makedirs(self.bodies_directory, exist_ok=True)
+        self.lock = threading.Lock()
+        self.index = load_index(corpus_directory)
+
+    def capture(self, url, response, stream=False):
+        """
+        Records a response. Streamed bodies are recorded as they are consumed.
+
+        :param url: The original (not rewritten) URL
+        :param response: The requests.Response
+        :param stream: Whether the body has not been read yet
+        :return: The response, to be used in place of the original
+        """
+        if response.request.method != 'GET' or response.status_code not in (200, 404):
+            return response
+
+        content_type = response.headers.get('Content-Type')
+        if response.status_code == 404:
+            self.store(url, 404, content_type, None)
+            return response
+        if not stream:
+            self.store(url, 200, content_type, self.write_body(response.content))
+            return response
+
+        recorder = self
+        original_iter_content = response.iter_content
+
+        def iter_content(chunk_size=1, decode_unicode=False):
+            temp_path = os.path.join(recorder.bodies_directory, f".{threading.get_ident()}.{time.monotonic_ns()}.tmp")
+            hasher = hashlib.sha256()
+            complete = False
+            try:
+                with open(temp_path, 'wb') as temp:
+                    for chunk in original_iter_content(chunk_size, decode_unicode):
+                        temp.write(chunk)
+                        hasher.update(chunk)
+                        yield chunk
+                complete = True
+            finally:
+                if complete:
+                    body_name = hasher.hexdigest()
+                    os.replace(temp_path, os.path.join(recorder.bodies_directory, body_name))
+                    recorder.store(url, 200, content_type, body_name)
+                elif os.path.exists(temp_path):
+                    os.remove(temp_path)
+
+        response.iter_content = iter_content
+        return response
+
+    def write_body(self, body):
+        body_name = hashlib.sha256(body).hexdigest()
+        path = os.path.join(self.bodies_directory, body_name)
+        if not os.path.exists(path):
+            with open(path + ".tmp", 'wb') as file:
+                file.write(body)
+            os.replace(path + ".tmp", path)
+        return body_name
+
+    def store(self, url, status, content_type, body_name):
+        with self.lock:
+            self.index[url] = {'status': status, 'content_type': content_type, 'body': body_name}
+            self.save()
+
+    def save(self):
+        # Callers hold self.lock
+        temp_path = os.path.join(self.corpus_directory, INDEX_FILE_NAME + ".tmp")
+        with open(temp_path, 'w') as file:
+            json.dump(self.index, file, indent=1, sort_keys=True)
+        os.replace(temp_path, os.path.join(self.corpus_directory, INDEX_FILE_NAME))
+
+def load_index(corpus_directory):
+    try:
+        with open(os.path.join(corpus_directory, INDEX_FILE_NAME), 'r') as file:
+            return json.load(file)
+    except (OSError, ValueError):
+        return {}
+
+class CS50FixtureServer:
+    """
+    A local HTTP server replaying a recorded corpus.
+
+    Supports HEAD, Range requests and ETag revalidation like the real servers, and can add
+    latency, cap bandwidth and inject errors so fetch and download paths can be benchmarked
+    and regression-tested offline. URLs not in the corpus get a 404.
+
+    Attributes:
+        corpus_directory (str): The recorded corpus.
+        latency (float): Seconds added before every response.
+        bandwidth (int): Per-response transfer cap in bytes per second (None for no cap).
+        error_rate (float): Probability of answering 503 (or dropping the body mid-transfer).
+        stats (dict): Requests served, bytes sent and errors injected.
+    """
+
+    CHUNK_SIZE = 64 * 1024
+
+    def __init__(self, corpus_directory, host="127.0.0.1", port=0, latency=0, bandwidth=None, error_rate=0, seed=None):
+        self.corpus_directory = corpus_directory
+        self.index = load_index(corpus_directory)
+        self.latency = latency
+        self.bandwidth = bandwidth
+        self.error_rate = error_rate
+        self.random = random.Random(seed)
+        self.stats = {'requests': 0, 'bytes': 0, 'errors': 0}
+        self.lock = threading.Lock()
+        self.httpd = ThreadingHTTPServer((host, port), self.make_handler())
+        self.httpd.daemon_threads = True
+        self.thread = None
+
+    @property
+    def url(self):
+        host, port = self.httpd.server_address[:2]
+        return f"http://{host}:{port}"
+
+    def start(self):
+        self.thread = threading.Thread(target=self.httpd.serve_forever, daemon=True)
+        self.thread.start()
+        return self.url
+
+    def stop(self):
+        self.httpd.shutdown()
+        self.httpd.server_close()
+
+    def serve_forever(self):
+        self.httpd.serve_forever()
+
+    def count(self, key, amount=1):
+        with self.lock:
+            self.stats[key] += amount
+
+    def inject_error(self):
+        with self.lock:
+            return self.error_rate and self.random.random() < self.error_rate
+
+    def make_handler(self):
+        server = self
+
+        class FixtureHandler(BaseHTTPRequestHandler):
+            protocol_version = "HTTP/1.1"
+
+            def log_message(self, format, *args):
+                pass
+
+            def do_HEAD(self):
+                self.respond(send_body=False)
+
+            def do_GET(self):
+                self.respond(send_body=True)
+
+            def send_empty(self, status, headers=None):
+                self.send_response(status)
+                for name, value in (headers or {}).items():
+                    self.send_header(name, value)
+                self.send_header("Content-Length", "0")
+                self.end_headers()
+
+            def respond(self, send_body):
+                server.count('requests')
+                if server.latency:
+                    time.sleep(server.latency)
+
+                entry = server.index.get(original_url(self.path))
+                if entry is None or entry['status'] == 404 or not entry.get('body'):
+                    self.send_empty(404)
+                    return
+                if server.inject_error():
+                    server.count('errors')
+                    self.send_empty(503, {"Retry-After": "1"})
+                    return
+
+                body_path = os.path.join(server.corpus_directory, BODIES_DIRECTORY, entry['body'])
+                size = os.path.getsize(body_path)
+                etag = f'"{entry["body"][:32]}"'
+                if self.headers.get("If-None-Match") == etag:
+                    self.send_empty(304, {"ETag": etag})
+                    return
+
+                start, end, status = 0, size - 1, 200
+                range_header = self.headers.get("Range")
+                if_range = self.headers.get("If-Range")
+                if range_header and range_header.startswith("bytes=") and (not if_range or if_range == etag):
+                    first, _, last = range_header[len("bytes="):].partition("-")
+                    start = int(first)
+                    end = min(int(last), size - 1) if last else size - 1
+                    if start >= size:
+                        self.send_empty(416, {"Content-Range": f"bytes */{size}"})
+                        return
+                    status = 206
+
+                self.send_response(status)
+                self.send_header("Content-Type", entry.get('content_type') or "application/octet-stream")
+                self.send_header("Content-Length", str(end - start + 1))
+                self.send_header("Accept-Ranges", "bytes")
+                self.send_header("ETag", etag)
+                if status == 206:
+                    self.send_header("Content-Range", f"bytes {start}-{end}/{size}")
+                self.end_headers()
+                if send_body:
+                    self.send_body(body_path, start, end)
+
+            def send_body(self, body_path, start, end):
+                remaining = end - start + 1
+                # Dropping the connection mid-body exercises the resume paths
+                drop_at = remaining // 2 if remaining > server.CHUNK_SIZE and server.inject_error() else None
+                sent = 0
+                with open(body_path, 'rb') as file:
+                    file.seek(start)
+                    while remaining > 0:
+                        chunk = file.read(min(server.CHUNK_SIZE, remaining))
+                        if not chunk:
+                            break
+                        if drop_at is not None and sent + len(chunk) > drop_at:
+                            server.count('errors')
+                            self.close_connection = True
+                            return
+                        self.wfile.write(chunk)
+                        sent += len(chunk)
+                        remaining -= len(chunk)
+                        server.count('bytes', len(chunk))
+                        if server.bandwidth:
+                            time.sleep(len(chunk) / server.bandwidth)
+
+        return FixtureHandler
+
+def main():
+    parser = argparse.ArgumentParser(description="Serve a recorded CS50 corpus for offline runs and benchmarks")
+    parser.add_argument("-corpus", help="corpus directory recorded with main.py -record", required=True)
+    parser.add_argument("-port", help="port to listen on", type=int, default=8050)
+    parser.add_argument("-latency", help="latency added to every response in ms", type=float, default=0)
+    parser.add_argument("-bandwidth", help="per-response bandwidth cap in KB/s", type=int, default=None)
+    parser.add_argument("-error_rate", help="probability of injecting an error", type=float, default=0)
+    args = parser.parse_args()
+
+    server = CS50FixtureServer(
+        args.corpus,
+        port=args.port,
+        latency=args.latency / 1000,
+        bandwidth=args.bandwidth * 1024 if args.bandwidth else None,
+        error_rate=args.error_rate,
+    )
+    print(f"Serving {len(server.index)} recorded URLs at {server.url} (run main.py with -replay {server.url})")
+    try:
+        server.serve_forever()
+    except KeyboardInterrupt:
+        server.stop()
+
+if __name__ == "__main__":
+    main()
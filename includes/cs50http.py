@@ -0,0 +1,329 @@
+# includes/cs50http.py
+
+import time
+import threading
+import contextlib
+import email.utils
+import urllib.parse
+import requests
+from requests.adapters import HTTPAdapter
+from urllib3.util.retry import Retry
+from includes.cs50metrics import CS50Metrics
+
+class CS50BandwidthLimiter:
+    """
+    A token bucket shared by every download to cap the total transfer rate.
+
+    Attributes:
+        bytes_per_second (int): The rate limit in bytes per second.
+    """
+
+    def __init__(self, bytes_per_second):
+        self.bytes_per_second = bytes_per_second
+        self.tokens = 0
+        self.last_refill = time.monotonic()
+        self.lock = threading.Lock()
+
+    def consume(self, size):
+        """
+        Blocks until `size` bytes may be transferred under the rate limit.
+
+        :param size: Number of bytes about to be written
+        """
+        with self.lock:
+            now = time.monotonic()
+            # Allow at most one second of burst
+            self.tokens = min(self.bytes_per_second, self.tokens + (now - self.last_refill) * self.bytes_per_second)
+            self.last_refill = now
+            self.tokens -= size
+            wait = -self.tokens / self.bytes_per_second if self.tokens < 0 else 0
+        if wait:
+            time.sleep(wait)
+
+class CS50ConcurrencyLimit:
+    """
+    An AIMD limit on the requests in flight to one host for one kind of request.
+
+    The limit starts low and doubles per round of successful responses (slow start) until
+    the first sign of congestion, then grows by one per round. A 429/503 response halves it
+    and pauses the host for the Retry-After delay; latency well above the best latency seen
+    so far lowers it gently.
+
+    Attributes:
+        name (str): Host and kind, e.g. "cs50.harvard.edu page", used in debug output.
+        limit (float): Current number of requests allowed in flight.
+        max_limit (int): Upper bound of the limit.
+        in_flight (int): Requests currently holding a slot.
+        blocked_until (float): Monotonic time until which no new request starts.
+    """
+
+    # Latency this many times the best seen counts as queueing at the server
+    LATENCY_TOLERANCE = 2.0
+    # ... and at least this many seconds above it, so jitter on fast responses is ignored
+    LATENCY_MARGIN = 0.05
+    # Minimum time between two latency-driven decreases, in seconds
+    DECREASE_INTERVAL = 1.0
+
+    def __init__(self, name, max_limit, initial_limit=2, debug_print=None):
+        self.name = name
+        self.max_limit = max(1, max_limit)
+        self.limit = float(min(initial_limit, self.max_limit))
+        self.slow_start = True
+        self.in_flight = 0
+        self.blocked_until = 0
+        self.best_latency = None
+        self.last_decrease = 0
+        self.condition = threading.Condition()
+        self.debug_print = debug_print or (lambda message: None)
+
+    def acquire(self):
+        with self.condition:
+            while True:
+                wait = self.blocked_until - time.monotonic()
+                if wait > 0:
+                    self.condition.wait(wait)
+                elif self.in_flight >= int(self.limit):
+                    self.condition.wait()
+                else:
+                    break
+            self.in_flight += 1
+
+    def release(self):
+        with self.condition:
+            self.in_flight -= 1
+            self.condition.notify_all()
+
+    def observe(self, latency, status_code, retry_after=None):
+        """
+        Adjusts the limit after a response.
+
+        :param latency: Seconds until the response headers arrived
+        :param status_code: The HTTP status code
+        :param retry_after: Seconds from a Retry-After header, if any
+        """
+        with self.condition:
+            previous = int(self.limit)
+            now = time.monotonic()
+            if status_code in (429, 503):
+                self.slow_start = False
+                self.limit = max(1.0, self.limit / 2)
+                self.last_decrease = now
+                if retry_after:
+                    self.blocked_until = max(self.blocked_until, now + retry_after)
+                self.debug_print(f"{self.name}: throttled ({status_code}), limit {previous} -> {int(self.limit)}, pausing {retry_after or 0:.1f}s")
+            elif status_code < 500:
+                if self.best_latency is None or latency < self.best_latency:
+                    self.best_latency = latency
+                congested = latency > self.best_latency * self.LATENCY_TOLERANCE and latency - self.best_latency > self.LATENCY_MARGIN
+                if congested and now - self.last_decrease > self.DECREASE_INTERVAL:
+                    self.slow_start = False
+                    self.limit = max(1.0, self.limit * 0.8)
+                    self.last_decrease = now
+                    # Let the baseline recover slowly so one fast response does not pin it forever
+                    self.best_latency *= 1.1
+                elif self.slow_start:
+                    self.limit = min(self.max_limit, self.limit + 1)
+                else:
+                    self.limit = min(self.max_limit, self.limit + 1 / self.limit)
+            if int(self.limit) != previous:
+                if status_code not in (429, 503):
+                    self.debug_print(f"{self.name}: limit {previous} -> {int(self.limit)} (latency {latency * 1000:.0f} ms)")
+                self.condition.notify_all()
+
+class CS50ConcurrencyController:
+    """
+    Keeps one CS50ConcurrencyLimit per host and kind of request.
+
+    Page fetches and media downloads are limited separately, so large downloads from the
+    media CDN do not hold back page fetches and the other way round.
+
+    Attributes:
+        max_limits (dict): Upper bound of the limit per kind ('page' and 'media').
+        limits (dict): CS50ConcurrencyLimit per (host, kind).
+    """
+
+    def __init__(self, max_page_requests=8, max_media_requests=4, debug_print=None):
+        self.max_limits = {'page': max_page_requests, 'media': max_media_requests}
+        self.limits = {}
+        self.lock = threading.Lock()
+        self.debug_print = debug_print or (lambda category, message: None)
+
+    def limit_for(self, url, kind):
+        host = urllib.parse.urlsplit(url).netloc
+        with self.lock:
+            key = (host, kind)
+            if key not in self.limits:
+                category = "scraping" if kind == 'page' else "file_download"
+                self.limits[key] = CS50ConcurrencyLimit(
+                    f"{host} {kind}",
+                    self.max_limits[kind],
+                    debug_print=lambda message, category=category: self.debug_print(category, message),
+                )
+            return self.limits[key]
+
+    def current_limits(self):
+        with self.lock:
+            return {f"{host} {kind}": int(limit.limit) for (host, kind), limit in self.limits.items()}
+
+def parse_retry_after(value):
+    """
+    Parses a Retry-After header, given either as seconds or as an HTTP date.
+
+    :return: Seconds to wait, or None
+    """
+    if not value:
+        return None
+    if value.strip().isdigit():
+        return float(value)
+    try:
+        retry_at = email.utils.parsedate_to_datetime(value)
+    except (TypeError, ValueError):
+        return None
+    return max(0.0, retry_at.timestamp() - time.time())
+
+class CS50HttpClient:
+    """
+    A pooled HTTP client shared by CS50 and CS50FileManager.
+
+    Keeps connections to cs50.harvard.edu (and the media CDN) alive between
+    requests so that every page and file does not pay a new TCP+TLS handshake.
+
+    Attributes:
+        pool_size (int): Maximum number of kept-alive connections per host.
+        timeout (float): Connect/read timeout in seconds for every request.
+        retries (int): Number of retries for connection errors and 5xx/429 responses.
+        backoff_factor (float): Exponential backoff factor between retries.
+        max_connections (int): Global cap on requests in flight across all hosts (None for no cap).
+        bandwidth_limiter (CS50BandwidthLimiter): Optional global cap on download bandwidth.
+        bulk_bandwidth_limiter (CS50BandwidthLimiter): Optional cap on the bandwidth of bulk (audio and video) downloads, within the global cap.
+        replay_url (str): Base URL of a fixture server every request is redirected to (None for the real sites).
+        recorder (CS50FixtureRecorder): Optional recorder capturing every response into a corpus.
+        concurrency (CS50ConcurrencyController): Adaptive per-host limits for pages and media.
+        metrics (CS50Metrics): Run metrics shared by everything using this client (disabled unless passed in).
+    """
+
+    # Retried by urllib3; throttling responses are retried by the client so the concurrency controller sees them
+    RETRY_STATUSES = (500, 502, 504)
+    THROTTLE_STATUSES = (429, 503)
+    # Errors of a dropped or stalled transfer, which downloads resume from where they stopped
+    TRANSIENT_ERRORS = (requests.exceptions.ConnectionError, requests.exceptions.ChunkedEncodingError, requests.exceptions.Timeout)
+
+    def __init__(self, pool_size=10, timeout=30, retries=3, backoff_factor=0.5, max_connections=None, bandwidth_limit=None, replay_url=None, recorder=None, max_page_requests=8, max_media_requests=4, debug_categories=None, metrics=None, bulk_bandwidth_limit=None):
+        self.pool_size = pool_size
+        self.replay_url = replay_url
+        self.recorder = recorder
+        self.timeout = timeout
+        self.retries = retries
+        self.backoff_factor = backoff_factor
+        self.max_connections = max_connections
+        self.connection_semaphore = threading.BoundedSemaphore(max_connections) if max_connections else None
+        self.bandwidth_limiter = CS50BandwidthLimiter(bandwidth_limit) if bandwidth_limit else None
+        self.bulk_bandwidth_limiter = CS50BandwidthLimiter(bulk_bandwidth_limit) if bulk_bandwidth_limit else None
+        self.debug_categories = debug_categories or []
+        self.metrics = metrics or CS50Metrics(enabled=False)
+        self.concurrency = CS50ConcurrencyController(max_page_requests, max_media_requests, debug_print=self.debug_print)
+
+        retry = Retry(
+            total=retries,
+            backoff_factor=backoff_factor,
+            status_forcelist=self.RETRY_STATUSES,
+            allowed_methods=frozenset(["GET", "HEAD"]),
+            raise_on_status=False,
+            # 429/503 with Retry-After are handled by send()
+            respect_retry_after_header=False,
+        )
+        adapter = HTTPAdapter(pool_connections=pool_size, pool_maxsize=pool_size, max_retries=retry)
+
+        self.session = requests.Session()
+        self.session.mount("https://", adapter)
+        self.session.mount("http://", adapter)
+
+    def debug_print(self, category, message):
+        if category in self.debug_categories:
+            print(f"Debug ({category}): {message}")
+
+    @contextlib.contextmanager
+    def connection_slot(self, url=None, kind='media'):
+        """
+        Holds one of the global connection slots, and a slot of the URL's adaptive host limit, for the duration of the block.
+
+        Streamed downloads must hold a slot while they read the body; other requests take one automatically.
+
+        :param url: The URL about to be requested; without it only the global cap applies
+        :param kind: 'page' or 'media', selecting which adaptive limit applies
+        """
+        limit = self.concurrency.limit_for(url, kind) if url else None
+        if limit:
+            limit.acquire()
+        try:
+            if self.connection_semaphore is None:
+                yield
+            else:
+                with self.connection_semaphore:
+                    yield
+        finally:
+            if limit:
+                limit.release()
+
+    def throttle(self, size, bulk=False):
+        if bulk and self.bulk_bandwidth_limiter:
+            self.bulk_bandwidth_limiter.consume(size)
+        if self.bandwidth_limiter:
+            self.bandwidth_limiter.consume(size)
+
+    def resolve(self, url):
+        if not self.replay_url:
+            return url
+        # Only replay runs need the fixture module (and http.server)
+        from includes.cs50fixtures import fixture_url
+        return fixture_url(self.replay_url, url)
+
+    def send(self, method, url, kind, hold_slot, **kwargs):
+        """
+        Sends a request, feeding its latency and status to the host's adaptive limit.
+
+        429/503 responses are retried after their Retry-After delay (or exponential backoff),
+        during which the host's limit also holds back other requests.
+
+        :param hold_slot: Whether to take a connection slot per attempt (False when the caller holds one)
+        """
+        limit = self.concurrency.limit_for(url, kind)
+        for attempt in range(self.retries + 1):
+            with self.connection_slot(url, kind) if hold_slot else contextlib.nullcontext():
+                started = time.monotonic()
+                response = self.session.request(method, self.resolve(url), **kwargs)
+                latency = time.monotonic() - started
+            retry_after = parse_retry_after(response.headers.get("Retry-After"))
+            limit.observe(latency, response.status_code, retry_after)
+            self.metrics.observe_request(method, url, response.status_code, latency)
+            if response.status_code not in self.THROTTLE_STATUSES or attempt == self.retries:
+                return response
+            response.close()
+            delay = retry_after if retry_after is not None else self.backoff_factor * 2 ** attempt
+            self.debug_print("scraping" if kind == 'page' else "file_download", f"{url} throttled ({response.status_code}), retrying in {delay:.1f}s")
+            time.sleep(delay)
+
+    def get(self, url, **kwargs):
+        kwargs.setdefault("timeout", self.timeout)
+        stream = kwargs.get("stream", False)
+        # Streamed bodies are media downloads whose caller holds the slot while reading
+        response = self.send("GET", url, 'media' if stream else 'page', not stream, **kwargs)
+        if not stream:
+            self.metrics.count('bytes_pages', len(response.content))
+        if self.recorder:
+            response = self.recorder.capture(url, response, stream=stream)
+        return response
+
+    def head(self, url, **kwargs):
+        kwargs.setdefault("timeout", self.timeout)
+        kwargs.setdefault("allow_redirects", True)
+        return self.send("HEAD", url, 'media', True, **kwargs)
+
+    def close(self):
+        self.session.close()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc_value, traceback):
+        self.close()
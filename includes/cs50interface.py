@@ -2,8 +2,8 @@
 
 import inquirer
 from pprint import pprint
-from includes.cs50scraper import CS50Scraper  # Import CS50Scraper from the new module
-from includes.cs50filemanager import CS50FileManager
+import os
+import contextlib
 
 class Interface:
     def __init__(self, course_manager):
@@ -16,6 +16,26 @@ class Interface:
             "Course Folder": "saved",
             "Debug": False,
             "Debug Categories": [],
+            "Workers": 1,
+            "Incremental": False,
+            "Refresh Cache": False,
+            "Cache Size": 50,
+            "Segments": 1,
+            "Segment Threshold": 64,
+            "Deduplicate": False,
+            "Keep Archives": False,
+            "Metrics": False,
+            "Profile": False,
+            "Plan Only": False,
+            "Output": "folders",
+            "Max Connections": None,
+            "Max Page Requests": 8,
+            "Max Media Requests": 4,
+            "Bandwidth Limit": None,
+            "Bulk Bandwidth Limit": None,
+            "Pool Size": 10,
+            "Timeout": 30,
+            "Retries": 3,
         }
 
     def display_menu(self):
@@ -24,7 +44,7 @@ class Interface:
                 inquirer.List(
                     'action',
                     message="Select an action",
-                    choices=['Select courses', 'Exit'],
+                    choices=['Select courses', 'Search scraped courses', 'Exit'],
                 ),
             ]
 
@@ -33,6 +53,8 @@ class Interface:
 
             if action == 'Select courses':
                 self.select_courses()
+            elif action == 'Search scraped courses':
+                self.search_courses()
             elif action == 'Exit':
                 break
 
@@ -74,6 +96,17 @@ class Interface:
                         'Download lecture videos',
                         'Download example code',
                         'Set root directory of courses',
+                        'Set number of parallel workers',
+                        'Force refresh of cached pages',
+                        'Limit connections and bandwidth',
+                        'Segmented downloads for large files',
+                        'Incremental sync (skip unchanged files)',
+                        'Deduplicate identical files (hardlinks)',
+                        'Keep archives unextracted',
+                        'Report run metrics',
+                        'Profile the run (CPU and memory)',
+                        'Plan only (dry run with sizes and time estimates)',
+                        'Choose output format (folders, SQLite or both)',
                         'Enable debugging',
                     ],
                 ),
@@ -98,6 +131,54 @@ class Interface:
                     ]
                     directory_answer = inquirer.prompt(directory_question)
                     self.program_settings['Course Folder'] = directory_answer['directory']
+                if 'workers' in setting.lower():
+                    workers_question = [
+                        inquirer.Text('workers', message="Enter number of parallel workers", validate=lambda _, value: value.isdigit() and int(value) > 0)
+                    ]
+                    workers_answer = inquirer.prompt(workers_question)
+                    self.program_settings['Workers'] = int(workers_answer['workers'])
+                if 'incremental' in setting.lower():
+                    self.program_settings['Incremental'] = True
+                if 'bandwidth' in setting.lower():
+                    limit_questions = [
+                        inquirer.Text('max_connections', message="Maximum connections in flight (blank for no limit)", validate=lambda _, value: value == '' or (value.isdigit() and int(value) > 0)),
+                        inquirer.Text('bandwidth_limit', message="Download bandwidth limit in KB/s (blank for no limit)", validate=lambda _, value: value == '' or (value.isdigit() and int(value) > 0)),
+                        inquirer.Text('bulk_bandwidth_limit', message="Audio and video bandwidth limit in KB/s (blank for no limit)", validate=lambda _, value: value == '' or (value.isdigit() and int(value) > 0)),
+                        inquirer.Text('max_page_requests', message="Most page requests in flight per host", default="8", validate=lambda _, value: value.isdigit() and int(value) > 0),
+                        inquirer.Text('max_media_requests', message="Most downloads in flight per host", default="4", validate=lambda _, value: value.isdigit() and int(value) > 0),
+                    ]
+                    limit_answers = inquirer.prompt(limit_questions)
+                    self.program_settings['Max Connections'] = int(limit_answers['max_connections']) if limit_answers['max_connections'] else None
+                    self.program_settings['Bandwidth Limit'] = int(limit_answers['bandwidth_limit']) if limit_answers['bandwidth_limit'] else None
+                    self.program_settings['Bulk Bandwidth Limit'] = int(limit_answers['bulk_bandwidth_limit']) if limit_answers['bulk_bandwidth_limit'] else None
+                    self.program_settings['Max Page Requests'] = int(limit_answers['max_page_requests'])
+                    self.program_settings['Max Media Requests'] = int(limit_answers['max_media_requests'])
+                if 'segmented' in setting.lower():
+                    segment_questions = [
+                        inquirer.Text('segments', message="Number of parallel segments", validate=lambda _, value: value.isdigit() and int(value) > 0),
+                        inquirer.Text('segment_threshold', message="Minimum file size in MB", default="64", validate=lambda _, value: value.isdigit()),
+                    ]
+                    segment_answers = inquirer.prompt(segment_questions)
+                    self.program_settings['Segments'] = int(segment_answers['segments'])
+                    self.program_settings['Segment Threshold'] = int(segment_answers['segment_threshold'])
+                if 'deduplicate' in setting.lower():
+                    self.program_settings['Deduplicate'] = True
+                if 'archives' in setting.lower():
+                    self.program_settings['Keep Archives'] = True
+                if 'metrics' in setting.lower():
+                    self.program_settings['Metrics'] = True
+                if 'profile' in setting.lower():
+                    self.program_settings['Profile'] = True
+                if 'plan' in setting.lower():
+                    self.program_settings['Plan Only'] = True
+                if 'output format' in setting.lower():
+                    output_question = [
+                        inquirer.List('output', message="Where should scraped text go?", choices=['folders', 'sqlite', 'both'], default='folders')
+                    ]
+                    output_answer = inquirer.prompt(output_question)
+                    self.program_settings['Output'] = output_answer['output']
+                if 'refresh' in setting.lower():
+                    self.program_settings['Refresh Cache'] = True
                 if 'debugging' in setting.lower():
                     self.program_settings['Debug'] = True
                     debug_categories_question = [
@@ -125,6 +206,20 @@ class Interface:
                 self.run_course_aide()
                 break
 
+    def search_courses(self):
+        from includes.cs50search import CS50SearchIndex
+        index_path = os.path.join(self.program_settings['Course Folder'], ".index", CS50SearchIndex.FILE_NAME)
+        if not os.path.exists(index_path):
+            print(f"No search index in {self.program_settings['Course Folder']}, scrape a course first")
+            return
+        search_index = CS50SearchIndex(self.program_settings['Course Folder'], read_only=True)
+        while True:
+            search_answer = inquirer.prompt([inquirer.Text('query', message="Search lectures and problem sets (blank to go back)")])
+            if not search_answer['query'].strip():
+                break
+            search_index.print_results(search_answer['query'])
+        search_index.close()
+
     def get_course_choices(self):
         return self.course_manager.get_course_choices()
 
@@ -133,26 +228,130 @@ class Interface:
             print("No courses selected. Please select courses first.")
             return
 
+        # Imported here rather than at the top so the menu appears without loading the scraper and its dependencies
+        from includes.cs50scheduler import CS50CourseScheduler
+        from includes.cs50http import CS50HttpClient
+        from includes.cs50cache import CS50PageCache
+        from includes.cs50blobstore import CS50BlobStore
+        from includes.cs50metrics import CS50Metrics
+        from includes.cs50profiler import CS50Profiler
+        from includes.cs50dryrun import CS50DryRun
+        from includes.cs50database import CS50Database
+        from includes.cs50search import CS50SearchIndex
+        from includes.cs50planner import CS50DownloadScheduler
+
         print(f"Running course aide for {', '.join(self.selected_courses)}...")
         print(f"Download audio: {self.program_settings['Audio']}")
         print(f"Download video: {self.program_settings['Video']}")
         print(f"Download code: {self.program_settings['Code']}")
         print(f"Destination folder: {self.program_settings['Course Folder']}")
+        print(f"Workers: {self.program_settings['Workers']}")
+        print(f"Incremental sync: {self.program_settings['Incremental']}")
+        print(f"Refresh cache: {self.program_settings['Refresh Cache']}")
+        print(f"Segments: {self.program_settings['Segments']} (files of {self.program_settings['Segment Threshold']} MB or more)")
+        print(f"Deduplicate files: {self.program_settings['Deduplicate']}")
+        print(f"Keep archives: {self.program_settings['Keep Archives']}")
+        print(f"Metrics: {self.program_settings['Metrics']}")
+        print(f"Profile: {self.program_settings['Profile']}")
+        print(f"Plan only: {self.program_settings['Plan Only']}")
+        print(f"Output: {self.program_settings['Output']}")
+        print(f"Max connections: {self.program_settings['Max Connections'] or 'unlimited'}")
+        print(f"Adaptive limits per host: up to {self.program_settings['Max Page Requests']} pages, {self.program_settings['Max Media Requests']} downloads")
+        print(f"Bandwidth limit: {self.program_settings['Bandwidth Limit'] or 'unlimited'} KB/s")
+        print(f"Audio and video bandwidth limit: {self.program_settings['Bulk Bandwidth Limit'] or 'unlimited'} KB/s")
         print(f"Debugging: {self.program_settings['Debug']}")
         print(f"Debug Categories: {', '.join(self.program_settings['Debug Categories'])}")
 
-        for course in self.selected_courses:
-            # Instantiate the CS50Scraper and run it with the selected options
-            scraper = CS50Scraper(course, self.program_settings['Course Folder'], self.program_settings['Debug Categories'])
-            
-            # Scrape course data and save it using the file manager
-            scraper.scrape_course(
-                download_audio=self.program_settings['Audio'],
-                download_video=self.program_settings['Video'],
-                download_code=self.program_settings['Code']
-            )
+        # Share one connection pool, connection cap and bandwidth cap across every selected course
+        bandwidth_limit = self.program_settings['Bandwidth Limit']
+        bulk_bandwidth_limit = self.program_settings['Bulk Bandwidth Limit']
+        metrics = CS50Metrics(enabled=self.program_settings['Metrics'])
+        http_client = CS50HttpClient(
+            pool_size=self.program_settings['Pool Size'],
+            timeout=self.program_settings['Timeout'],
+            retries=self.program_settings['Retries'],
+            max_connections=self.program_settings['Max Connections'],
+            bandwidth_limit=bandwidth_limit * 1024 if bandwidth_limit else None,
+            bulk_bandwidth_limit=bulk_bandwidth_limit * 1024 if bulk_bandwidth_limit else None,
+            max_page_requests=self.program_settings['Max Page Requests'],
+            max_media_requests=self.program_settings['Max Media Requests'],
+            debug_categories=self.program_settings['Debug Categories'],
+            metrics=metrics,
+        )
+
+        page_cache = CS50PageCache(
+            os.path.join(self.program_settings['Course Folder'], ".cache", "pages"),
+            max_size=self.program_settings['Cache Size'] * 1024 * 1024,
+            refresh=self.program_settings['Refresh Cache'],
+            read_only=self.program_settings['Plan Only'],
+        )
+
+        blob_store = None
+        if self.program_settings['Deduplicate'] and not self.program_settings['Plan Only']:
+            blob_store = CS50BlobStore(os.path.join(self.program_settings['Course Folder'], ".blobs"))
 
-            print(f"Completed running aide for {course}")
+        database = None
+        database_exists = os.path.exists(os.path.join(self.program_settings['Course Folder'], CS50Database.FILE_NAME))
+        if self.program_settings['Output'] != 'folders' and (database_exists or not self.program_settings['Plan Only']):
+            database = CS50Database(self.program_settings['Course Folder'], read_only=self.program_settings['Plan Only'])
+
+        search_index = None if self.program_settings['Plan Only'] else CS50SearchIndex(self.program_settings['Course Folder'])
+
+        # One priority queue for the downloads of every selected course, shared fairly between them
+        download_scheduler = None if self.program_settings['Plan Only'] else CS50DownloadScheduler(self.program_settings['Workers'] * len(self.selected_courses))
+
+        with http_client:
+            # Run the selected courses concurrently with one aggregated progress bar
+            scheduler = CS50CourseScheduler(
+                self.selected_courses,
+                self.program_settings['Course Folder'],
+                self.program_settings['Debug Categories'],
+                http_client=http_client,
+                page_cache=page_cache,
+                workers=self.program_settings['Workers'],
+                incremental=self.program_settings['Incremental'],
+                segments=self.program_settings['Segments'],
+                segment_threshold=self.program_settings['Segment Threshold'] * 1024 * 1024,
+                blob_store=blob_store,
+                keep_archives=self.program_settings['Keep Archives'],
+                database=database,
+                write_folders=self.program_settings['Output'] != 'sqlite',
+                search_index=search_index,
+                download_scheduler=download_scheduler,
+            )
+            try:
+                with CS50Profiler(self.program_settings['Course Folder']) if self.program_settings['Profile'] else contextlib.nullcontext():
+                    if self.program_settings['Plan Only']:
+                        dry_run = CS50DryRun(
+                            self.selected_courses,
+                            self.program_settings['Course Folder'],
+                            self.program_settings['Debug Categories'],
+                            http_client=http_client,
+                            page_cache=page_cache,
+                            workers=self.program_settings['Workers'],
+                            keep_archives=self.program_settings['Keep Archives'],
+                            dedupe=self.program_settings['Deduplicate'],
+                            database=database,
+                        )
+                        dry_run.run(
+                            download_audio=self.program_settings['Audio'],
+                            download_video=self.program_settings['Video'],
+                            download_code=self.program_settings['Code']
+                        )
+                    else:
+                        scheduler.run(
+                            download_audio=self.program_settings['Audio'],
+                            download_video=self.program_settings['Video'],
+                            download_code=self.program_settings['Code']
+                        )
+            finally:
+                metrics.finish(self.program_settings['Course Folder'])
+                if database:
+                    database.close()
+                if search_index:
+                    search_index.close()
+                if download_scheduler:
+                    download_scheduler.close()
 
 # Assuming the course_manager is already defined somewhere
 # interface = Interface(course_manager)
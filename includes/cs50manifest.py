@@ -0,0 +1,124 @@
+# includes/cs50manifest.py
+
+import os
+import json
+import hashlib
+import threading
+
+class CS50Manifest:
+    """
+    A per-course record of every file written by CS50FileManager.
+
+    The manifest is stored as `.manifest.json` in the course folder. Each entry is keyed
+    by the path relative to the course folder and records the source URL, size, SHA-256
+    content hash and the HTTP validators (ETag / Last-Modified) of the download.
+
+    Changes are kept in memory until save is called, which CS50FileManager.flush does once
+    the writes and downloads of a run are done, so the file is not rewritten for every entry.
+
+    Attributes:
+        course_dir (str): The course folder the manifest describes.
+        path (str): Location of the manifest file.
+        entries (dict): Manifest entries keyed by relative path.
+        dirty (bool): Whether entries changed since the manifest was loaded or last saved.
+    """
+
+    FILE_NAME = ".manifest.json"
+
+    def __init__(self, course_dir):
+        self.course_dir = course_dir
+        self.path = os.path.join(course_dir, self.FILE_NAME)
+        self.lock = threading.Lock()
+        self.dirty = False
+        self.entries = {}
+        try:
+            with open(self.path, 'r') as file:
+                self.entries = json.load(file)
+        except (OSError, ValueError):
+            self.entries = {}
+
+    def relative_path(self, file_name):
+        return os.path.relpath(file_name, self.course_dir)
+
+    def get(self, file_name):
+        return self.entries.get(self.relative_path(file_name))
+
+    def record(self, file_name, url=None, sha256=None, etag=None, last_modified=None, **extra):
+        """
+        Records (or replaces) the entry for a file that was just written.
+
+        :param file_name: Path of the written file
+        :param url: Source URL of the file, if any
+        :param sha256: Content hash; computed from the file if omitted
+        :param etag: ETag header of the download
+        :param last_modified: Last-Modified header of the download
+        """
+        stat = os.stat(file_name)
+        entry = {
+            'url': url,
+            'size': stat.st_size,
+            'mtime': stat.st_mtime,
+            'sha256': sha256 or self.hash_file(file_name),
+            'etag': etag,
+            'last_modified': last_modified,
+        }
+        entry.update(extra)
+        with self.lock:
+            self.entries[self.relative_path(file_name)] = entry
+            self.dirty = True
+
+    def update(self, file_name, **fields):
+        with self.lock:
+            entry = self.entries.get(self.relative_path(file_name))
+            if entry is not None:
+                entry.update(fields)
+                self.dirty = True
+
+    def is_unchanged(self, file_name, url=None):
+        """
+        Checks whether a file on disk still matches its manifest entry.
+
+        Size and mtime are compared first; the content hash is only recomputed when
+        the mtime differs. Archives that were extracted and removed count as present
+        while their extraction folder exists.
+
+        :param file_name: Path of the file
+        :param url: If given, the entry must also come from this URL
+        :return: True if the file is present and unchanged
+        """
+        entry = self.get(file_name)
+        if entry is None or (url is not None and entry.get('url') != url):
+            return False
+
+        if not os.path.exists(file_name):
+            extracted_to = entry.get('extracted_to')
+            return bool(extracted_to) and os.path.isdir(os.path.join(self.course_dir, extracted_to))
+
+        stat = os.stat(file_name)
+        if stat.st_size != entry.get('size'):
+            return False
+        if stat.st_mtime == entry.get('mtime'):
+            return True
+        return self.hash_file(file_name) == entry.get('sha256')
+
+    def save(self):
+        """
+        Writes the manifest file if any entry changed since it was last written.
+        """
+        with self.lock:
+            if not self.dirty:
+                return
+            os.makedirs(self.course_dir, exist_ok=True)
+            temp_path = self.path + ".tmp"
+            with open(temp_path, 'w') as file:
+                json.dump(self.entries, file, indent=1, sort_keys=True)
+            os.replace(temp_path, self.path)
+            self.dirty = False
+
+    @staticmethod
+    def hash_file(file_name, chunk_size=1024 * 1024):
+        hasher = hashlib.sha256()
+        with open(file_name, 'rb') as file:
+            for chunk in iter(lambda: file.read(chunk_size), b''):
+                hasher.update(chunk)
+        return hasher.hexdigest()
@@ -0,0 +1,160 @@
+# includes/cs50metrics.py
+
+import os
+import json
+import time
+import bisect
+import threading
+import contextlib
+import urllib.parse
+
+class CS50Metrics:
+    """
+    Timers and counters for a scrape run, shared by everything using one CS50HttpClient.
+
+    Phases are timed with `phase(name)`; phases can nest (e.g. 'parse_html' inside
+    'week_fetch') and their times add up across threads, so they show where the time
+    goes rather than summing to the wall time. Requests are recorded per host and per
+    URL with latency histograms. A disabled instance records nothing.
+
+    Attributes:
+        enabled (bool): Whether anything is recorded.
+        phases (dict): Per phase: 'count', 'total', 'min' and 'max' seconds.
+        counters (dict): Named counters, e.g. requests, bytes and cache hits.
+        hosts (dict): Per host: request count and latency histogram.
+        urls (dict): Per URL: request count, total and max latency and histogram.
+    """
+
+    # Upper bounds of the latency histogram buckets in seconds; the last bucket is unbounded
+    LATENCY_BUCKETS = (0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1, 2.5, 5, 10)
+
+    def __init__(self, enabled=True):
+        self.enabled = enabled
+        self.started = time.time()
+        self.wall_started = time.perf_counter()
+        self.lock = threading.Lock()
+        self.phases = {}
+        self.counters = {}
+        self.hosts = {}
+        self.urls = {}
+
+    @contextlib.contextmanager
+    def phase(self, name):
+        if not self.enabled:
+            yield
+            return
+        started = time.perf_counter()
+        try:
+            yield
+        finally:
+            self.record_phase(name, time.perf_counter() - started)
+
+    def record_phase(self, name, seconds):
+        with self.lock:
+            phase = self.phases.setdefault(name, {'count': 0, 'total': 0.0, 'min': None, 'max': 0.0})
+            phase['count'] += 1
+            phase['total'] += seconds
+            phase['min'] = seconds if phase['min'] is None else min(phase['min'], seconds)
+            phase['max'] = max(phase['max'], seconds)
+
+    def count(self, name, amount=1):
+        if not self.enabled:
+            return
+        with self.lock:
+            self.counters[name] = self.counters.get(name, 0) + amount
+
+    def empty_histogram(self):
+        return [0] * (len(self.LATENCY_BUCKETS) + 1)
+
+    def observe_request(self, method, url, status_code, latency):
+        """
+        Records one HTTP request.
+
+        :param method: 'GET' or 'HEAD'
+        :param url: The original (not rewritten) URL
+        :param status_code: The response status
+        :param latency: Seconds until the response headers arrived
+        """
+        if not self.enabled:
+            return
+        bucket = bisect.bisect_left(self.LATENCY_BUCKETS, latency)
+        host = urllib.parse.urlsplit(url).netloc
+        with self.lock:
+            self.counters['requests'] = self.counters.get('requests', 0) + 1
+            status_key = f"status_{status_code}"
+            self.counters[status_key] = self.counters.get(status_key, 0) + 1
+            host_stats = self.hosts.setdefault(host, {'requests': 0, 'histogram': self.empty_histogram()})
+            host_stats['requests'] += 1
+            host_stats['histogram'][bucket] += 1
+            url_stats = self.urls.setdefault(url, {'requests': 0, 'total': 0.0, 'max': 0.0, 'histogram': self.empty_histogram()})
+            url_stats['requests'] += 1
+            url_stats['total'] += latency
+            url_stats['max'] = max(url_stats['max'], latency)
+            url_stats['histogram'][bucket] += 1
+
+    def report(self):
+        """
+        :return: A JSON-serialisable dict of everything recorded
+        """
+        with self.lock:
+            elapsed = time.perf_counter() - self.wall_started
+            hits = self.counters.get('cache_hits', 0)
+            lookups = hits + self.counters.get('cache_misses', 0)
+            return {
+                'started': time.strftime("%Y-%m-%dT%H:%M:%S", time.localtime(self.started)),
+                'wall_seconds': elapsed,
+                'latency_buckets': list(self.LATENCY_BUCKETS),
+                'phases': {name: dict(phase) for name, phase in self.phases.items()},
+                'counters': dict(self.counters),
+                'cache_hit_rate': hits / lookups if lookups else None,
+                'hosts': {host: dict(stats) for host, stats in self.hosts.items()},
+                'urls': {url: dict(stats) for url, stats in self.urls.items()},
+            }
+
+    def format_bucket(self, index):
+        if index == len(self.LATENCY_BUCKETS):
+            return f">{self.LATENCY_BUCKETS[-1]:g}s"
+        return f"<{self.LATENCY_BUCKETS[index] * 1000:g}ms"
+
+    def print_summary(self):
+        report = self.report()
+        counters = report['counters']
+        print(f"\nRun metrics ({report['wall_seconds']:.2f}s wall time)")
+        print(f"{'phase':<16}{'count':>8}{'total s':>10}{'mean ms':>10}{'max ms':>10}")
+        for name, phase in sorted(report['phases'].items(), key=lambda item: -item[1]['total']):
+            print(f"{name:<16}{phase['count']:>8}{phase['total']:>10.2f}{phase['total'] / phase['count'] * 1000:>10.1f}{phase['max'] * 1000:>10.1f}")
+
+        seconds = report['wall_seconds'] or 1
+        downloaded = counters.get('bytes_downloaded', 0)
+        print(f"Requests: {counters.get('requests', 0)} ({counters.get('requests', 0) / seconds:.1f}/s), "
+              f"pages: {counters.get('bytes_pages', 0) / 1024:.1f} KB, "
+              f"downloads: {downloaded / (1024 * 1024):.1f} MB ({downloaded / seconds / (1024 * 1024):.2f} MB/s)")
+        print(f"Files: {counters.get('files_downloaded', 0)} downloaded, {counters.get('files_linked', 0)} linked, {counters.get('files_skipped', 0)} unchanged or failed")
+        statuses = ", ".join(f"{name[len('status_'):]}: {value}" for name, value in sorted(counters.items()) if name.startswith('status_'))
+        print(f"Responses: {statuses or 'none'}")
+        if report['cache_hit_rate'] is not None:
+            print(f"Page cache hit rate: {report['cache_hit_rate']:.0%} ({counters.get('cache_hits', 0)} hits, {counters.get('cache_misses', 0)} misses)")
+        for host, stats in report['hosts'].items():
+            histogram = " ".join(f"{self.format_bucket(index)}:{value}" for index, value in enumerate(stats['histogram']) if value)
+            print(f"{host}: {stats['requests']} requests, latency {histogram}")
+
+    def finish(self, destination):
+        """
+        Prints the summary table and writes the JSON report under `<destination>/.metrics`.
+        """
+        if not self.enabled:
+            return
+        self.print_summary()
+        print(f"Metrics report written to {self.write_report(os.path.join(destination, '.metrics'))}")
+
+    def write_report(self, directory):
+        """
+        Writes the report as JSON into directory, one timestamped file per run.
+
+        :return: The path written
+        """
+        os.makedirs(directory, exist_ok=True)
+        path = os.path.join(directory, f"metrics-{time.strftime('%Y%m%d-%H%M%S', time.localtime(self.started))}.json")
+        with open(path, 'w') as file:
+            json.dump(self.report(), file, indent=2)
+        return path
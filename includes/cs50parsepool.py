@@ -0,0 +1,45 @@
+# includes/cs50parsepool.py
+
+import multiprocessing
+from concurrent.futures import ProcessPoolExecutor
+
+class CS50ParsePool:
+    """
+    Parses pages in worker processes, so BeautifulSoup work runs on several cores instead of
+    queueing behind the GIL while the fetch threads keep downloading.
+
+    Workers receive the raw HTML and run one of the module-level extract functions from
+    cs50parser, returning only its small record (plain dicts, lists and strings), never soup
+    objects. Network I/O stays in the calling threads. Workers are spawned rather than
+    forked, since the parent already has HTTP threads running.
+
+    Attributes:
+        processes (int): Number of worker processes.
+    """
+
+    def __init__(self, processes):
+        self.processes = processes
+        self.executor = ProcessPoolExecutor(max_workers=processes, mp_context=multiprocessing.get_context("spawn"))
+
+    def submit(self, function, html, *args):
+        """
+        Queues a page for parsing.
+
+        :param function: A module-level extract function from cs50parser, e.g. extract_week_record
+        :param html: The page body
+        :param args: Further arguments for the function, e.g. the page URL
+        :return: A future resolving to the extracted record
+        """
+        return self.executor.submit(function, html, *args)
+
+    def parse(self, function, html, *args):
+        return self.submit(function, html, *args).result()
+
+    def close(self):
+        self.executor.shutdown()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc_value, traceback):
+        self.close()
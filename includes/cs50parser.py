@@ -0,0 +1,184 @@
+# includes/cs50parser.py
+
+import re
+import importlib.util
+import urllib.parse
+
+# Prefer the C-accelerated lxml backend when it is installed; found without importing it,
+# since bs4 and lxml are only imported once a page is actually parsed
+PARSER_BACKEND = "lxml" if importlib.util.find_spec("lxml") else "html.parser"
+
+# Media link patterns, compiled once
+MEDIA_PATTERNS = (
+    ('audio', re.compile(r'.*\.mp3$')),
+    ('video', re.compile(r'.*720p\.mp4$')),
+    ('code', re.compile(r'.*\.zip$')),
+    ('pdf', re.compile(r'.*\.pdf$')),
+)
+
+def parse_html(html):
+    from bs4 import BeautifulSoup
+    return BeautifulSoup(html, PARSER_BACKEND)
+
+def empty_media_links():
+    return {'audio': [], 'video': [], 'code': [], 'pdf': []}
+
+def classify_link(href):
+    """
+    Classifies a link by media type.
+
+    Args:
+        href (str): The link target.
+
+    Returns:
+        str: 'audio', 'video', 'code' or 'pdf', or None for any other link.
+    """
+    for kind, pattern in MEDIA_PATTERNS:
+        if pattern.match(href):
+            return kind
+    return None
+
+def filter_media_links(media_links, download_audio, download_video, download_code):
+    """
+    Keeps only the media types enabled by the download flags. PDFs are always kept.
+
+    Args:
+        media_links (dict): Classified links as returned by the extract functions.
+
+    Returns:
+        dict: A new media links dict.
+    """
+    return {
+        'audio': list(media_links['audio']) if download_audio else [],
+        'video': list(media_links['video']) if download_video else [],
+        'code': list(media_links['code']) if download_code else [],
+        'pdf': list(media_links['pdf']),
+    }
+
+def is_main_column(tag):
+    return tag.name == 'main' and 'col-lg' in (tag.get('class') or [])
+
+def extract_week_record(html, url=None):
+    """
+    Extracts everything the scraper needs from a week page in one parse and one traversal.
+
+    Args:
+        html (str): The week page.
+        url (str): The page URL, used to resolve relative media links.
+
+    Returns:
+        dict: A record with 'title', 'description', 'h1', 'tags', 'shorts' (a list of
+        short video titles, or None if the page has no Shorts section) and 'media_links'.
+    """
+    from bs4 import NavigableString, Tag
+    soup = parse_html(html)
+    record = {
+        'title': None,
+        'description': None,
+        'h1': None,
+        'tags': None,
+        'shorts': None,
+        'media_links': empty_media_links(),
+    }
+    shorts_heading_seen = False
+    shorts_list = None
+
+    # Depth-first walk in document order, carrying whether we are inside the main column
+    stack = [(soup, False)]
+    while stack:
+        node, in_main = stack.pop()
+
+        if isinstance(node, NavigableString):
+            if not shorts_heading_seen and node == "Shorts":
+                shorts_heading_seen = True
+            continue
+        if not isinstance(node, Tag):
+            continue
+
+        name = node.name
+        if name == 'meta':
+            prop = node.get('property')
+            if prop == 'og:title' and record['title'] is None:
+                record['title'] = node.get('content')
+            elif prop == 'og:description' and record['description'] is None:
+                record['description'] = node.get('content')
+        elif name == 'a':
+            href = node.get('href')
+            if href:
+                kind = classify_link(href)
+                if kind:
+                    record['media_links'][kind].append(urllib.parse.urljoin(url, href) if url else href)
+        elif name == 'ol' and shorts_heading_seen and shorts_list is None:
+            # The first list after the "Shorts" heading holds the short videos
+            shorts_list = node
+            record['shorts'] = [link.text for link in node.find_all('a')]
+        elif in_main and name == 'h1' and record['h1'] is None:
+            record['h1'] = node.get_text()
+        elif in_main and name == 'p' and record['tags'] is None:
+            record['tags'] = node.get_text()
+
+        child_in_main = in_main or is_main_column(node)
+        stack.extend((child, child_in_main) for child in reversed(node.contents))
+
+    if shorts_heading_seen and record['shorts'] is None:
+        record['shorts'] = []
+    return record
+
+def extract_problem_set_list(html, course):
+    """
+    Extracts the problem sets listed on a week's problem set index page.
+
+    Args:
+        html (str): The problem set index page.
+        course (str): The course identifier; 'python' and 'ai' list psets differently.
+
+    Returns:
+        list: Dicts with 'title' and 'url' for each problem set.
+    """
+    soup = parse_html(html)
+    pset_col = soup.find('main', class_='col-lg')
+    if not pset_col:
+        return []
+
+    problem_sets = []
+    if course in ['python', 'ai']:
+        main_content = pset_col.find('ul')
+        if not main_content:
+            return []
+        for item in main_content.find_all('li'):
+            link = item.find('a')
+            title = item.text.strip()
+            url = link['href'] if link else 'No URL'
+            problem_sets.append({'title': title, 'url': url})
+    else:
+        # Problem sets are the list items with a 'Submit' link
+        for li in pset_col.find_all('li'):
+            if 'Submit' in li.text:
+                link = li.find('a')
+                if link:
+                    problem_sets.append({'title': link.text.strip(), 'url': link['href']})
+    return problem_sets
+
+def extract_problem_set_record(html, url=None):
+    """
+    Extracts the body text and media links of a problem set page.
+
+    Args:
+        html (str): The problem set page.
+        url (str): The page URL, used to resolve relative media links.
+
+    Returns:
+        dict: A record with 'content' and 'media_links'.
+    """
+    soup = parse_html(html)
+    main = soup.find('main', class_='col-lg')
+    media_links = empty_media_links()
+    if main:
+        for link in main.find_all('a', href=True):
+            kind = classify_link(link['href'])
+            if kind:
+                media_links[kind].append(urllib.parse.urljoin(url, link['href']) if url else link['href'])
+    return {
+        'content': main.text.strip() if main else 'No content found',
+        'media_links': media_links,
+    }
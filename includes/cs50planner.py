@@ -0,0 +1,268 @@
+# includes/cs50planner.py
+
+import os
+import threading
+import contextlib
+import collections
+from concurrent.futures import Future, wait
+
+class CS50DownloadScheduler:
+    """
+    Runs downloads on one pool of threads, most useful first.
+
+    Downloads are queued in priority classes: code archives, then PDFs, then audio, then
+    video. Within a class the owners (a course's week) take turns, so no single week or
+    course holds up the others. Bulk classes (audio and video) may use every thread but one,
+    keeping a thread free for study material planned after they started. Their bandwidth can
+    be capped separately with the HTTP client's bulk_bandwidth_limit.
+
+    One scheduler can be shared by the plans of several courses (see CS50DownloadPlan.streaming).
+
+    Attributes:
+        workers (int): Downloads running at once.
+        bulk_slots (int): Bulk downloads running at once at most.
+    """
+
+    PRIORITIES = {'code': 0, 'pdf': 1, 'audio': 2, 'video': 3}
+    BULK_KINDS = ('audio', 'video')
+
+    def __init__(self, workers=1):
+        self.workers = max(1, workers)
+        self.bulk_slots = max(1, self.workers - 1)
+        self.running_bulk = 0
+        # Per priority class: owner -> queued (future, function, args), in turn order
+        self.queues = [collections.OrderedDict() for _ in range(max(self.PRIORITIES.values()) + 1)]
+        self.condition = threading.Condition()
+        self.closed = False
+        # Started on the first submit, so threads exist only once there is work (and are seen by a profiler entered after construction)
+        self.threads = []
+
+    def submit(self, kind, owner, function, *args):
+        """
+        Queues a download.
+
+        :param kind: Media type ('audio', 'video', 'code' or 'pdf'), which sets the priority class
+        :param owner: Key the class is shared fairly between, e.g. (course folder, week folder)
+        :param function: Callable running the download
+        :return: A Future with the callable's result
+        """
+        future = Future()
+        with self.condition:
+            if not self.threads:
+                self.threads = [threading.Thread(target=self.run, name=f"CS50DownloadScheduler-{index}", daemon=True) for index in range(self.workers)]
+                for thread in self.threads:
+                    thread.start()
+            queue = self.queues[self.PRIORITIES.get(kind, 0)]
+            queue.setdefault(owner, collections.deque()).append((future, function, args))
+            self.condition.notify()
+        return future
+
+    def next_task(self):
+        # Callers hold self.condition
+        for priority, queue in enumerate(self.queues):
+            if not queue:
+                continue
+            bulk = priority >= self.PRIORITIES[self.BULK_KINDS[0]]
+            if bulk and self.running_bulk >= self.bulk_slots:
+                # Every class from here on is bulk
+                return None, False
+            owner, tasks = next(iter(queue.items()))
+            task = tasks.popleft()
+            # The owner goes to the back of the class
+            del queue[owner]
+            if tasks:
+                queue[owner] = tasks
+            return task, bulk
+        return None, False
+
+    def run(self):
+        while True:
+            with self.condition:
+                task, bulk = self.next_task()
+                while task is None:
+                    if self.closed and not any(self.queues) and not self.running_bulk:
+                        return
+                    self.condition.wait()
+                    task, bulk = self.next_task()
+                if bulk:
+                    self.running_bulk += 1
+            future, function, args = task
+            if future.set_running_or_notify_cancel():
+                try:
+                    future.set_result(function(*args))
+                except BaseException as error:
+                    future.set_exception(error)
+            if bulk:
+                with self.condition:
+                    self.running_bulk -= 1
+                    self.condition.notify_all()
+
+    def close(self):
+        """
+        Waits for every queued download, then stops the threads.
+        """
+        with self.condition:
+            self.closed = True
+            self.condition.notify_all()
+        for thread in self.threads:
+            thread.join()
+
+class CS50DownloadPlan:
+    """
+    Collects every (URL, destination) download of a course and runs each one exactly once.
+
+    Entries are deduplicated by (URL, destination) as they are added. A different URL planned
+    to a destination already taken is renamed to a free name next to it (`name-2.ext` and so
+    on), so it does not overwrite the first file. Entries that share a destination are run one
+    after another so they never write the same file concurrently.
+
+    Attributes:
+        entries (list): Unique download entries in the order they were first added.
+        duplicates (dict): Number of duplicate requests skipped per (URL, destination).
+        renamed (dict): The destination used instead, per (URL, destination) whose destination was taken by another URL.
+        results (dict): Per (URL, destination) that has run, the result of CS50FileManager.run_download.
+    """
+
+    def __init__(self):
+        self.entries = []
+        self.keys = set()
+        self.duplicates = {}
+        self.renamed = {}
+        # URL each destination is downloaded from
+        self.destinations = {}
+        self.sizes = {}
+        self.results = {}
+        self.lock = threading.Lock()
+        # Set while streaming: entries before `submitted` have already been handed to the scheduler
+        self.scheduler = None
+        self.file_manager = None
+        self.submitted = 0
+        self.futures = []
+        self.destination_futures = {}
+
+    def add(self, url, destination, kind, extract_to=None):
+        """
+        Adds a download to the plan.
+
+        :param url: The file URL
+        :param destination: Path the file is downloaded to
+        :param kind: Media type ('audio', 'video', 'code' or 'pdf')
+        :param extract_to: For code archives, the folder to extract into
+        :return: True if the entry is new, False if it was a duplicate
+        """
+        with self.lock:
+            if self.destinations.get(destination, url) != url:
+                destination = self.renamed.setdefault((url, destination), self.get_free_destination(destination, url))
+            key = (url, destination)
+            if key in self.keys:
+                self.duplicates[key] = self.duplicates.get(key, 0) + 1
+                return False
+            self.keys.add(key)
+            self.destinations[destination] = url
+            self.entries.append({'url': url, 'destination': destination, 'kind': kind, 'extract_to': extract_to})
+            return True
+
+    def get_free_destination(self, destination, url):
+        # Callers hold self.lock
+        root, extension = os.path.splitext(destination)
+        number = 2
+        while self.destinations.get(f"{root}-{number}{extension}", url) != url:
+            number += 1
+        return f"{root}-{number}{extension}"
+
+    def get_owner(self, file_manager, destination):
+        # Downloads are shared fairly between the weeks of every course
+        return tuple(os.path.relpath(destination, file_manager.base_directory).split(os.sep)[:2])
+
+    def group_by_destination(self, entries):
+        groups = {}
+        for entry in entries:
+            groups.setdefault(entry['destination'], []).append(entry)
+        return groups
+
+    def run_group(self, file_manager, entries, previous=None):
+        # Downloads to the same destination never overlap
+        if previous is not None:
+            wait([previous])
+        for entry in entries:
+            key = (entry['url'], entry['destination'])
+            self.results[key] = file_manager.run_download(entry)
+            self.sizes[key] = file_manager.get_downloaded_size(entry['destination'])
+
+    def execute(self, file_manager, workers=1):
+        """
+        Runs every planned download once, in priority order (see CS50DownloadScheduler).
+
+        :param file_manager: The CS50FileManager performing the downloads
+        :param workers: Number of destinations downloaded in parallel
+        """
+        with self.streaming(file_manager, workers):
+            self.submit_pending()
+
+    @contextlib.contextmanager
+    def streaming(self, file_manager, workers=1, scheduler=None):
+        """
+        Runs downloads in the background while the plan is still being built.
+
+        Entries are started by `submit_pending`, e.g. once per finished week. Leaving the block
+        waits for every submitted download, also when the block raised, so everything queued
+        before a failure still completes.
+
+        :param file_manager: The CS50FileManager performing the downloads
+        :param workers: Number of destinations downloaded in parallel, without a shared scheduler
+        :param scheduler: A CS50DownloadScheduler shared with other plans; a private one is used if omitted
+        """
+        self.file_manager = file_manager
+        self.scheduler = scheduler or CS50DownloadScheduler(workers)
+        try:
+            yield self
+        finally:
+            # A shared scheduler keeps running the other plans' downloads
+            wait(self.futures)
+            if scheduler is None:
+                self.scheduler.close()
+            self.scheduler = None
+        for future in self.futures:
+            future.result()
+
+    def submit_pending(self):
+        """
+        Starts the downloads added since the last call. Only valid inside `streaming`.
+        """
+        with self.lock:
+            pending = self.entries[self.submitted:]
+            self.submitted = len(self.entries)
+        for destination, entries in self.group_by_destination(pending).items():
+            previous = self.destination_futures.get(destination)
+            future = self.scheduler.submit(entries[0]['kind'], self.get_owner(self.file_manager, destination), self.run_group, self.file_manager, entries, previous)
+            self.destination_futures[destination] = future
+            self.futures.append(future)
+
+    def summary(self):
+        """
+        Summarises what the downloads did and how much work the deduplication saved.
+
+        :return: A dict with the number of planned and unique requests, the files that were 'downloaded',
+            'linked' from the blob store and 'skipped' as unchanged (or failed), the downloads 'renamed'
+            because another URL had their destination, the duplicate requests skipped and the bytes saved
+        """
+        saved_requests = sum(self.duplicates.values())
+        saved_bytes = sum(count * (self.sizes.get(key) or 0) for key, count in self.duplicates.items())
+        results = list(self.results.values())
+        return {
+            'planned': len(self.entries) + saved_requests,
+            'unique': len(self.entries),
+            'downloaded': results.count('downloaded'),
+            'linked': results.count('linked'),
+            'skipped': results.count('skipped'),
+            'renamed': len(self.renamed),
+            'saved_requests': saved_requests,
+            'saved_bytes': saved_bytes,
+        }
+
+    @staticmethod
+    def format_size(size):
+        for unit in ('B', 'KB', 'MB', 'GB'):
+            if size < 1024 or unit == 'GB':
+                return f"{size:.1f} {unit}" if unit != 'B' else f"{size} B"
+            size /= 1024
@@ -0,0 +1,158 @@
+# includes/cs50profiler.py
+
+import io
+import os
+import time
+import pstats
+import cProfile
+import threading
+import tracemalloc
+
+# Self time is attributed to the first group whose pattern occurs in a function's file (or name)
+PROFILE_GROUPS = (
+    ('bs4', ('bs4' + os.sep, 'soupsieve')),
+    ('html parsing', ('html' + os.sep + 'parser', '_markupbase', 'lxml')),
+    ('requests', ('requests' + os.sep, 'urllib3' + os.sep, 'charset_normalizer', 'idna')),
+    ('network I/O', ('socket', 'ssl', 'http' + os.sep + 'client', "'recv", "'send", 'select')),
+    ('zip', ('zipfile', 'zlib', 'shutil')),
+    ('hashing', ('hashlib', "'_hashlib")),
+    ('file I/O', ('_io.', "'read'", "'write'", 'io.open', 'posix.', 'genericpath', 'posixpath', 'ntpath', 'json')),
+    ('threading', ('threading', 'concurrent' + os.sep, 'queue', "'acquire'", "'wait'")),
+    ('progress bar', ('alive_progress',)),
+)
+
+def profile_group(function):
+    """
+    Names the group a pstats function key belongs to.
+
+    :param function: A (file, line, name) key from pstats
+    :return: The module name for our own includes/cs50*.py modules, else a PROFILE_GROUPS name or 'other'
+    """
+    file_name, _, name = function
+    base_name = os.path.basename(file_name)
+    if base_name.startswith('cs50') and base_name.endswith('.py'):
+        return base_name[:-len('.py')]
+    text = f"{file_name} {name!r}"
+    for group, patterns in PROFILE_GROUPS:
+        if any(pattern in text for pattern in patterns):
+            return group
+    return 'other'
+
+class CS50Profiler:
+    """
+    Profiles a block of a run, including the worker threads it starts, and writes the results to the destination.
+
+    Writes to `<destination>/.profile`:
+      - profile-<time>.txt: self time grouped by our modules versus bs4, requests, network and
+        file I/O, followed by the top functions by cumulative time
+      - profile-<time>.prof: the raw cProfile data, e.g. for snakeviz or pstats
+      - memory-<time>.txt: the peak traced memory and the allocation sites of a snapshot
+        taken near the peak
+
+    Attributes:
+        directory (str): Where the reports are written.
+        sample_interval (float): Seconds between checks of traced memory for a new peak.
+    """
+
+    TOP_FUNCTIONS = 40
+    TOP_ALLOCATIONS = 25
+
+    def __init__(self, destination, sample_interval=0.05):
+        self.directory = os.path.join(destination, ".profile")
+        self.sample_interval = sample_interval
+        self.profiles = []
+        self.lock = threading.Lock()
+        self.peak_snapshot = None
+        self.peak_size = 0
+        self.stop_sampling = threading.Event()
+
+    def start_thread_profile(self, frame, event, arg):
+        # Installed with threading.setprofile: the first event in a new thread swaps in a cProfile profiler
+        profile = cProfile.Profile()
+        with self.lock:
+            self.profiles.append(profile)
+        profile.enable()
+
+    def sample_memory(self):
+        while not self.stop_sampling.wait(self.sample_interval):
+            current, _ = tracemalloc.get_traced_memory()
+            # Only snapshot on a clear new high, snapshots are expensive
+            if current > self.peak_size * 1.1:
+                self.peak_size = current
+                self.peak_snapshot = tracemalloc.take_snapshot()
+
+    def __enter__(self):
+        self.started = time.strftime('%Y%m%d-%H%M%S')
+        tracemalloc.start(10)
+        self.sampler = threading.Thread(target=self.sample_memory, daemon=True)
+        self.sampler.start()
+        threading.setprofile(self.start_thread_profile)
+        self.main_profile = cProfile.Profile()
+        self.main_profile.enable()
+        return self
+
+    def __exit__(self, exc_type, exc_value, traceback):
+        self.main_profile.disable()
+        threading.setprofile(None)
+        self.stop_sampling.set()
+        self.sampler.join()
+        _, peak = tracemalloc.get_traced_memory()
+        final_snapshot = tracemalloc.take_snapshot()
+        tracemalloc.stop()
+
+        os.makedirs(self.directory, exist_ok=True)
+        stats = pstats.Stats(self.main_profile)
+        with self.lock:
+            for profile in self.profiles:
+                try:
+                    stats.add(profile)
+                except TypeError:
+                    # A thread that never recorded a call has no stats
+                    pass
+        stats.dump_stats(os.path.join(self.directory, f"profile-{self.started}.prof"))
+        profile_path = os.path.join(self.directory, f"profile-{self.started}.txt")
+        with open(profile_path, 'w') as file:
+            file.write(self.format_profile(stats))
+        memory_path = os.path.join(self.directory, f"memory-{self.started}.txt")
+        with open(memory_path, 'w') as file:
+            file.write(self.format_memory(peak, self.peak_snapshot or final_snapshot))
+        print(f"Profile written to {profile_path} and {memory_path}")
+        return False
+
+    def format_profile(self, stats):
+        groups = {}
+        for function, (_, _, self_time, _, _) in stats.stats.items():
+            group = profile_group(function)
+            groups[group] = groups.get(group, 0.0) + self_time
+        total = sum(groups.values()) or 1
+
+        lines = [f"Self time by group (all threads, {total:.2f}s; 'threading' is mostly idle workers waiting)", ""]
+        for group, seconds in sorted(groups.items(), key=lambda item: -item[1]):
+            lines.append(f"{group:<20}{seconds:>10.3f}s{seconds / total:>8.1%}")
+        lines.append("")
+
+        output = io.StringIO()
+        stats.stream = output
+        stats.sort_stats('cumulative').print_stats(self.TOP_FUNCTIONS)
+        return "\n".join(lines) + "\n" + output.getvalue()
+
+    def format_memory(self, peak, snapshot):
+        snapshot = snapshot.filter_traces((
+            tracemalloc.Filter(False, tracemalloc.__file__),
+            tracemalloc.Filter(False, "<frozen importlib._bootstrap>"),
+        ))
+        lines = [
+            f"Peak traced memory: {peak / (1024 * 1024):.1f} MB",
+            f"Snapshot near the peak: {sum(stat.size for stat in snapshot.statistics('filename')) / (1024 * 1024):.1f} MB",
+            "",
+            "Top allocation sites:",
+        ]
+        for stat in snapshot.statistics('lineno')[:self.TOP_ALLOCATIONS]:
+            frame = stat.traceback[0]
+            lines.append(f"{stat.size / 1024:>10.1f} KB {stat.count:>8} blocks  {frame.filename}:{frame.lineno}")
+        lines.append("")
+        lines.append("Top allocation call stacks:")
+        for stat in snapshot.statistics('traceback')[:5]:
+            lines.append(f"{stat.size / 1024:.1f} KB in {stat.count} blocks")
+            lines.extend(f"    {line}" for line in stat.traceback.format())
+        return "\n".join(lines) + "\n"
@@ -0,0 +1,80 @@
+# includes/cs50scheduler.py
+
+import threading
+from concurrent.futures import ThreadPoolExecutor, as_completed
+from includes.cs50scraper import CS50Scraper
+
+class CS50CourseProgress:
+    """
+    One progress display aggregated over several courses scraped at the same time.
+
+    Each course gets a callable that counts its finished weeks; the shared bar shows
+    the total and a per-course breakdown.
+    """
+
+    def __init__(self, bar, courses):
+        self.bar = bar
+        self.weeks = {course: 0 for course in courses}
+        self.lock = threading.Lock()
+
+    def advance(self, course):
+        with self.lock:
+            self.weeks[course] += 1
+            self.bar.text(" ".join(f"{course}:{weeks}" for course, weeks in self.weeks.items()))
+            self.bar()
+
+    def for_course(self, course):
+        return lambda: self.advance(course)
+
+class CS50CourseScheduler:
+    """
+    Runs several courses concurrently on one shared HTTP client.
+
+    The shared client's `max_connections` and bandwidth limit are the global caps for all
+    courses together. A failing course is reported but does not stop the others.
+
+    Attributes:
+        courses (list): Course identifiers to scrape.
+        base_directory (str): Destination folder for all courses.
+        max_parallel_courses (int): How many courses run at the same time.
+    """
+
+    def __init__(self, courses, base_directory, debug_categories=None, http_client=None, max_parallel_courses=None, **scraper_options):
+        self.courses = courses
+        self.base_directory = base_directory
+        self.debug_categories = debug_categories or []
+        self.http_client = http_client
+        self.max_parallel_courses = max_parallel_courses or len(courses)
+        # Passed through to every CS50Scraper (workers, page_cache, incremental, ...)
+        self.scraper_options = scraper_options
+
+    def run_course(self, scraper, progress, download_audio, download_video, download_code):
+        scraper.scrape_course(download_audio=download_audio, download_video=download_video, download_code=download_code, progress=progress)
+
+    def run(self, download_audio=False, download_video=False, download_code=True):
+        """
+        Scrapes every course, showing one aggregated progress bar.
+
+        :return: A dict mapping each failed course to its exception
+        """
+        from alive_progress import alive_bar
+        failures = {}
+        scrapers = {course: CS50Scraper(course, self.base_directory, self.debug_categories, http_client=self.http_client, **self.scraper_options) for course in self.courses}
+        # A real total once every course's structure is known from an earlier run
+        known_weeks = [scraper.structure.totals()['weeks'] for scraper in scrapers.values()]
+        with alive_bar(sum(known_weeks) if all(known_weeks) else None, title=f"Scraping {len(self.courses)} courses") as bar:
+            progress = CS50CourseProgress(bar, self.courses)
+            with ThreadPoolExecutor(max_workers=self.max_parallel_courses) as executor:
+                futures = {
+                    executor.submit(self.run_course, scrapers[course], progress.for_course(course), download_audio, download_video, download_code): course
+                    for course in self.courses
+                }
+                for future in as_completed(futures):
+                    course = futures[future]
+                    try:
+                        future.result()
+                        print(f"Completed running aide for {course}")
+                    except Exception as error:
+                        failures[course] = error
+                        print(f"Failed running aide for {course}: {error}")
+        return failures
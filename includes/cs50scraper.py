@@ -1,58 +1,282 @@
 # includes/cs50scraper.py
 from includes.cs50 import CS50
 from includes.cs50filemanager import CS50FileManager
-from alive_progress import alive_bar
+from includes.cs50http import CS50HttpClient
+from includes.cs50cache import CS50PageCache
+from includes.cs50planner import CS50DownloadPlan
+from includes.cs50parser import empty_media_links
+from includes.cs50structure import CS50CourseStructure
+from concurrent.futures import ThreadPoolExecutor, wait, FIRST_COMPLETED
 import os
+import contextlib
 
 class CS50Scraper:
-    def __init__(self, course, base_directory, debug_categories=None):
-        self.cs50 = CS50(course)
-        self.file_manager = CS50FileManager(base_directory, debug_categories)
+    def __init__(self, course, base_directory, debug_categories=None, http_client=None, workers=1, page_cache=None, incremental=False, segments=1, segment_threshold=64 * 1024 * 1024, blob_store=None, keep_archives=False, extract_workers=1, database=None, write_folders=True, search_index=None, parse_pool=None, download_scheduler=None):
+        # One pooled client serves both page fetches and file downloads
+        self.http_client = http_client or CS50HttpClient()
+        self.page_cache = page_cache or CS50PageCache(os.path.join(base_directory, ".cache", "pages"))
+        # Optional CS50ParsePool shared by the CS50 instance of every week
+        self.parse_pool = parse_pool
+        self.cs50 = CS50(course, http_client=self.http_client, page_cache=self.page_cache, parse_pool=parse_pool)
+        self.file_manager = CS50FileManager(
+            base_directory,
+            debug_categories,
+            http_client=self.http_client,
+            incremental=incremental,
+            segments=segments,
+            segment_threshold=segment_threshold,
+            blob_store=blob_store,
+            keep_archives=keep_archives,
+            extract_workers=extract_workers,
+            database=database,
+            write_folders=write_folders,
+        )
         self.debug_categories = debug_categories or []
+        self.workers = max(1, workers)
+        # Optional CS50SearchIndex updated with every week written
+        self.search_index = search_index
+        # Optional CS50DownloadScheduler shared with other courses; each course run uses its own otherwise
+        self.download_scheduler = download_scheduler
+        # Weeks and pages found by the last complete run, see CS50CourseStructure
+        self.structure = CS50CourseStructure(os.path.join(base_directory, ".cache", "structure"), self.file_manager.get_course_folder_name(course))
+        self.pages_written = 0
 
     def debug_print(self, category, message):
         if category in self.debug_categories:
             print(f"Debug ({category}): {message}")
 
-    def scrape_course(self, download_audio=False, download_video=False, download_code=True):
+    def scrape_week(self, week, download_audio, download_video, download_code, pset_pool=None, prefetch_pool=None):
+        """
+        Fetches and parses a single week: the week page, its problem set index and every problem set page.
+
+        A fresh CS50 instance is used per week because CS50 keeps the parsed records
+        as instance state, which must not be shared between worker threads.
+
+        :param week: The week number to scrape
+        :param pset_pool: Optional executor used to fetch the week's problem set pages in parallel
+        :param prefetch_pool: Optional executor fetching the problem set pages the course structure knows about alongside the week page
+        :return: A tuple of (week data, media links), or None if the week does not exist
+        """
+        metrics = self.http_client.metrics
+        cs50 = CS50(self.cs50.course, http_client=self.http_client, page_cache=self.page_cache, parse_pool=self.parse_pool)
+        known = self.structure.get(week)
+        if known and prefetch_pool:
+            cs50.prefetch(prefetch_pool, [known['pset_index_url']] + known['pset_urls'])
+        with metrics.phase('week_fetch'):
+            record = cs50.scrape_page(week)
+        if record is None:
+            return None
+
+        self.debug_print("scraping", f"Scraped week {week}")
+
+        shorts = cs50.get_shorts()
+        lectures = cs50.get_title() + "\n" + cs50.get_description() + "\n" + cs50.get_week_tags() + "\n" + shorts
+        self.debug_print("scraping", f"Lectures: {lectures}")
+
+        problem_sets = []
+        with metrics.phase('pset_fetch'):
+            pset_page = cs50.scrape_problem_set_page(week)
+        if pset_page:
+            problem_sets = cs50.get_problem_set_lists()
+
+            def fetch_pset(pset):
+                with metrics.phase('pset_fetch'):
+                    return cs50.get_problem_set_records([pset], week)
+
+            if pset_pool:
+                records_list = list(pset_pool.map(fetch_pset, problem_sets))
+            elif self.parse_pool:
+                # One pass, so each page is parsed in the pool while the next one is fetched
+                with metrics.phase('pset_fetch'):
+                    records_list = [{pset['title']: pset_record} for pset, pset_record in zip(problem_sets, cs50.get_problem_set_record_list(problem_sets, week))]
+            else:
+                records_list = [fetch_pset(pset) for pset in problem_sets]
+            for pset, pset_records in zip(problem_sets, records_list):
+                pset['data'] = "\n\n".join([pset_record['content'] for pset_record in pset_records.values()])  # Ensure 'data' key exists
+                pset['media_links'] = empty_media_links()
+                for pset_record in pset_records.values():
+                    with metrics.phase('get_media_links'):
+                        pset_media_links = cs50.get_media_links(pset_record, download_audio, download_video, download_code)
+                    for kind, links in pset_media_links.items():
+                        pset['media_links'][kind].extend(links)
+            self.debug_print("problem_sets", f"Week {week} problem sets: {[pset['title'] for pset in problem_sets]}")
+        self.structure.record_week(week, cs50.base_url + str(week) + "/", cs50.pset_url + str(week) + "/", [cs50.get_problem_set_url(pset, week) for pset in problem_sets])
+
+        with metrics.phase('get_media_links'):
+            media_links = cs50.get_media_links(record, download_audio, download_video, download_code)
+        self.debug_print("media_links", f"Extracted Media Links: {media_links}")
+
+        week_data = {
+            'url': cs50.base_url + str(week) + "/",
+            'title': cs50.title,
+            'description': cs50.description,
+            'tags': cs50.tags_text,
+            'lectures': lectures,
+            'shorts': shorts,
+            'problem_sets': problem_sets,
+            'media_links': media_links,
+        }
+
+        return week_data, media_links
+
+    def write_week(self, week, week_data, download_audio, download_video, download_code, plan):
+        """
+        Writes a finished week to disk and starts its downloads, so it no longer has to be kept in memory.
+        """
+        course_folder = self.file_manager.get_course_folder_name(self.cs50.course)
+        if self.file_manager.write_folders:
+            with self.http_client.metrics.phase('create_folders'):
+                self.file_manager.create_week_folders(course_folder, week, week_data)
+        with self.http_client.metrics.phase('save_data'):
+            self.file_manager.save_week(course_folder, week, week_data, self.cs50, download_audio, download_video, download_code, plan)
+        plan.submit_pending()
+        if self.search_index:
+            with self.http_client.metrics.phase('index_week'):
+                indexed = self.search_index.index_week(course_folder, week, self.file_manager.week_documents(course_folder, week, week_data))
+            self.debug_print("data_saving", f"Indexed {indexed} changed documents of week {week}")
+        self.pages_written += 2 + len(week_data['problem_sets'])
+        self.debug_print("data_saving", f"Wrote week {week}")
+
+    def scrape_course(self, download_audio=False, download_video=False, download_code=True, workers=None, progress=None):
+        """
+        Scrapes every week of the course, writing each week and queueing its downloads as soon as it is scraped.
+
+        If scraping fails part way, every week finished before the failure is complete on disk.
+
+        :param workers: Overrides the scraper's worker count
+        :param progress: Optional callable invoked once per scraped week; replaces the scraper's own progress bar
+        """
+        workers = max(1, workers or self.workers)
+        # Real totals once a run has found the course structure; an open-ended bar before that
+        totals = self.structure.totals()
+        self.pages_written = 0
+        plan = CS50DownloadPlan()
+
+        if not progress:
+            # Only loaded when this scraper draws its own progress bar
+            from alive_progress import alive_bar
+
+        # Every download of the course runs exactly once, after deduplication
+        try:
+            with plan.streaming(self.file_manager, workers, self.download_scheduler):
+                with contextlib.nullcontext(progress) if progress else alive_bar(totals['weeks'] or None, title="Scraping course data") as bar:
+                    advance = progress or (lambda: self.advance_progress(bar, totals, plan))
+                    if workers == 1:
+                        weeks = self.scrape_weeks_sequentially(download_audio, download_video, download_code, advance, plan)
+                    else:
+                        weeks = self.scrape_weeks_concurrently(download_audio, download_video, download_code, advance, plan, workers)
+        finally:
+            # Text files queued before a failure are still written
+            self.file_manager.flush()
+
+        self.save_structure(weeks, plan)
+
+        summary = plan.summary()
+        self.debug_print("file_download", f"Download plan: {summary}")
+        self.debug_print("file_download", f"Adaptive concurrency limits: {self.http_client.concurrency.current_limits()}")
+        linked = f"{summary['linked']} linked from the blob store, " if summary['linked'] else ""
+        if summary['renamed']:
+            print(f"Renamed {summary['renamed']} downloads whose file names were taken by another URL in the same folder")
+        print(f"Downloaded {summary['downloaded']} files, {linked}{summary['skipped']} unchanged or skipped, {summary['saved_requests']} duplicate requests avoided ({CS50DownloadPlan.format_size(summary['saved_bytes'])} saved)")
+
+    def advance_progress(self, bar, totals, plan):
+        bar()
+        if totals['pages']:
+            downloaded = sum(plan.sizes.values())
+            bar.text(f"{self.pages_written}/{totals['pages']} pages, {CS50DownloadPlan.format_size(downloaded)}/{CS50DownloadPlan.format_size(totals['bytes'])} downloaded")
+
+    def save_structure(self, weeks, plan):
+        """
+        Saves the course structure found by a complete run, with the download size of every week.
+        """
+        sizes = {}
+        for (_, destination), size in plan.sizes.items():
+            week_folder = os.path.relpath(destination, self.file_manager.base_directory).split(os.sep)[1]
+            week = int(week_folder[len("week-"):])
+            sizes[week] = sizes.get(week, 0) + (size or 0)
+        self.structure.truncate(weeks)
+        self.structure.record_sizes(sizes)
+        self.structure.save()
+
+    def scrape_weeks_sequentially(self, download_audio, download_video, download_code, bar, plan):
+        """
+        Scrapes one week at a time. When the course structure is known, one background thread
+        fetches each week's problem set pages while its week page is fetched and parsed.
+
+        :return: The number of weeks scraped
+        """
         week = 0
-        weeks_data = {}
-        total_weeks = 10
 
-        with alive_bar(total_weeks, title="Scraping course data") as bar:
+        # Idle, and without threads, until the structure names pages to fetch
+        with ThreadPoolExecutor(max_workers=1) as prefetch_pool:
             while True:
-                doc = self.cs50.scrape_page(week)
-                if doc is None:
+                result = self.scrape_week(week, download_audio, download_video, download_code, prefetch_pool=prefetch_pool)
+                if result is None:
                     break
 
-                self.debug_print("scraping", f"Scraped week {week}")
+                week_data, _ = result
+                self.write_week(week, week_data, download_audio, download_video, download_code, plan)
+
+                week = self.cs50.progress(week)
+                bar()
+
+        return week
 
-                lectures = self.cs50.get_title() + "\n" + self.cs50.get_description() + "\n" + self.cs50.get_week_tags() + "\n" + self.cs50.get_shorts()
-                self.debug_print("scraping", f"Lectures: {lectures}")
+    def scrape_weeks_concurrently(self, download_audio, download_video, download_code, bar, plan, workers):
+        """
+        Scrapes weeks with up to `workers` weeks in flight at once.
 
-                pset_doc = self.cs50.scrape_problem_set_page(week)
-                problem_sets = []
-                if pset_doc:
-                    problem_sets = self.cs50.get_problem_set_lists()
-                    for pset in problem_sets:
-                        problems = self.cs50.get_problem_set([pset], week)
-                        pset['data'] = "\n\n".join([content for title, content in problems.items()])  # Ensure 'data' key exists
+        Weeks are discovered by speculatively probing ahead of the last known week. Once a
+        week returns 404, probes past it are cancelled and any week scraped beyond it is
+        discarded, so the result matches the sequential walk. A week is only written once
+        every earlier week is known to exist, so at most `workers` scraped weeks are held
+        in memory. When the course structure is known, probing stops one week past the last
+        week found so far instead of running `workers` weeks ahead, and each week's problem
+        set pages are fetched alongside its week page.
 
-                weeks_data[week] = {
-                    'lectures': lectures,
-                    'shorts': self.cs50.get_shorts(),
-                    'problem_sets': problem_sets
-                }
+        :return: The number of weeks scraped
+        """
+        scraped = {}
+        missing_week = None
+        next_week = 0
+        committed_week = 0
+        pending = {}
+        # Highest week number worth probing; unbounded without a known structure
+        probe_limit = self.structure.week_count or None
+
+        with ThreadPoolExecutor(max_workers=workers) as week_pool, ThreadPoolExecutor(max_workers=workers) as pset_pool, ThreadPoolExecutor(max_workers=workers) as prefetch_pool:
+            while True:
+                # The window starts at the oldest unwritten week, so a slow week holds back new
+                # submissions instead of letting scraped weeks pile up behind it
+                while missing_week is None and len(pending) < workers and next_week < committed_week + workers and (probe_limit is None or next_week <= probe_limit):
+                    future = week_pool.submit(self.scrape_week, next_week, download_audio, download_video, download_code, pset_pool, prefetch_pool)
+                    pending[future] = next_week
+                    next_week += 1
 
-                media_links = self.cs50.get_media_links(str(doc), download_audio, download_video, download_code)
-                self.debug_print("media_links", f"Extracted Media Links: {media_links}")
+                if not pending:
+                    break
 
-                course_folder = self.file_manager.get_course_folder_name(self.cs50.course)
-                self.file_manager.download_relevant_files(media_links, os.path.join(self.file_manager.base_directory, course_folder, f"week-{week}", "lecture"), week)
+                done, _ = wait(pending, return_when=FIRST_COMPLETED)
+                for future in done:
+                    week = pending.pop(future)
+                    result = future.result()
+                    if result is None:
+                        if missing_week is None or week < missing_week:
+                            missing_week = week
+                            self.debug_print("scraping", f"Week {week} not found, cancelling probes past it")
+                        for other, other_week in list(pending.items()):
+                            if other_week > missing_week and other.cancel():
+                                pending.pop(other)
+                    else:
+                        scraped[week] = result
+                        if probe_limit is not None:
+                            probe_limit = max(probe_limit, week + 1)
 
-                week = self.cs50.progress(week)
-                bar()
+                # Write weeks in order
+                while committed_week in scraped and (missing_week is None or committed_week < missing_week):
+                    week_data, _ = scraped.pop(committed_week)
+                    self.write_week(committed_week, week_data, download_audio, download_video, download_code, plan)
+                    committed_week += 1
+                    bar()
 
-        course_folder = self.file_manager.get_course_folder_name(self.cs50.course)
-        self.file_manager.create_folders(course_folder, weeks_data)
-        self.file_manager.save_data(course_folder, weeks_data, self.cs50, download_audio=download_audio, download_video=download_video, download_code=download_code)
+        return committed_week
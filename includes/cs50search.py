@@ -0,0 +1,248 @@
+# includes/cs50search.py
+
+import os
+import re
+import math
+import time
+import sqlite3
+import hashlib
+import threading
+import urllib.request
+
+TOKEN_PATTERN = re.compile(r"[a-z0-9]+")
+
+STOP_WORDS = frozenset((
+    "a", "an", "and", "are", "as", "at", "be", "by", "for", "from", "in", "is", "it",
+    "of", "on", "or", "that", "the", "this", "to", "was", "will", "with", "you", "your",
+))
+
+def normalize(token):
+    # A light plural stemmer, so "tables" finds "table" and "hashes" finds "hash"
+    if len(token) > 4 and token.endswith("ies"):
+        return token[:-3] + "y"
+    if len(token) > 4 and token.endswith(("shes", "ches", "xes", "sses")):
+        return token[:-2]
+    if len(token) > 3 and token.endswith("s") and not token.endswith(("ss", "us", "is")):
+        return token[:-1]
+    return token
+
+def tokenize(text):
+    """
+    Splits text into normalised terms with their positions.
+
+    Stop words are dropped but still advance the position, so only words that are
+    really adjacent count as a phrase.
+
+    :return: A list of (term, position) tuples
+    """
+    return [
+        (normalize(match.group()), position)
+        for position, match in enumerate(TOKEN_PATTERN.finditer(text.lower()))
+        if match.group() not in STOP_WORDS
+    ]
+
+class CS50SearchIndex:
+    """
+    An on-disk inverted index over the scraped lectures and problem sets of every course.
+
+    Documents are a week's lecture metadata (title, description, tags and shorts) and each
+    problem set body. The index is an SQLite database under `<destination>/.index` with a
+    posting per (term, document) holding the term frequency and positions. Weeks are
+    re-indexed as they are scraped, and only documents whose content hash changed are
+    rewritten. Queries are ranked with BM25, plus a bonus for query words that appear
+    next to each other.
+
+    Attributes:
+        directory (str): The index directory.
+        path (str): Location of the index database.
+        read_only (bool): Whether the index was opened read-only, for queries that must not write to the mirror.
+    """
+
+    FILE_NAME = "search.db"
+    # BM25 parameters
+    K1 = 1.2
+    B = 0.75
+
+    SCHEMA = """
+        CREATE TABLE IF NOT EXISTS documents (
+            id INTEGER PRIMARY KEY,
+            course TEXT NOT NULL,
+            week INTEGER NOT NULL,
+            kind TEXT NOT NULL,
+            title TEXT,
+            url TEXT,
+            path TEXT NOT NULL UNIQUE,
+            text TEXT,
+            length INTEGER,
+            sha256 TEXT
+        );
+        CREATE INDEX IF NOT EXISTS documents_course_week ON documents (course, week);
+        CREATE TABLE IF NOT EXISTS postings (
+            term TEXT NOT NULL,
+            document INTEGER NOT NULL,
+            tf INTEGER NOT NULL,
+            positions TEXT NOT NULL,
+            PRIMARY KEY (term, document)
+        ) WITHOUT ROWID;
+        CREATE INDEX IF NOT EXISTS postings_document ON postings (document);
+    """
+
+    def __init__(self, destination, read_only=False):
+        self.directory = os.path.join(destination, ".index")
+        self.path = os.path.join(self.directory, self.FILE_NAME)
+        self.read_only = read_only
+        self.lock = threading.Lock()
+        if read_only:
+            uri = f"file:{urllib.request.pathname2url(os.path.abspath(self.path))}?mode=ro"
+            if not os.access(self.directory, os.W_OK):
+                # SQLite cannot create the WAL index next to the file, and nothing can be writing to it either
+                uri += "&immutable=1"
+            self.connection = sqlite3.connect(uri, uri=True, check_same_thread=False)
+        else:
+            os.makedirs(self.directory, exist_ok=True)
+            self.connection = sqlite3.connect(self.path, check_same_thread=False)
+            self.connection.execute("PRAGMA journal_mode=WAL")
+            self.connection.execute("PRAGMA synchronous=NORMAL")
+            self.connection.executescript(self.SCHEMA)
+
+    def index_week(self, course, week, documents):
+        """
+        Brings a week's documents up to date in one transaction.
+
+        :param course: The course folder name, e.g. cs50x
+        :param week: The week number
+        :param documents: Dicts with 'kind', 'title', 'url', 'path' and 'text' (see CS50FileManager.week_documents)
+        :return: The number of documents (re)indexed
+        """
+        indexed = 0
+        with self.lock, self.connection:
+            existing = {
+                path: (document_id, sha256)
+                for document_id, path, sha256 in self.connection.execute("SELECT id, path, sha256 FROM documents WHERE course = ? AND week = ?", (course, week))
+            }
+            for document in documents:
+                sha256 = hashlib.sha256(document['text'].encode('utf-8')).hexdigest()
+                document_id, previous_sha256 = existing.pop(document['path'], (None, None))
+                if previous_sha256 == sha256:
+                    continue
+                if document_id is not None:
+                    self.delete_document(document_id)
+                self.add_document(course, week, document, sha256)
+                indexed += 1
+            # Documents the week no longer has, e.g. a removed problem set
+            for document_id, _ in existing.values():
+                self.delete_document(document_id)
+        return indexed
+
+    def add_document(self, course, week, document, sha256):
+        # Callers hold self.lock inside a transaction
+        tokens = tokenize(document['title'] + "\n" + document['text'])
+        cursor = self.connection.execute(
+            "INSERT INTO documents (course, week, kind, title, url, path, text, length, sha256) VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?)",
+            (course, week, document['kind'], document['title'], document['url'], document['path'], document['text'], len(tokens), sha256),
+        )
+        positions = {}
+        for term, position in tokens:
+            positions.setdefault(term, []).append(position)
+        self.connection.executemany(
+            "INSERT INTO postings (term, document, tf, positions) VALUES (?, ?, ?, ?)",
+            [(term, cursor.lastrowid, len(term_positions), " ".join(map(str, term_positions))) for term, term_positions in positions.items()],
+        )
+
+    def delete_document(self, document_id):
+        self.connection.execute("DELETE FROM postings WHERE document = ?", (document_id,))
+        self.connection.execute("DELETE FROM documents WHERE id = ?", (document_id,))
+
+    def search(self, query, limit=10, courses=None):
+        """
+        Finds the documents best matching a query across every indexed course.
+
+        :param query: Free text, e.g. "hash tables"
+        :param limit: Maximum number of results
+        :param courses: Course folder names to search; every course if omitted
+        :return: A list of result dicts ('score', 'course', 'week', 'kind', 'title', 'url', 'path', 'snippet'), best first
+        """
+        terms = list(dict.fromkeys(term for term, _ in tokenize(query)))
+        if not terms:
+            return []
+
+        with self.lock:
+            count, average_length = self.connection.execute("SELECT COUNT(*), AVG(length) FROM documents").fetchone()
+            if not count:
+                return []
+            course_filter = f" AND d.course IN ({', '.join('?' * len(courses))})" if courses else ""
+            postings = {}
+            for term in terms:
+                postings[term] = self.connection.execute(
+                    "SELECT p.document, p.tf, p.positions, d.length FROM postings p JOIN documents d ON d.id = p.document WHERE p.term = ?" + course_filter,
+                    [term] + list(courses or []),
+                ).fetchall()
+
+        scores = {}
+        document_positions = {}
+        idfs = {}
+        for term, rows in postings.items():
+            idfs[term] = math.log(1 + (count - len(rows) + 0.5) / (len(rows) + 0.5))
+            for document_id, tf, positions, length in rows:
+                norm = tf + self.K1 * (1 - self.B + self.B * length / (average_length or 1))
+                scores[document_id] = scores.get(document_id, 0.0) + idfs[term] * tf * (self.K1 + 1) / norm
+                document_positions.setdefault(document_id, {})[term] = set(map(int, positions.split()))
+
+        # Query words that appear next to each other in the document, in query order
+        for document_id, positions in document_positions.items():
+            for first, second in zip(terms, terms[1:]):
+                if first in positions and second in positions and any(position + 1 in positions[second] for position in positions[first]):
+                    scores[document_id] += (idfs[first] + idfs[second]) / 2
+
+        best = sorted(scores.items(), key=lambda item: -item[1])[:limit]
+        if not best:
+            return []
+        with self.lock:
+            rows = {
+                row[0]: row[1:]
+                for row in self.connection.execute(
+                    f"SELECT id, course, week, kind, title, url, path, text FROM documents WHERE id IN ({', '.join('?' * len(best))})",
+                    [document_id for document_id, _ in best],
+                )
+            }
+        results = []
+        for document_id, score in best:
+            course, week, kind, title, url, path, text = rows[document_id]
+            results.append({
+                'score': score,
+                'course': course,
+                'week': week,
+                'kind': kind,
+                'title': title,
+                'url': url,
+                'path': path,
+                'snippet': self.snippet(text, set(terms)),
+            })
+        return results
+
+    @staticmethod
+    def snippet(text, terms, width=160):
+        # Centres the snippet on the first matching word of the text
+        for match in TOKEN_PATTERN.finditer(text.lower()):
+            if normalize(match.group()) in terms:
+                start = max(0, match.start() - width // 3)
+                break
+        else:
+            start = 0
+        snippet = " ".join(text[start:start + width].split())
+        return ("..." if start else "") + snippet + ("..." if start + width < len(text) else "")
+
+    def print_results(self, query, limit=10, courses=None):
+        started = time.perf_counter()
+        results = self.search(query, limit, courses)
+        elapsed = (time.perf_counter() - started) * 1000
+        print(f"{len(results)} results for \"{query}\" in {elapsed:.1f} ms")
+        for rank, result in enumerate(results, 1):
+            print(f"{rank:>2}. {result['course']} week {result['week']} {result['kind']}: {result['title']} (score {result['score']:.2f})")
+            print(f"    {result['path']}")
+            print(f"    {result['snippet']}")
+        return results
+
+    def close(self):
+        with self.lock:
+            self.connection.close()
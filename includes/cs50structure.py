@@ -0,0 +1,89 @@
+# includes/cs50structure.py
+
+import os
+import json
+import threading
+
+class CS50CourseStructure:
+    """
+    The structure of a course as found by the last complete run: its weeks and, per week,
+    the week page, problem set index and problem set page URLs and the bytes of its downloads.
+
+    Stored as `<destination>/.cache/structure/<course folder>.json`. The structure is only a
+    hint: every page is still fetched (with conditional requests through the page cache), and
+    the structure is corrected and saved with what each complete run found. It lets the
+    scraper fetch a week's problem set pages alongside its week page, stop probing for new
+    weeks right after the last known one, and show real progress totals.
+
+    Attributes:
+        path (str): Location of the structure file.
+        weeks (dict): Per week number, a dict with 'url', 'pset_index_url', 'pset_urls' and 'bytes'.
+    """
+
+    def __init__(self, cache_directory, course_folder):
+        self.directory = cache_directory
+        self.path = os.path.join(cache_directory, f"{course_folder}.json")
+        self.lock = threading.Lock()
+        self.weeks = {}
+        try:
+            with open(self.path, 'r') as file:
+                self.weeks = {int(week): entry for week, entry in json.load(file)['weeks'].items()}
+        except (OSError, ValueError, KeyError):
+            self.weeks = {}
+
+    @property
+    def week_count(self):
+        # Weeks are numbered from 0 without gaps
+        count = 0
+        while count in self.weeks:
+            count += 1
+        return count
+
+    def get(self, week):
+        with self.lock:
+            return self.weeks.get(week)
+
+    def record_week(self, week, url, pset_index_url, pset_urls):
+        """
+        Records the pages a week was found to have, keeping its download size from earlier runs.
+        """
+        with self.lock:
+            entry = self.weeks.setdefault(week, {'bytes': 0})
+            entry.update({'url': url, 'pset_index_url': pset_index_url, 'pset_urls': list(pset_urls)})
+
+    def record_sizes(self, sizes):
+        """
+        Records the download size of each week from a finished download plan.
+
+        :param sizes: Bytes per week number
+        """
+        with self.lock:
+            for week, size in sizes.items():
+                if week in self.weeks:
+                    self.weeks[week]['bytes'] = size
+
+    def truncate(self, week_count):
+        # Weeks from week_count on no longer exist
+        with self.lock:
+            for week in [week for week in self.weeks if week >= week_count]:
+                del self.weeks[week]
+
+    def totals(self):
+        """
+        :return: A dict with the number of known 'weeks', their 'pages' (week, problem set index and problem set pages) and download 'bytes'
+        """
+        with self.lock:
+            weeks = [self.weeks[week] for week in range(self.week_count)]
+        return {
+            'weeks': len(weeks),
+            'pages': sum(2 + len(entry['pset_urls']) for entry in weeks),
+            'bytes': sum(entry['bytes'] for entry in weeks),
+        }
+
+    def save(self):
+        os.makedirs(self.directory, exist_ok=True)
+        temp_path = self.path + ".tmp"
+        with self.lock:
+            with open(temp_path, 'w') as file:
+                json.dump({'weeks': self.weeks}, file, indent=1, sort_keys=True)
+        os.replace(temp_path, self.path)
@@ -0,0 +1,223 @@
+# includes/cs50watch.py
+
+import os
+import json
+import time
+import hashlib
+import threading
+from concurrent.futures import ThreadPoolExecutor
+from includes.cs50scraper import CS50Scraper
+from includes.cs50planner import CS50DownloadPlan
+
+class CS50Watcher:
+    """
+    Keeps the output of several courses mirrored in one long-running process.
+
+    One CS50Scraper per course is created once and kept, so the connection pool, adaptive
+    limits and page cache stay warm between cycles. Each cycle polls every known week page
+    and problem set index page (plus one week past the last) with conditional requests. Only
+    weeks whose pages changed are scraped again, written and downloaded, incrementally.
+
+    Between cycles only a digest of each week's pages and the names of its problem sets and
+    media files are kept, in memory and in `<destination>/.watch/state.json`, so a restarted
+    watcher picks up where it stopped. Each cycle appends a change report to
+    `<destination>/.watch/changes.jsonl`.
+
+    Attributes:
+        courses (list): Course identifiers to watch.
+        base_directory (str): Destination folder for all courses.
+        interval (float): Seconds from the start of one cycle to the start of the next.
+        weeks (dict): Per course folder, the state of every known week keyed by week number.
+    """
+
+    def __init__(self, courses, base_directory, debug_categories=None, http_client=None, interval=3600, **scraper_options):
+        self.courses = courses
+        self.base_directory = base_directory
+        self.debug_categories = debug_categories or []
+        self.http_client = http_client
+        self.interval = interval
+        # Unchanged files are never rewritten or downloaded again
+        scraper_options['incremental'] = True
+        self.scrapers = {course: CS50Scraper(course, base_directory, self.debug_categories, http_client=http_client, **scraper_options) for course in courses}
+        self.directory = os.path.join(base_directory, ".watch")
+        self.state_path = os.path.join(self.directory, "state.json")
+        self.report_path = os.path.join(self.directory, "changes.jsonl")
+        self.weeks = self.load_state()
+        self.stopped = threading.Event()
+
+    def debug_print(self, category, message):
+        if category in self.debug_categories:
+            print(f"Debug ({category}): {message}")
+
+    def load_state(self):
+        if not os.path.exists(self.state_path):
+            return {}
+        with open(self.state_path) as file:
+            state = json.load(file)
+        return {course: {int(week): week_state for week, week_state in weeks.items()} for course, weeks in state.items()}
+
+    def save_state(self):
+        os.makedirs(self.directory, exist_ok=True)
+        temp_path = self.state_path + ".tmp"
+        with open(temp_path, 'w') as file:
+            json.dump(self.weeks, file, indent=1, sort_keys=True)
+        os.replace(temp_path, self.state_path)
+
+    def poll_week(self, scraper, week):
+        """
+        Revalidates a week page and its problem set index page.
+
+        :return: A digest of both pages, or None if the week does not exist
+        """
+        cs50 = scraper.cs50
+        week_page = cs50.fetch_page(cs50.base_url + str(week) + "/")
+        if week_page.status_code == 404:
+            return None
+        pset_page = cs50.fetch_page(cs50.pset_url + str(week) + "/")
+        digest = hashlib.sha256()
+        for page in (week_page, pset_page):
+            digest.update(f"{page.status_code}\n".encode())
+            digest.update(page.text.encode('utf-8'))
+        return digest.hexdigest()
+
+    def poll_course(self, scraper, known_weeks):
+        """
+        Polls the known weeks plus one past them, and further weeks while new ones keep appearing.
+
+        :return: A dict of page digests for every existing week
+        """
+        digests = {}
+        week = 0
+        with ThreadPoolExecutor(max_workers=scraper.workers) as pool:
+            while True:
+                batch = list(range(week, max(week, known_weeks) + 1))
+                for week, digest in zip(batch, pool.map(lambda week: self.poll_week(scraper, week), batch)):
+                    if digest is None:
+                        return digests
+                    digests[week] = digest
+                week += 1
+
+    @staticmethod
+    def summarize(week_data):
+        media = set()
+        for links in week_data['media_links'].values():
+            media.update(links)
+        for problem_set in week_data['problem_sets']:
+            for links in problem_set['media_links'].values():
+                media.update(links)
+        return {
+            'problem_sets': sorted(problem_set['title'] for problem_set in week_data['problem_sets']),
+            'media': sorted(media),
+        }
+
+    def sync_course(self, course, download_audio, download_video, download_code):
+        """
+        Brings one course up to date, scraping only the weeks whose pages changed.
+
+        :return: A change report dict for the course
+        """
+        scraper = self.scrapers[course]
+        course_folder = scraper.file_manager.get_course_folder_name(course)
+        known = self.weeks.setdefault(course_folder, {})
+        digests = self.poll_course(scraper, len(known))
+        changes = {'weeks': len(digests), 'changed_weeks': [], 'new_weeks': [], 'removed_weeks': [], 'new_problem_sets': [], 'new_media': []}
+
+        plan = CS50DownloadPlan()
+        try:
+            with plan.streaming(scraper.file_manager, scraper.workers, scraper.download_scheduler):
+                for week, digest in sorted(digests.items()):
+                    previous = known.get(week)
+                    if previous and previous['digest'] == digest:
+                        continue
+                    result = scraper.scrape_week(week, download_audio, download_video, download_code)
+                    if result is None:
+                        continue
+                    week_data, _ = result
+                    scraper.write_week(week, week_data, download_audio, download_video, download_code, plan)
+                    summary = self.summarize(week_data)
+                    if previous:
+                        changes['changed_weeks'].append(week)
+                        changes['new_problem_sets'] += [{'week': week, 'title': title} for title in summary['problem_sets'] if title not in previous['problem_sets']]
+                        changes['new_media'] += [{'week': week, 'url': url} for url in summary['media'] if url not in previous['media']]
+                    else:
+                        changes['new_weeks'].append(week)
+                    known[week] = dict(summary, digest=digest)
+                    self.debug_print("scraping", f"Updated {course_folder} week {week}")
+        finally:
+            scraper.file_manager.flush()
+
+        for week in [week for week in known if week not in digests]:
+            changes['removed_weeks'].append(week)
+            del known[week]
+        # Files of the updated weeks, revalidated or downloaded
+        summary = plan.summary()
+        changes['files'] = summary['unique']
+        changes['downloaded_files'] = summary['downloaded']
+        return changes
+
+    def run_cycle(self, download_audio, download_video, download_code):
+        """
+        Syncs every course once and records the change report.
+
+        A failing course is reported but does not stop the others.
+
+        :return: The report dict
+        """
+        started = time.time()
+        report = {'started': time.strftime('%Y-%m-%dT%H:%M:%S', time.localtime(started)), 'courses': {}}
+        # Files fetched in an earlier cycle may have changed on the server since
+        for blob_store in {scraper.file_manager.blob_store for scraper in self.scrapers.values()} - {None}:
+            blob_store.clear_fresh()
+        for course in self.courses:
+            try:
+                report['courses'][course] = self.sync_course(course, download_audio, download_video, download_code)
+            except Exception as error:
+                report['courses'][course] = {'error': str(error)}
+        report['duration'] = round(time.time() - started, 3)
+        self.save_state()
+        with open(self.report_path, 'a') as file:
+            file.write(json.dumps(report) + "\n")
+        self.print_report(report)
+        return report
+
+    @staticmethod
+    def print_report(report):
+        print(f"Sync at {report['started']} took {report['duration']:.1f}s")
+        for course, changes in report['courses'].items():
+            if 'error' in changes:
+                print(f"  {course}: failed: {changes['error']}")
+                continue
+            if not (changes['new_weeks'] or changes['changed_weeks'] or changes['removed_weeks']):
+                print(f"  {course}: no changes in {changes['weeks']} weeks")
+                continue
+            parts = []
+            if changes['new_weeks']:
+                parts.append(f"new weeks {changes['new_weeks']}")
+            if changes['changed_weeks']:
+                parts.append(f"changed weeks {changes['changed_weeks']}")
+            if changes['removed_weeks']:
+                parts.append(f"removed weeks {changes['removed_weeks']}")
+            parts.append(f"{len(changes['new_problem_sets'])} new problem sets, {len(changes['new_media'])} new media files, {changes['files']} files synced ({changes['downloaded_files']} downloaded)")
+            print(f"  {course}: " + ", ".join(parts))
+            for problem_set in changes['new_problem_sets']:
+                print(f"    week {problem_set['week']} problem set: {problem_set['title']}")
+            for media in changes['new_media']:
+                print(f"    week {media['week']} media: {media['url']}")
+
+    def run(self, download_audio=False, download_video=False, download_code=True, cycles=None):
+        """
+        Runs sync cycles every `interval` seconds until `stop` is called or the process is interrupted.
+
+        :param cycles: Stop after this many cycles; run until stopped if omitted
+        """
+        cycle = 0
+        while not self.stopped.is_set():
+            started = time.monotonic()
+            self.run_cycle(download_audio, download_video, download_code)
+            cycle += 1
+            if cycles is not None and cycle >= cycles:
+                break
+            self.stopped.wait(max(0, self.interval - (time.monotonic() - started)))
+
+    def stop(self):
+        self.stopped.set()
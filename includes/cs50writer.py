@@ -0,0 +1,107 @@
+# includes/cs50writer.py
+
+import os
+import queue
+import threading
+
+class CS50OutputWriter:
+    """
+    Write-behind output for the scraped text files.
+
+    Writes are queued and run in order on one background thread, so scraping never waits
+    for the disk. Each write goes to a temporary file in the target folder that is renamed
+    over the target, so readers (and sync tools watching the mirror) never see a partly
+    written file. Directories are created once per run: the writer remembers every folder
+    it created and only calls `os.makedirs` for the deepest new ones.
+
+    Attributes:
+        directories (set): Folders known to exist.
+    """
+
+    # Writes waiting at most; submitting more blocks, which bounds the memory held by the queue
+    MAX_PENDING = 256
+
+    def __init__(self):
+        self.directories = set()
+        self.directories_lock = threading.Lock()
+        self.queue = queue.Queue(maxsize=self.MAX_PENDING)
+        self.thread = None
+        self.thread_lock = threading.Lock()
+        self.error = None
+
+    def create_directories(self, directories):
+        """
+        Creates a set of folders in one pass, skipping those already created.
+
+        :param directories: Folder paths; parents do not need to be listed
+        :return: The folders that were new, in sorted order
+        """
+        with self.directories_lock:
+            new = sorted(set(directories) - self.directories)
+            # Creating the deepest folders creates their parents as well
+            for index, directory in enumerate(new):
+                if index + 1 < len(new) and new[index + 1].startswith(directory + os.sep):
+                    continue
+                os.makedirs(directory, exist_ok=True)
+            for directory in new:
+                while directory and directory not in self.directories:
+                    self.directories.add(directory)
+                    directory = os.path.dirname(directory)
+        return new
+
+    def submit(self, function, *args):
+        """
+        Queues a call to run on the writer thread, after every call queued before it.
+        """
+        with self.thread_lock:
+            if self.thread is None:
+                self.thread = threading.Thread(target=self.run, name="CS50OutputWriter", daemon=True)
+                self.thread.start()
+        self.queue.put((function, args))
+
+    def run(self):
+        while True:
+            function, args = self.queue.get()
+            try:
+                function(*args)
+            except Exception as error:
+                # Reported by the next flush; later writes still run
+                if self.error is None:
+                    self.error = error
+            finally:
+                self.queue.task_done()
+
+    def flush(self):
+        """
+        Waits until every queued write is on disk.
+
+        :raises Exception: The first error raised by a queued write since the last flush
+        """
+        self.queue.join()
+        error, self.error = self.error, None
+        if error is not None:
+            raise error
+
+    @staticmethod
+    def matches(file_name, data):
+        """
+        Checks whether a file on disk already holds exactly data.
+        """
+        try:
+            if os.path.getsize(file_name) != len(data):
+                return False
+            with open(file_name, 'rb') as file:
+                return file.read() == data
+        except OSError:
+            return False
+
+    @staticmethod
+    def write_atomic(file_name, data):
+        """
+        Writes data to a temporary file next to file_name and renames it over file_name.
+        """
+        # Only the writer thread writes, so one fixed temporary name per file is enough
+        temp_path = file_name + ".tmp"
+        with open(temp_path, 'wb') as file:
+            file.write(data)
+        os.replace(temp_path, file_name)
@@ -1,23 +1,131 @@
 # main.py
-from includes.cs50scraper import CS50Scraper
+# Only the argument parser is imported up front. Everything else is imported on the path that
+# uses it, so -h, -search and -export never load requests, bs4, inquirer or alive_progress.
 from includes.cs50commandline import CommandLine
-from includes.cs50interface import Interface
-from includes.cs50 import CS50
+import contextlib
+import os
 import sys
 
 def main():
-    course_manager = CS50()  # Initialize CS50 without course to access course info methods
-
     # Check if any command-line arguments are provided
     if len(sys.argv) > 1:
         cli = CommandLine()
         args = cli.parse_arguments()
-        debug_categories = args.debug_categories.split(',') if args.debug else []
-        scraper = CS50Scraper(course=args.course, base_directory=args.destination, debug_categories=debug_categories)
-        scraper.scrape_course(download_audio=args.audio, download_video=args.video, download_code=args.code)
+        run_command_line(args)
     else:
+        from includes.cs50 import CS50
+        from includes.cs50interface import Interface
+        course_manager = CS50()  # Initialize CS50 without course to access course info methods
         interface = Interface(course_manager)  # Pass CS50 instance to Interface
         interface.display_menu()
 
+def run_command_line(args):
+    from includes.cs50 import CS50
+    course_manager = CS50()  # Initialize CS50 without course to access course info methods
+    debug_categories = args.debug_categories.split(',') if args.debug else []
+
+    if args.search:
+        from includes.cs50search import CS50SearchIndex
+        if not os.path.exists(os.path.join(args.destination, ".index", CS50SearchIndex.FILE_NAME)):
+            print(f"No search index in {args.destination}, scrape a course first")
+            return
+        search_index = CS50SearchIndex(args.destination, read_only=True)
+        courses = [course_manager.get_course_folder_name(course) for course in course_manager.parse_course_list(args.course)] if args.course else None
+        search_index.print_results(args.search, limit=args.results, courses=courses)
+        search_index.close()
+        return
+
+    courses = course_manager.parse_course_list(args.course)
+    if args.export:
+        from includes.cs50database import CS50Database
+        from includes.cs50filemanager import CS50FileManager
+        database = CS50Database(args.destination)
+        exported = CS50FileManager(args.destination, debug_categories, database=database, incremental=args.incremental).export_database(courses)
+        database.close()
+        print(f"Exported {exported} weeks from {database.path}")
+        return
+
+    from includes.cs50scraper import CS50Scraper
+    from includes.cs50scheduler import CS50CourseScheduler
+    from includes.cs50http import CS50HttpClient
+    from includes.cs50cache import CS50PageCache
+    from includes.cs50blobstore import CS50BlobStore
+    from includes.cs50metrics import CS50Metrics
+    from includes.cs50database import CS50Database
+    from includes.cs50search import CS50SearchIndex
+    from includes.cs50planner import CS50DownloadScheduler
+
+    recorder = None
+    if args.record:
+        from includes.cs50fixtures import CS50FixtureRecorder
+        recorder = CS50FixtureRecorder(args.record)
+        # Only full responses are recorded, so bypass the page cache, skipping and byte-range downloads
+        args.refresh = True
+        args.incremental = False
+        args.segments = 1
+    # A dry run uses cached pages but must not write to the destination
+    page_cache = CS50PageCache(os.path.join(args.destination, ".cache", "pages"), max_size=args.cache_size * 1024 * 1024, refresh=args.refresh, read_only=args.plan)
+    bandwidth_limit = args.bandwidth_limit * 1024 if args.bandwidth_limit else None
+    bulk_bandwidth_limit = args.bulk_bandwidth_limit * 1024 if args.bulk_bandwidth_limit else None
+    metrics = CS50Metrics(enabled=args.metrics)
+    database = None
+    if args.output != 'folders' and not (args.plan and not os.path.exists(os.path.join(args.destination, CS50Database.FILE_NAME))):
+        database = CS50Database(args.destination, read_only=args.plan)
+    scraper_options = {
+        'workers': args.workers,
+        'page_cache': page_cache,
+        'incremental': args.incremental,
+        'segments': args.segments,
+        'segment_threshold': args.segment_threshold * 1024 * 1024,
+        'blob_store': CS50BlobStore(os.path.join(args.destination, ".blobs")) if args.dedupe and not args.plan else None,
+        'keep_archives': args.keep_archives,
+        'extract_workers': args.extract_workers,
+        'database': database,
+        'write_folders': args.output != 'sqlite',
+        'search_index': CS50SearchIndex(args.destination) if not args.no_index and not args.plan else None,
+        'parse_pool': None,
+        # One priority queue for the downloads of every course, with the threads they used to get separately
+        'download_scheduler': CS50DownloadScheduler(args.workers * len(courses)) if not args.plan else None,
+    }
+    if args.parse_processes > 0:
+        from includes.cs50parsepool import CS50ParsePool
+        scraper_options['parse_pool'] = CS50ParsePool(args.parse_processes)
+    profiler = contextlib.nullcontext()
+    if args.profile:
+        from includes.cs50profiler import CS50Profiler
+        profiler = CS50Profiler(args.destination)
+    with CS50HttpClient(pool_size=args.pool_size, timeout=args.timeout, retries=args.retries, max_connections=args.max_connections, bandwidth_limit=bandwidth_limit, replay_url=args.replay, recorder=recorder,
+                        max_page_requests=args.max_page_requests, max_media_requests=args.max_media_requests, debug_categories=debug_categories, metrics=metrics, bulk_bandwidth_limit=bulk_bandwidth_limit) as http_client:
+        try:
+            with profiler:
+                if args.plan:
+                    from includes.cs50dryrun import CS50DryRun
+                    dry_run = CS50DryRun(courses, args.destination, debug_categories, http_client=http_client, page_cache=page_cache, workers=args.workers, keep_archives=args.keep_archives, dedupe=args.dedupe, database=database, parse_pool=scraper_options['parse_pool'])
+                    dry_run.run(download_audio=args.audio, download_video=args.video, download_code=args.code)
+                elif args.watch:
+                    from includes.cs50watch import CS50Watcher
+                    watcher = CS50Watcher(courses, args.destination, debug_categories, http_client=http_client, interval=args.watch_interval * 60, **scraper_options)
+                    try:
+                        watcher.run(download_audio=args.audio, download_video=args.video, download_code=args.code)
+                    except KeyboardInterrupt:
+                        print("Stopped watching")
+                elif len(courses) == 1:
+                    scraper = CS50Scraper(course=courses[0], base_directory=args.destination, debug_categories=debug_categories, http_client=http_client, **scraper_options)
+                    scraper.scrape_course(download_audio=args.audio, download_video=args.video, download_code=args.code)
+                else:
+                    scheduler = CS50CourseScheduler(courses, args.destination, debug_categories, http_client=http_client, **scraper_options)
+                    scheduler.run(download_audio=args.audio, download_video=args.video, download_code=args.code)
+        finally:
+            # Also report runs that failed part way
+            metrics.finish(args.destination)
+            if database:
+                database.close()
+            if scraper_options['search_index']:
+                scraper_options['search_index'].close()
+            if scraper_options['parse_pool']:
+                scraper_options['parse_pool'].close()
+            if scraper_options['download_scheduler']:
+                scraper_options['download_scheduler'].close()
+
 if __name__ == "__main__":
     main()
@@ -0,0 +1,44 @@
+# tests/conftest.py
+
+import pytest
+
+from includes.cs50http import CS50HttpClient
+from includes.cs50metrics import CS50Metrics
+from includes.cs50fixtures import CS50FixtureServer
+
+from corpus import write_corpus
+
+@pytest.fixture
+def fixture_server(tmp_path):
+    """
+    Starts a CS50FixtureServer on a free port for a corpus of responses; stopped after the test.
+    """
+    servers = []
+
+    def start(responses, **options):
+        corpus = write_corpus(str(tmp_path / f"corpus{len(servers)}"), responses)
+        server = CS50FixtureServer(corpus, **options)
+        server.start()
+        servers.append(server)
+        return server
+
+    yield start
+    for server in servers:
+        server.stop()
+
+@pytest.fixture
+def http_client_for():
+    """
+    Creates CS50HttpClients replaying from a fixture server, each with its own metrics.
+    """
+    clients = []
+
+    def create(server, **options):
+        options.setdefault('backoff_factor', 0)
+        client = CS50HttpClient(replay_url=server.url, metrics=CS50Metrics(enabled=True), **options)
+        clients.append(client)
+        return client
+
+    yield create
+    for client in clients:
+        client.close()
@@ -0,0 +1,95 @@
+# tests/corpus.py
+
+import io
+import os
+import json
+import hashlib
+import zipfile
+
+from includes.cs50 import CS50
+from includes.cs50scraper import CS50Scraper
+from includes.cs50fixtures import INDEX_FILE_NAME, BODIES_DIRECTORY
+
+COURSE = "sql"
+WEEK_URL = CS50(COURSE).base_url
+PSET_URL = CS50(COURSE).pset_url
+MEDIA_URL = "https://cdn.cs50.net/sql/2024/"
+
+def week_page(week, media_links, shorts=("Short A", "Short B")):
+    links = "".join(f'<li><a href="{url}">{os.path.basename(url)}</a></li>' for url in media_links)
+    short_links = "".join(f'<li><a href="/shorts/{index}/">{title}</a></li>' for index, title in enumerate(shorts))
+    return (
+        f'<html><head><meta property="og:title" content="Lecture {week}"><meta property="og:description" content="Description {week}"></head>'
+        f'<body><main class="col-lg"><h1>Lecture {week}</h1><p>tag{week}, sql</p><ul>{links}</ul>'
+        f'<h2>Shorts</h2><ol>{short_links}</ol></main></body></html>'
+    )
+
+def pset_index_page(slugs):
+    items = "".join(f'<li><a href="{slug}/">Problem {slug}</a> <a href="/submit/">Submit</a></li>' for slug in slugs)
+    return f'<html><body><main class="col-lg"><ul>{items}</ul></main></body></html>'
+
+def pset_page(slug, media_links=()):
+    links = "".join(f'<a href="{url}">{os.path.basename(url)}</a>' for url in media_links)
+    return f'<html><body><main class="col-lg"><h1>Problem {slug}</h1><p>Write queries for {slug}.</p>{links}</main></body></html>'
+
+def zip_body(files):
+    buffer = io.BytesIO()
+    with zipfile.ZipFile(buffer, 'w') as archive:
+        for name, content in files.items():
+            archive.writestr(name, content)
+    return buffer.getvalue()
+
+def write_corpus(directory, responses):
+    """
+    Writes a corpus CS50FixtureServer can serve.
+
+    :param directory: The corpus directory
+    :param responses: Bodies (str or bytes) keyed by original URL; every URL answers 200
+    """
+    os.makedirs(os.path.join(directory, BODIES_DIRECTORY), exist_ok=True)
+    index = {}
+    for url, body in responses.items():
+        if isinstance(body, str):
+            body = body.encode()
+        name = hashlib.sha256(body).hexdigest()
+        with open(os.path.join(directory, BODIES_DIRECTORY, name), 'wb') as file:
+            file.write(body)
+        index[url] = {'status': 200, 'content_type': None, 'body': name}
+    with open(os.path.join(directory, INDEX_FILE_NAME), 'w') as file:
+        json.dump(index, file)
+    return directory
+
+def scripted_errors(server, errors):
+    """
+    Replaces the server's random error injection with a fixed sequence; no errors once it runs out.
+
+    The server asks once per response whether to answer 503, then once more for bodies over
+    CHUNK_SIZE whether to drop the connection half way.
+    """
+    errors = iter(errors)
+    server.inject_error = lambda: next(errors, False)
+
+def course_responses(media):
+    """
+    Builds the pages of a small sql course, one week per entry of media.
+
+    :param media: Per week, bodies keyed by media URL; every week also gets one problem set
+    :return: Bodies keyed by URL, for write_corpus
+    """
+    responses = {}
+    for week, files in enumerate(media):
+        responses[f"{WEEK_URL}{week}/"] = week_page(week, list(files))
+        responses[f"{PSET_URL}{week}/"] = pset_index_page([f"p{week}"])
+        responses[f"{PSET_URL}{week}/p{week}/"] = pset_page(f"p{week}")
+        responses.update(files)
+    return responses
+
+def scrape(destination, http_client, **options):
+    """
+    Runs one sync of the sql course from a fixture server, with code and audio downloads.
+
+    :return: The counters of the run's metrics
+    """
+    scraper = CS50Scraper(COURSE, str(destination), http_client=http_client, **options)
+    scraper.scrape_course(download_audio=True, download_code=True, progress=lambda: None)
+    return http_client.metrics.counters
@@ -0,0 +1,49 @@
+# tests/test_archive.py
+
+import os
+
+import pytest
+
+from includes.cs50archive import member_path, extract_archive
+
+from corpus import MEDIA_URL, course_responses, zip_body, scrape
+
+UNSAFE_NAMES = ["../escaped.sql", "src/../../escaped.sql", "/tmp/absolute.sql", "..\\escaped.sql", "src\\..\\..\\escaped.sql", "C:/escaped.sql", "C:escaped.sql", ".", "src/.."]
+
+@pytest.mark.parametrize("name", UNSAFE_NAMES)
+def test_member_path_rejects_names_outside_the_folder(tmp_path, name):
+    assert member_path(str(tmp_path / "example_code"), name) is None
+
+@pytest.mark.parametrize("name, expected", [
+    ("hello.sql", "hello.sql"),
+    ("src/hello.sql", os.path.join("src", "hello.sql")),
+    ("src\\hello.sql", os.path.join("src", "hello.sql")),
+    ("src/../hello.sql", "hello.sql"),
+])
+def test_member_path_keeps_names_inside_the_folder(tmp_path, name, expected):
+    extract_to = tmp_path / "example_code"
+    assert member_path(str(extract_to), name) == os.path.join(os.path.realpath(extract_to), expected)
+
+def test_extract_archive_skips_unsafe_members(tmp_path):
+    zip_path = tmp_path / "src.zip"
+    zip_path.write_bytes(zip_body({"src/hello.sql": "SELECT 1;", "../escaped.sql": "DROP TABLE x;", "/tmp/absolute.sql": "DROP TABLE y;"}))
+    extract_to = tmp_path / "out" / "example_code"
+
+    extracted, skipped = extract_archive(str(zip_path), str(extract_to), workers=2)
+
+    assert extracted == ["src/hello.sql"]
+    assert sorted(skipped) == ["../escaped.sql", "/tmp/absolute.sql"]
+    assert (extract_to / "src" / "hello.sql").read_text() == "SELECT 1;"
+    assert not (tmp_path / "out" / "escaped.sql").exists()
+
+def test_served_archive_cannot_write_outside_its_folder(tmp_path, fixture_server, http_client_for):
+    archive = zip_body({"src0/hello.sql": "SELECT 0;", "../../escaped.sql": "DROP TABLE x;", "..\\..\\windows.sql": "DROP TABLE y;"})
+    server = fixture_server(course_responses([{f"{MEDIA_URL}src0.zip": archive}]))
+    destination = tmp_path / "out"
+
+    scrape(destination, http_client_for(server))
+
+    lecture = destination / "cs50sql" / "week-0" / "lecture"
+    assert (lecture / "example_code" / "src0" / "hello.sql").read_text() == "SELECT 0;"
+    written = {path.name for path in destination.rglob("*.sql")}
+    assert written == {"hello.sql"}
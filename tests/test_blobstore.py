@@ -0,0 +1,84 @@
+# tests/test_blobstore.py
+
+import os
+
+from includes.cs50blobstore import CS50BlobStore
+
+from corpus import MEDIA_URL, course_responses, zip_body, scrape
+
+MEDIA = [
+    {
+        f"{MEDIA_URL}w0.mp3": b"audio 0" * 1000,
+        f"{MEDIA_URL}src0.zip": zip_body({"src0/hello.sql": "SELECT 0;"}),
+        f"{MEDIA_URL}notes0.pdf": b"%PDF shared notes",
+    },
+    {
+        # Same content as notes0.pdf under another URL
+        f"{MEDIA_URL}notes1.pdf": b"%PDF shared notes",
+    },
+]
+MEDIA_COUNT = sum(len(files) for files in MEDIA)
+
+def stored_objects(store):
+    return [os.path.join(directory, name) for directory, _, names in os.walk(store.objects_directory) for name in names]
+
+def test_files_from_the_store_are_counted_as_linked(tmp_path, fixture_server, http_client_for, capsys):
+    server = fixture_server(course_responses(MEDIA))
+    destination = tmp_path / "out"
+    blob_root = str(destination / ".blobs")
+
+    first = scrape(destination, http_client_for(server), blob_store=CS50BlobStore(blob_root))
+    assert first['files_downloaded'] == MEDIA_COUNT
+    assert 'files_linked' not in first
+    # The two identical PDFs share one object
+    assert len(stored_objects(CS50BlobStore(blob_root))) == MEDIA_COUNT - 1
+    capsys.readouterr()
+
+    # A later run revalidates every URL the store holds and links it instead of downloading it
+    http_client = http_client_for(server)
+    second = scrape(destination, http_client, blob_store=CS50BlobStore(blob_root))
+    assert second['files_linked'] == MEDIA_COUNT
+    assert 'files_downloaded' not in second
+    assert 'bytes_downloaded' not in second
+    assert second['status_304'] >= MEDIA_COUNT
+    # The archive is unchanged, so it is not extracted again
+    assert 'extract_zip' not in http_client.metrics.phases
+    assert f"Downloaded 0 files, {MEDIA_COUNT} linked from the blob store, 0 unchanged or skipped" in capsys.readouterr().out
+
+    lecture = destination / "cs50sql" / "week-0" / "lecture"
+    assert (lecture / "example_code" / "src0" / "hello.sql").read_text() == "SELECT 0;"
+    assert not (lecture / "src0.zip").exists()
+    store = CS50BlobStore(blob_root)
+    notes = store.object_path(store.index[f"{MEDIA_URL}notes0.pdf"]['sha256'])
+    assert os.path.samefile(lecture / "notes0.pdf", notes)
+    assert os.path.samefile(destination / "cs50sql" / "week-1" / "lecture" / "notes1.pdf", notes)
+    assert not list(destination.rglob("*.link"))
+
+def test_urls_stored_in_the_same_run_are_linked_without_requests(tmp_path, fixture_server, http_client_for):
+    server = fixture_server(course_responses(MEDIA))
+    store = CS50BlobStore(str(tmp_path / ".blobs"))
+    scrape(tmp_path / "first", http_client_for(server), blob_store=store)
+
+    http_client = http_client_for(server)
+    counters = scrape(tmp_path / "second", http_client, blob_store=store)
+
+    assert counters['files_linked'] == MEDIA_COUNT
+    assert 'files_downloaded' not in counters
+    media_requests = [url for url in http_client.metrics.urls if url.startswith(MEDIA_URL)]
+    assert media_requests == []
+    assert (tmp_path / "second" / "cs50sql" / "week-1" / "lecture" / "notes1.pdf").read_bytes() == b"%PDF shared notes"
+
+def test_changed_file_replaces_its_link(tmp_path, fixture_server, http_client_for):
+    destination = tmp_path / "out"
+    blob_root = str(destination / ".blobs")
+    scrape(destination, http_client_for(fixture_server(course_responses(MEDIA))), blob_store=CS50BlobStore(blob_root))
+
+    changed = [dict(files) for files in MEDIA]
+    changed[1][f"{MEDIA_URL}notes1.pdf"] = b"%PDF notes 1"
+    counters = scrape(destination, http_client_for(fixture_server(course_responses(changed))), blob_store=CS50BlobStore(blob_root))
+
+    assert counters['files_downloaded'] == 1
+    assert counters['files_linked'] == MEDIA_COUNT - 1
+    assert (destination / "cs50sql" / "week-1" / "lecture" / "notes1.pdf").read_bytes() == b"%PDF notes 1"
+    # The other link to the shared object is untouched
+    assert (destination / "cs50sql" / "week-0" / "lecture" / "notes0.pdf").read_bytes() == b"%PDF shared notes"
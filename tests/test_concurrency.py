@@ -0,0 +1,67 @@
+# tests/test_concurrency.py
+
+import time
+import email.utils
+
+from includes.cs50http import CS50ConcurrencyLimit, parse_retry_after
+
+from corpus import WEEK_URL, week_page, scripted_errors
+
+def test_throttled_response_halves_the_limit_and_pauses_the_host():
+    limit = CS50ConcurrencyLimit("cs50.harvard.edu page", max_limit=8, initial_limit=8)
+    started = time.monotonic()
+
+    limit.observe(0.01, 429, retry_after=2)
+
+    assert limit.limit == 4
+    assert not limit.slow_start
+    assert started + 2 <= limit.blocked_until <= time.monotonic() + 2
+    limit.observe(0.01, 503)
+    limit.observe(0.01, 503)
+    limit.observe(0.01, 503)
+    assert limit.limit == 1
+
+def test_limit_grows_additively_after_throttling():
+    limit = CS50ConcurrencyLimit("cs50.harvard.edu page", max_limit=8, initial_limit=2)
+    limit.observe(0.01, 200)
+    assert limit.limit == 3
+    limit.observe(0.01, 429)
+    assert limit.limit == 1.5
+    limit.observe(0.01, 200)
+    # One slot per round of responses, no longer doubling
+    assert limit.limit == 1.5 + 1 / 1.5
+
+def test_acquire_waits_for_retry_after():
+    limit = CS50ConcurrencyLimit("cs50.harvard.edu page", max_limit=4)
+    limit.observe(0.01, 429, retry_after=0.3)
+    started = time.monotonic()
+    limit.acquire()
+    limit.release()
+    assert time.monotonic() - started >= 0.25
+
+def test_parse_retry_after():
+    assert parse_retry_after("3") == 3
+    assert parse_retry_after(None) is None
+    assert parse_retry_after("soon") is None
+    seconds = parse_retry_after(email.utils.formatdate(time.time() + 60, usegmt=True))
+    assert 55 <= seconds <= 60
+    assert parse_retry_after(email.utils.formatdate(time.time() - 60, usegmt=True)) == 0
+
+def test_client_retries_after_retry_after_and_lowers_the_host_limit(fixture_server, http_client_for):
+    url = f"{WEEK_URL}0/"
+    server = fixture_server({url: week_page(0, [])})
+    # The first response is a 503 with Retry-After: 1
+    scripted_errors(server, [True])
+    http_client = http_client_for(server)
+    limit = http_client.concurrency.limit_for(url, 'page')
+    started = time.monotonic()
+
+    response = http_client.get(url)
+
+    assert response.status_code == 200
+    assert time.monotonic() - started >= 1
+    assert http_client.metrics.counters['status_503'] == 1
+    assert http_client.metrics.counters['status_200'] == 1
+    # Halved from 2 to 1, then one additive step instead of slow start's doubling
+    assert not limit.slow_start
+    assert limit.limit == 2
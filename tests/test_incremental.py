@@ -0,0 +1,53 @@
+# tests/test_incremental.py
+
+import os
+
+from corpus import MEDIA_URL, course_responses, zip_body, scrape
+
+MEDIA = [
+    {
+        f"{MEDIA_URL}w0.mp3": b"audio 0" * 1000,
+        f"{MEDIA_URL}src0.zip": zip_body({"src0/hello.sql": "SELECT 0;"}),
+        f"{MEDIA_URL}notes0.pdf": b"%PDF notes 0",
+        f"{MEDIA_URL}slides0.pdf": b"%PDF slides 0",
+    },
+    {
+        f"{MEDIA_URL}w1.mp3": b"audio 1" * 1000,
+        f"{MEDIA_URL}notes1.pdf": b"%PDF notes 1",
+    },
+]
+MEDIA_COUNT = sum(len(files) for files in MEDIA)
+
+def test_second_incremental_run_revalidates_and_skips(tmp_path, fixture_server, http_client_for):
+    server = fixture_server(course_responses(MEDIA))
+    destination = tmp_path / "out"
+
+    first = scrape(destination, http_client_for(server), incremental=True)
+    assert first['files_downloaded'] == MEDIA_COUNT
+
+    lecture_0 = destination / "cs50sql" / "week-0" / "lecture"
+    # Both PDFs of a week are kept, under the names in their URLs
+    assert (lecture_0 / "notes0.pdf").read_bytes() == b"%PDF notes 0"
+    assert (lecture_0 / "slides0.pdf").read_bytes() == b"%PDF slides 0"
+    assert (lecture_0 / "example_code" / "src0" / "hello.sql").read_text() == "SELECT 0;"
+    mtimes = {path: os.stat(path).st_mtime_ns for path in lecture_0.rglob("*") if path.is_file()}
+
+    second = scrape(destination, http_client_for(server), incremental=True)
+    assert 'files_downloaded' not in second
+    assert second['files_skipped'] == MEDIA_COUNT
+    # Every media file, the extracted archive included, was revalidated with one conditional request
+    assert second['status_304'] >= MEDIA_COUNT
+    assert 'bytes_downloaded' not in second
+    assert {path: os.stat(path).st_mtime_ns for path in lecture_0.rglob("*") if path.is_file()} == mtimes
+
+def test_changed_file_is_downloaded_again(tmp_path, fixture_server, http_client_for):
+    destination = tmp_path / "out"
+    scrape(destination, http_client_for(fixture_server(course_responses(MEDIA))), incremental=True)
+
+    changed = [dict(files) for files in MEDIA]
+    changed[1][f"{MEDIA_URL}notes1.pdf"] = b"%PDF notes 1, revised"
+    counters = scrape(destination, http_client_for(fixture_server(course_responses(changed))), incremental=True)
+
+    assert counters['files_downloaded'] == 1
+    assert counters['files_skipped'] == MEDIA_COUNT - 1
+    assert (destination / "cs50sql" / "week-1" / "lecture" / "notes1.pdf").read_bytes() == b"%PDF notes 1, revised"
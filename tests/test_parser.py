@@ -0,0 +1,135 @@
+# tests/test_parser.py
+
+import re
+import urllib.parse
+
+import pytest
+from bs4 import BeautifulSoup
+
+from includes.cs50 import CS50
+from includes.cs50parser import extract_problem_set_list
+
+from corpus import COURSE, WEEK_URL, PSET_URL, MEDIA_URL, week_page, pset_index_page, pset_page
+
+# Week pages covering the cases the single-pass parser handles differently from separate finds
+WEEK_PAGES = [
+    week_page(0, [f"{MEDIA_URL}w0.mp3", f"{MEDIA_URL}w0-720p.mp4", f"{MEDIA_URL}w0-1080p.mp4", f"{MEDIA_URL}src0.zip", f"{MEDIA_URL}notes0.pdf"]),
+    # No Shorts section and no tags paragraph
+    '<html><head><meta property="og:title" content="Lecture 1"></head><body><main class="col-lg"><h1>Lecture 1</h1></main></body></html>',
+    # A Shorts heading without a list, and links outside the main column
+    '<html><body><nav><p>Menu</p><a href="/x.pdf">Syllabus</a></nav><main class="col-lg"><p>tags</p><h1><span>Lecture</span> 2</h1>'
+    '<p>second</p><h2>Shorts</h2></main><footer><a href="https://cdn.cs50.net/sql/2024/src2.zip">Source</a></footer></body></html>',
+    # Shorts listed after other lists, and repeated meta tags
+    '<html><head><meta property="og:title" content="First"><meta property="og:title" content="Second">'
+    '<meta property="og:description" content="Only"></head><body><main class="col-lg"><ol><li><a href="/a">Not a short</a></li></ol>'
+    '<h1>Lecture 3</h1><h2>Shorts</h2><div><ol><li><a href="/s/1">One</a></li><li><a href="/s/2">Two <b>2</b></a></li></ol></div>'
+    '<ol><li><a href="/s/3">Later list</a></li></ol></main></body></html>',
+]
+
+class BaselineCS50:
+    """
+    The week page getters as they were before pages were parsed into records: one
+    BeautifulSoup find per field.
+    """
+
+    def __init__(self, html):
+        self.doc = BeautifulSoup(html, "html.parser")
+        self.col = self.doc.find('main', class_='col-lg')
+
+    def get_title(self):
+        meta_tag = self.doc.find('meta', property='og:title')
+        return f"Title: {meta_tag['content'] if meta_tag else 'No title found'}"
+
+    def get_description(self):
+        meta_tag = self.doc.find('meta', property='og:description')
+        return f"Desc: {meta_tag['content'] if meta_tag else 'No description found'}"
+
+    def get_week_tags(self):
+        self.h1_text = self.col.find('h1').get_text() if self.col.find('h1') else 'No h1 found'
+        tags_text = self.col.find('p').get_text() if self.col.find('p') else 'No tags found'
+        return f"Tags: {tags_text}"
+
+    def get_shorts(self):
+        shorts_string = self.doc.find(string="Shorts")
+        if shorts_string:
+            ordered_list = shorts_string.find_next('ol')
+            links = ordered_list.find_all('a') if ordered_list else []
+            return f"Short Videos: {[link.text for link in links]}"
+        return "No shorts found"
+
+    def get_media_links(self):
+        links = {}
+        for kind, pattern in (('audio', r'.*\.mp3$'), ('video', r'.*720p\.mp4$'), ('code', r'.*\.zip$'), ('pdf', r'.*\.pdf$')):
+            links[kind] = [link['href'] for link in self.doc.find_all('a', href=re.compile(pattern))]
+        return links
+
+def baseline_problem_set_list(html, course):
+    pset_col = BeautifulSoup(html, "html.parser").find('main', class_='col-lg')
+    if not pset_col:
+        return []
+    problem_sets = []
+    if course in ['python', 'ai']:
+        main_content = pset_col.find('ul')
+        if not main_content:
+            return []
+        for item in main_content.find_all('li'):
+            link = item.find('a')
+            problem_sets.append({'title': item.text.strip(), 'url': link['href'] if link else 'No URL'})
+    else:
+        for li in pset_col.find_all('li'):
+            if 'Submit' in li.text:
+                link = li.find('a')
+                if link:
+                    problem_sets.append({'title': link.text.strip(), 'url': link['href']})
+    return problem_sets
+
+@pytest.fixture
+def course_server(fixture_server):
+    responses = {f"{WEEK_URL}{week}/": html for week, html in enumerate(WEEK_PAGES)}
+    responses[f"{PSET_URL}0/"] = pset_index_page(["p0a", "p0b"])
+    responses[f"{PSET_URL}0/p0a/"] = pset_page("p0a", [f"{MEDIA_URL}dist0a.zip", "notes.pdf"])
+    responses[f"{PSET_URL}0/p0b/"] = '<html><body><div>No main column</div></body></html>'
+    return fixture_server(responses)
+
+@pytest.mark.parametrize("week", range(len(WEEK_PAGES)))
+def test_week_record_matches_baseline(course_server, http_client_for, week):
+    cs50 = CS50(COURSE, http_client=http_client_for(course_server))
+    record = cs50.scrape_page(week)
+    baseline = BaselineCS50(WEEK_PAGES[week])
+
+    assert cs50.get_title() == baseline.get_title()
+    assert cs50.get_description() == baseline.get_description()
+    if baseline.col is not None:
+        assert cs50.get_week_tags() == baseline.get_week_tags()
+        assert cs50.h1_text == baseline.h1_text
+    assert cs50.get_shorts() == baseline.get_shorts()
+    # Links are resolved against the page URL now; absolute links are unchanged
+    page_url = f"{WEEK_URL}{week}/"
+    expected_links = {kind: [urllib.parse.urljoin(page_url, link) for link in links] for kind, links in baseline.get_media_links().items()}
+    assert record['media_links'] == expected_links
+
+def test_missing_week_is_not_found(course_server, http_client_for):
+    cs50 = CS50(COURSE, http_client=http_client_for(course_server))
+    assert cs50.scrape_page(len(WEEK_PAGES)) is None
+
+def test_problem_sets_match_baseline(course_server, http_client_for):
+    cs50 = CS50(COURSE, http_client=http_client_for(course_server))
+    assert cs50.scrape_problem_set_page(0) is not None
+    problem_sets = cs50.get_problem_set_lists()
+    assert problem_sets == baseline_problem_set_list(pset_index_page(["p0a", "p0b"]), COURSE)
+
+    contents = cs50.get_problem_set(problem_sets, 0)
+    assert contents == {
+        "Problem p0a": BeautifulSoup(pset_page("p0a", [f"{MEDIA_URL}dist0a.zip", "notes.pdf"]), "html.parser").find('main', class_='col-lg').text.strip(),
+        "Problem p0b": "No content found",
+    }
+    record = cs50.get_problem_set_records(problem_sets[:1], 0)["Problem p0a"]
+    assert record['media_links']['code'] == [f"{MEDIA_URL}dist0a.zip"]
+    # Relative links are resolved against the problem set page
+    assert record['media_links']['pdf'] == [f"{PSET_URL}0/p0a/notes.pdf"]
+
+@pytest.mark.parametrize("course", ["python", "sql"])
+def test_problem_set_list_layouts(course):
+    html = ('<html><body><main class="col-lg"><ul><li><a href="p1/">Problem 1</a> Submit</li><li>Read the notes</li>'
+            '<li><a href="p2/">Problem 2</a></li></ul><ul><li><a href="p3/">Elsewhere</a> Submit</li></ul></main></body></html>')
+    assert extract_problem_set_list(html, course) == baseline_problem_set_list(html, course)
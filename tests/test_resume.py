@@ -0,0 +1,81 @@
+# tests/test_resume.py
+
+import os
+import json
+
+import pytest
+
+from includes.cs50filemanager import CS50FileManager
+
+from corpus import MEDIA_URL, scripted_errors
+
+URL = f"{MEDIA_URL}w0.mp3"
+# Several download chunks, so some of the body is on disk when the server drops the connection half way
+BODY = bytes(range(256)) * 16 * 1024
+
+@pytest.fixture
+def server(fixture_server):
+    return fixture_server({URL: BODY})
+
+def test_dropped_body_is_resumed_with_a_range_request(tmp_path, server, http_client_for):
+    # No 503, then drop the body; the retry is answered normally
+    scripted_errors(server, [False, True])
+    http_client = http_client_for(server)
+    file_name = str(tmp_path / "w0.mp3")
+
+    result = CS50FileManager(str(tmp_path), http_client=http_client).download_file(URL, file_name)
+
+    assert result == CS50FileManager.DOWNLOADED
+    with open(file_name, 'rb') as file:
+        assert file.read() == BODY
+    assert server.stats['errors'] == 1
+    counters = http_client.metrics.counters
+    assert counters['status_200'] == 1
+    assert counters['status_206'] == 1
+    # The resumed request only fetched the missing part of the body
+    assert counters['bytes_downloaded'] == len(BODY)
+    assert not os.path.exists(file_name + ".part")
+    assert not os.path.exists(file_name + ".part.json")
+
+def test_partial_file_of_another_version_is_restarted(tmp_path, server, http_client_for):
+    http_client = http_client_for(server)
+    file_name = str(tmp_path / "w0.mp3")
+    with open(file_name + ".part", 'wb') as file:
+        file.write(b"old version")
+    with open(file_name + ".part.json", 'w') as file:
+        json.dump({'etag': '"old"', 'last_modified': None}, file)
+
+    result = CS50FileManager(str(tmp_path), http_client=http_client).download_file(URL, file_name)
+
+    assert result == CS50FileManager.DOWNLOADED
+    with open(file_name, 'rb') as file:
+        assert file.read() == BODY
+    # If-Range did not match, so the server sent the whole new body
+    assert http_client.metrics.counters['status_200'] == 1
+    assert 'status_206' not in http_client.metrics.counters
+
+def test_partial_file_without_validator_is_discarded(tmp_path, server, http_client_for):
+    http_client = http_client_for(server)
+    file_name = str(tmp_path / "w0.mp3")
+    with open(file_name + ".part", 'wb') as file:
+        file.write(BODY[:1000])
+
+    result = CS50FileManager(str(tmp_path), http_client=http_client).download_file(URL, file_name)
+
+    assert result == CS50FileManager.DOWNLOADED
+    with open(file_name, 'rb') as file:
+        assert file.read() == BODY
+    assert 'status_206' not in http_client.metrics.counters
+
+def test_download_is_kept_partial_when_retries_run_out(tmp_path, server, http_client_for):
+    # Every attempt loses its body half way
+    scripted_errors(server, [False, True] * 10)
+    http_client = http_client_for(server, retries=1)
+    file_name = str(tmp_path / "w0.mp3")
+
+    result = CS50FileManager(str(tmp_path), http_client=http_client).download_file(URL, file_name)
+
+    assert result == CS50FileManager.SKIPPED
+    assert not os.path.exists(file_name)
+    assert 0 < os.path.getsize(file_name + ".part") < len(BODY)
+    assert os.path.exists(file_name + ".part.json")